@@ -4,6 +4,10 @@ from typing import List, Dict, Any
 
 from astrbot.api import logger
 from .data.default_configs import SECT_CONFIG, BOSS_CONFIG, RIFT_CONFIG, ALCHEMY_CONFIG
+from .data.level_table import LevelTable
+from .data.item_catalog import (
+    ItemCatalog, KIND_ITEM, KIND_WEAPON, KIND_PILL, KIND_EXP_PILL, KIND_UTILITY_PILL, KIND_STORAGE_RING
+)
 
 class ConfigManager:
     """配置管理器，加载境界、物品、武器和丹药配置"""
@@ -12,6 +16,9 @@ class ConfigManager:
         self._base_dir = base_dir
         self.level_data: List[dict] = []  # 灵修境界数据
         self.body_level_data: List[dict] = []  # 体修境界数据
+        self.level_table: LevelTable = LevelTable.from_config("灵修", [])  # 灵修境界表
+        self.body_level_table: LevelTable = LevelTable.from_config("体修", [])  # 体修境界表
+        self._required_level_names: tuple = ()  # 境界下标 -> "灵修名 / 体修名"
         self.items_data: Dict[str, dict] = {}  # 物品数据，key为物品名称
         self.weapons_data: Dict[str, dict] = {}  # 武器数据，key为武器名称
         self.pills_data: Dict[str, dict] = {}  # 破境丹数据，key为丹药名称
@@ -24,6 +31,9 @@ class ConfigManager:
         self.boss_config: Dict[str, Any] = {}
         self.rift_config: Dict[str, Any] = {}
         self.alchemy_config: Dict[str, Any] = {}
+
+        # 统一物品目录（名称 -> 条目及二级索引），每次加载整体重建
+        self.catalog: ItemCatalog = ItemCatalog({})
         
         self._load_all()
 
@@ -33,6 +43,18 @@ class ConfigManager:
             return self.body_level_data
         return self.level_data
 
+    def get_level_table(self, cultivation_type: str = "灵修") -> LevelTable:
+        """根据修炼类型获取对应的境界表"""
+        if cultivation_type == "体修":
+            return self.body_level_table
+        return self.level_table
+
+    def format_required_level(self, level_index: int, default: str = "") -> str:
+        """同时展示灵修/体修的需求境界名称，两者都没有时返回 default"""
+        if 0 <= level_index < len(self._required_level_names):
+            return self._required_level_names[level_index] or default
+        return default
+
     def _load_json_data(self, file_path: Path) -> List[dict]:
         """加载JSON配置文件（列表格式）"""
         if not file_path.exists():
@@ -108,6 +130,9 @@ class ConfigManager:
         # 加载基础配置
         self.level_data = self._load_json_data(config_dir / "level_config.json")
         self.body_level_data = self._load_json_data(config_dir / "body_level_config.json")
+        self.level_table = LevelTable.from_config("灵修", self.level_data)
+        self.body_level_table = LevelTable.from_config("体修", self.body_level_data)
+        self._required_level_names = self._build_required_level_names()
         self.items_data = self._load_items_data(config_dir / "items.json")
         self.weapons_data = self._load_items_data(config_dir / "weapons.json")
         self.pills_data = self._load_items_data(config_dir / "pills.json")
@@ -128,47 +153,51 @@ class ConfigManager:
         # 加载游戏配置（包含各系统的硬编码参数）
         self.game_config = self._load_config_with_default(config_dir / "game_config.json", {})
         
-        self._pill_names_cache = None
+        # 构建完成后一次性替换引用，读取方不会看到半成品目录
+        self.catalog = self._build_catalog()
 
         logger.info(
             f"配置管理器初始化完成，"
             f"加载了 {len(self.level_data)} 个灵修境界配置，"
             f"{len(self.body_level_data)} 个体修境界配置，"
+            f"{len(self.catalog)} 个物品目录条目，"
             f"以及新系统配置 (宗门/Boss/秘境/炼丹)"
         )
+
+    def _build_required_level_names(self) -> tuple:
+        """预先拼接各境界下标的需求境界名称（灵修/体修同名时只显示一次）"""
+        spirit, body = self.level_table, self.body_level_table
+        names = []
+        for index in range(max(len(spirit), len(body))):
+            parts = []
+            for name in (spirit.name(index, ""), body.name(index, "")):
+                if name and name not in parts:
+                    parts.append(name)
+            names.append(" / ".join(parts))
+        return tuple(names)
+
+    def _build_catalog(self) -> ItemCatalog:
+        """根据已加载的物品配置构建物品目录"""
+        return ItemCatalog({
+            KIND_ITEM: self.items_data,
+            KIND_WEAPON: self.weapons_data,
+            KIND_PILL: self.pills_data,
+            KIND_EXP_PILL: self.exp_pills_data,
+            KIND_UTILITY_PILL: self.utility_pills_data,
+            KIND_STORAGE_RING: self.storage_rings_data,
+        })
+
+    def reload(self):
+        """重新加载所有配置文件，物品目录随之整体替换"""
+        self._load_all()
     
     def is_pill(self, item_name: str) -> bool:
         """检查物品是否为丹药类型（统一的丹药判断方法）"""
-        if item_name in self.pills_data:
-            return True
-        if item_name in self.exp_pills_data:
-            return True
-        if item_name in self.utility_pills_data:
-            return True
-        
-        item_config = self.items_data.get(item_name)
-        if item_config and item_config.get("type") == "丹药":
-            return True
-        
-        return False
+        return item_name in self.catalog.pill_names
     
-    def get_all_pill_names(self) -> set:
+    def get_all_pill_names(self) -> frozenset:
         """获取所有注册的丹药名称"""
-        if self._pill_names_cache is not None:
-            return self._pill_names_cache
-        
-        pill_names = set()
-        pill_names.update(self.pills_data.keys())
-        pill_names.update(self.exp_pills_data.keys())
-        pill_names.update(self.utility_pills_data.keys())
-        
-        for name, item in self.items_data.items():
-            if isinstance(item, dict) and item.get("type") == "丹药":
-                pill_names.add(name)
-        
-        self._pill_names_cache = pill_names
-        return pill_names
+        return self.catalog.pill_names
     
     def invalidate_cache(self):
-        """清除缓存，在配置重载时调用"""
-        self._pill_names_cache = None
+        """兼容旧接口：物品目录在加载配置时整体重建，无需单独清除"""
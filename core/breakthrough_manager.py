@@ -26,22 +26,21 @@ class BreakthroughManager:
         Returns:
             (是否满足, 错误消息)
         """
-        # 根据修炼类型获取对应的境界数据
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
+        # 根据修炼类型获取对应的境界表
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
 
         # 检查是否已经是最高境界
-        if player.level_index >= len(level_data) - 1:
+        if player.level_index >= level_table.max_index:
             return False, "你已经达到了最高境界，无法继续突破！"
 
         # 获取下一境界所需修为
         next_level_index = player.level_index + 1
-        next_level_data = level_data[next_level_index]
-        required_exp = next_level_data.get("exp_needed", 0)
+        required_exp = level_table.exp_needed[next_level_index]
 
-        # 检查修为是否满足
-        if player.experience < required_exp:
-            current_level = level_data[player.level_index]["level_name"]
-            next_level = next_level_data["level_name"]
+        # 检查修为是否满足：修为足以达到的最高境界须高于当前境界
+        if level_table.level_for_exp(player.experience) <= player.level_index:
+            current_level = level_table.name(player.level_index)
+            next_level = level_table.names[next_level_index]
             return False, (
                 f"修为不足！\n"
                 f"当前境界：{current_level}\n"
@@ -66,13 +65,9 @@ class BreakthroughManager:
         Returns:
             (成功率, 说明信息)
         """
-        # 根据修炼类型获取对应的境界数据
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
-
         # 获取基础成功率
-        next_level_index = player.level_index + 1
-        next_level_data = level_data[next_level_index]
-        base_success_rate = next_level_data.get("success_rate", 0.5)
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
+        base_success_rate = level_table.success_rate(player.level_index + 1)
 
         info_lines = [
             f"基础成功率：{base_success_rate:.1%}"
@@ -131,17 +126,17 @@ class BreakthroughManager:
         # 计算成功率
         success_rate, rate_info = self.calculate_breakthrough_success_rate(player, pill_name, temp_bonus)
 
-        # 根据修炼类型获取对应的境界数据
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
+        # 根据修炼类型获取对应的境界表
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
 
         # 判定突破结果
         random_value = random.random()
         breakthrough_success = random_value < success_rate
 
-        current_level_name = level_data[player.level_index]["level_name"]
+        current_level_name = level_table.name(player.level_index)
         next_level_index = player.level_index + 1
-        next_level_data = level_data[next_level_index]
-        next_level_name = next_level_data["level_name"]
+        next_level_data = level_table.entries[next_level_index]
+        next_level_name = level_table.names[next_level_index]
 
         if breakthrough_success:
             # 检查是否需要渡天劫（金丹期及以上）
@@ -1,13 +1,35 @@
 # core/equipment_manager.py
 
-from typing import Optional, List, Dict, TYPE_CHECKING
+import json
+from functools import lru_cache
+from typing import Optional, List, Dict, Mapping, Tuple, TYPE_CHECKING
 from ..models import Player, Item
 from ..data import DataBase
+from ..data.item_catalog import parse_equipment_config
 
 if TYPE_CHECKING:
     from ..config_manager import ConfigManager
     from .storage_ring_manager import StorageRingManager
 
+
+def combat_power_from_attributes(total_attrs: dict) -> int:
+    """由总属性计算战力：物伤 + 法伤 + 物防 + 法防 + 精神力/10"""
+    return (
+        int(total_attrs['physical_damage']) + int(total_attrs['magic_damage']) +
+        int(total_attrs['physical_defense']) + int(total_attrs['magic_defense']) +
+        int(total_attrs['mental_power']) // 10
+    )
+
+@lru_cache(maxsize=4096)
+def _parse_techniques(techniques: str) -> Tuple[str, ...]:
+    """解析功法列表 JSON（结果不可变，相同字符串只解析一次）"""
+    try:
+        names = json.loads(techniques)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return ()
+    return tuple(names) if isinstance(names, list) else ()
+
+
 class EquipmentManager:
     """装备管理器 - 处理装备的穿戴、卸下和属性计算"""
 
@@ -30,6 +52,11 @@ class EquipmentManager:
         if not item_name or item_name == "":
             return None
 
+        # 传入的是当前配置时直接取物品目录中预先解析好的装备对象
+        catalog_items = self._catalog_items(items_data, weapons_data)
+        if catalog_items is not None:
+            return catalog_items.get(item_name)
+
         # 先从物品配置中查找
         item_config = items_data.get(item_name)
 
@@ -40,40 +67,8 @@ class EquipmentManager:
         if not item_config:
             return None
 
-        # 处理新旧格式兼容性
-        item_type = item_config.get("type", "")
-        physical_damage = item_config.get("physical_damage", 0)
-        physical_defense = item_config.get("physical_defense", 0)
-        magic_damage = item_config.get("magic_damage", 0)
-        magic_defense = item_config.get("magic_defense", 0)
-        mental_power = item_config.get("mental_power", 0)
-
-        # 旧格式兼容：处理 items.json 中的法器（equip_effects 格式）
-        if "equip_effects" in item_config:
-            equip_effects = item_config["equip_effects"]
-            # 旧格式 attack -> physical_damage
-            if "attack" in equip_effects:
-                physical_damage = equip_effects["attack"]
-            # 旧格式 defense -> physical_defense
-            if "defense" in equip_effects:
-                physical_defense = equip_effects["defense"]
-            # 旧格式 max_hp 可用于体修的 blood_qi 加成
-
-        # 旧格式兼容：处理类型映射
-        # "法器" + subtype="武器" -> "weapon"
-        # "法器" + subtype="防具" -> "armor"
-        # "法器" + subtype="饰品" -> "accessory" (暂不支持装备)
-        if item_type == "法器":
-            subtype = item_config.get("subtype", "")
-            if subtype == "武器":
-                item_type = "weapon"
-            elif subtype == "防具":
-                item_type = "armor"
-            elif subtype == "饰品":
-                item_type = "accessory"
-        elif item_type == "功法":
-            # 旧格式功法 -> technique
-            item_type = "technique"
+        # 处理新旧格式兼容性（equip_effects、法器/功法类型映射）
+        item_type, stats = parse_equipment_config(item_config)
 
         return Item(
             item_id=item_config.get("id", item_name),
@@ -83,14 +78,7 @@ class EquipmentManager:
             rank=item_config.get("rank", ""),
             required_level_index=item_config.get("required_level_index", 0),
             weapon_category=item_config.get("weapon_category", ""),
-            magic_damage=magic_damage,
-            physical_damage=physical_damage,
-            magic_defense=magic_defense,
-            physical_defense=physical_defense,
-            mental_power=mental_power,
-            exp_multiplier=item_config.get("exp_multiplier", 0.0),
-            spiritual_qi=item_config.get("spiritual_qi", 0),
-            blood_qi=item_config.get("blood_qi", 0)
+            **stats
         )
 
     def get_equipped_items(self, player: Player, items_data: dict, weapons_data: dict = None) -> List[Item]:
@@ -104,35 +92,48 @@ class EquipmentManager:
         Returns:
             已装备物品列表
         """
-        equipped = []
-
-        # 武器
-        if player.weapon:
-            item = self.parse_item_from_name(player.weapon, items_data, weapons_data)
-            if item:
-                equipped.append(item)
-
-        # 防具
-        if player.armor:
-            item = self.parse_item_from_name(player.armor, items_data, weapons_data)
-            if item:
-                equipped.append(item)
-
-        # 主修心法
-        if player.main_technique:
-            item = self.parse_item_from_name(player.main_technique, items_data, weapons_data)
-            if item:
-                equipped.append(item)
+        catalog_items = self._catalog_items(items_data, weapons_data)
+        if catalog_items is None:
+            def lookup(name):
+                return self.parse_item_from_name(name, items_data, weapons_data)
+        else:
+            lookup = catalog_items.get
 
-        # 功法列表
-        techniques_list = player.get_techniques_list()
-        for technique_name in techniques_list:
-            item = self.parse_item_from_name(technique_name, items_data, weapons_data)
+        # 武器、防具、主修心法、功法列表
+        equipped = []
+        for name in (player.weapon, player.armor, player.main_technique):
+            if name:
+                item = lookup(name)
+                if item:
+                    equipped.append(item)
+        for technique_name in _parse_techniques(player.techniques):
+            item = lookup(technique_name)
             if item:
                 equipped.append(item)
 
         return equipped
 
+    def _catalog_items(self, items_data: dict, weapons_data: Optional[dict]) -> Optional[Mapping[str, Item]]:
+        """配置字典来自当前 ConfigManager 时返回物品目录中的名称 -> 装备映射，否则返回 None"""
+        config_manager = self.config_manager
+        if config_manager is None or items_data is not config_manager.items_data:
+            return None
+        catalog = config_manager.catalog
+        if weapons_data is config_manager.weapons_data:
+            return catalog.equipment
+        if not weapons_data:
+            return catalog.items
+        return None
+
+    def calculate_combat_power(self, player: Player) -> int:
+        """计算玩家的基础战力（装备加成后、不含临时丹药效果），即存储在 combat_power 列中的值"""
+        equipped_items = self.get_equipped_items(
+            player,
+            self.config_manager.items_data,
+            self.config_manager.weapons_data
+        )
+        return combat_power_from_attributes(player.get_total_attributes(equipped_items, None))
+
     def check_equipment_level_requirement(self, player: Player, item: Item) -> tuple[bool, str]:
         """检查玩家是否满足装备的境界要求
 
@@ -153,22 +154,7 @@ class EquipmentManager:
         """格式化需求境界名称（同时显示灵修/体修）"""
         if not self.config_manager:
             return f"境界{level_index}"
-
-        names = []
-        # 灵修境界名称
-        if 0 <= level_index < len(self.config_manager.level_data):
-            name = self.config_manager.level_data[level_index].get("level_name", "")
-            if name:
-                names.append(name)
-        # 体修境界名称
-        if 0 <= level_index < len(self.config_manager.body_level_data):
-            name = self.config_manager.body_level_data[level_index].get("level_name", "")
-            if name and name not in names:
-                names.append(name)
-
-        if not names:
-            return f"境界{level_index}"
-        return " / ".join(names)
+        return self.config_manager.format_required_level(level_index, f"境界{level_index}")
 
     async def equip_item(self, player: Player, item: Item) -> tuple[bool, str]:
         """装备物品
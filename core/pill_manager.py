@@ -7,6 +7,7 @@ from astrbot.api import logger
 from ..models import Player
 from ..data import DataBase
 from ..config_manager import ConfigManager
+from ..data.item_catalog import PILL_KINDS
 
 
 class PillManager:
@@ -51,22 +52,9 @@ class PillManager:
         Returns:
             丹药配置字典，如果找不到返回None
         """
-        # 尝试从破境丹中查找
-        pill = self.config_manager.pills_data.get(pill_name)
-        if pill:
-            return pill
-
-        # 尝试从修为丹中查找
-        pill = self.config_manager.exp_pills_data.get(pill_name)
-        if pill:
-            return pill
-
-        # 尝试从功能丹中查找
-        pill = self.config_manager.utility_pills_data.get(pill_name)
-        if pill:
-            return pill
-
-        return None
+        # 依次在破境丹、修为丹、功能丹中查找
+        entry = self.config_manager.catalog.get(pill_name, PILL_KINDS)
+        return entry.data if entry else None
 
     async def update_temporary_effects(self, player: Player):
         """更新临时丹药效果，移除过期效果
@@ -109,8 +97,7 @@ class PillManager:
             (是否成功, 消息)
         """
         # 检查背包是否有该丹药
-        inventory = player.get_pills_inventory()
-        if pill_name not in inventory or inventory[pill_name] <= 0:
+        if await self.db.ext.get_player_pill_count(player.user_id, pill_name) <= 0:
             return False, f"你的背包中没有【{pill_name}】！"
 
         # 获取丹药配置
@@ -122,15 +109,18 @@ class PillManager:
         required_level = pill_data.get("required_level_index", 0)
         if player.level_index < required_level:
             # 根据玩家修炼类型获取对应境界名称
-            level_data = self.config_manager.get_level_data(player.cultivation_type)
-            level_name = f"境界{required_level}"
-            if 0 <= required_level < len(level_data):
-                level_name = level_data[required_level]["level_name"]
+            level_table = self.config_manager.get_level_table(player.cultivation_type)
+            level_name = level_table.name(required_level, f"境界{required_level}")
             return False, (
                 f"境界不足！使用【{pill_name}】需要达到【{level_name}】"
             )
 
-        # 根据丹药类型处理
+        # 扣除丹药与属性变化在同一事务中提交
+        async with self.db.transaction():
+            return await self._apply_pill(player, pill_name, pill_data)
+
+    async def _apply_pill(self, player: Player, pill_name: str, pill_data: dict) -> Tuple[bool, str]:
+        """根据丹药类型结算效果并扣除丹药"""
         effect_type = pill_data.get("effect_type", "instant")
         subtype = pill_data.get("subtype", "")
 
@@ -158,11 +148,8 @@ class PillManager:
         player.experience += exp_gain
 
         # 扣除丹药
-        inventory = player.get_pills_inventory()
-        inventory[pill_name] -= 1
-        if inventory[pill_name] <= 0:
-            del inventory[pill_name]
-        player.set_pills_inventory(inventory)
+        if not await self.db.ext.remove_player_pill(player.user_id, pill_name):
+            return False, f"你的背包中没有【{pill_name}】！"
 
         await self.db.update_player(player)
 
@@ -182,11 +169,8 @@ class PillManager:
         player.has_resurrection_pill = True
 
         # 扣除丹药
-        inventory = player.get_pills_inventory()
-        inventory[pill_name] -= 1
-        if inventory[pill_name] <= 0:
-            del inventory[pill_name]
-        player.set_pills_inventory(inventory)
+        if not await self.db.ext.remove_player_pill(player.user_id, pill_name):
+            return False, f"你的背包中没有【{pill_name}】！"
 
         await self.db.update_player(player)
 
@@ -234,11 +218,8 @@ class PillManager:
         player.set_active_pill_effects(effects)
 
         # 扣除丹药
-        inventory = player.get_pills_inventory()
-        inventory[pill_name] -= 1
-        if inventory[pill_name] <= 0:
-            del inventory[pill_name]
-        player.set_pills_inventory(inventory)
+        if not await self.db.ext.remove_player_pill(player.user_id, pill_name):
+            return False, f"你的背包中没有【{pill_name}】！"
 
         await self.db.update_player(player)
 
@@ -411,11 +392,8 @@ class PillManager:
         player.set_permanent_pill_gains(permanent_gains)
 
         # 扣除丹药
-        inventory = player.get_pills_inventory()
-        inventory[pill_name] -= 1
-        if inventory[pill_name] <= 0:
-            del inventory[pill_name]
-        player.set_pills_inventory(inventory)
+        if not await self.db.ext.remove_player_pill(player.user_id, pill_name):
+            return False, f"你的背包中没有【{pill_name}】！"
 
         await self.db.update_player(player)
 
@@ -508,11 +486,8 @@ class PillManager:
                 msg_parts.append("🛡️ 获得定魂护盾：下一次负面效果将被抵消")
 
         # 扣除丹药
-        inventory = player.get_pills_inventory()
-        inventory[pill_name] -= 1
-        if inventory[pill_name] <= 0:
-            del inventory[pill_name]
-        player.set_pills_inventory(inventory)
+        if not await self.db.ext.remove_player_pill(player.user_id, pill_name):
+            return False, f"你的背包中没有【{pill_name}】！"
 
         await self.db.update_player(player)
 
@@ -529,15 +504,14 @@ class PillManager:
         Returns:
             基础属性字典
         """
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
-        # 兜底：如果数据为空，使用灵修配置避免索引错误
-        if not level_data:
-            level_data = self.config_manager.level_data
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
+        # 兜底：如果数据为空，使用灵修境界表避免索引错误
+        if not len(level_table):
+            level_table = self.config_manager.level_table
 
         # 越界保护
-        if level_data:
-            level_index = min(level_index, len(level_data) - 1)
-            level_config = level_data[level_index]
+        if len(level_table):
+            level_config = level_table.entries[min(level_index, level_table.max_index)]
         else:
             level_config = {}
 
@@ -684,15 +658,9 @@ class PillManager:
             pill_name: 丹药名称
             count: 数量
         """
-        inventory = player.get_pills_inventory()
-        if pill_name in inventory:
-            inventory[pill_name] += count
-        else:
-            inventory[pill_name] = count
-        player.set_pills_inventory(inventory)
-        await self.db.update_player(player)
+        await self.db.ext.add_player_pill(player.user_id, pill_name, count)
 
-    def get_pill_inventory_display(self, player: Player) -> str:
+    async def get_pill_inventory_display(self, player: Player) -> str:
         """获取丹药背包显示文本
 
         Args:
@@ -701,7 +669,7 @@ class PillManager:
         Returns:
             丹药背包的格式化文本
         """
-        inventory = player.get_pills_inventory()
+        inventory = await self.db.ext.get_player_pills(player.user_id)
         if not inventory:
             return "你的丹药背包是空的！"
 
@@ -7,6 +7,7 @@ from typing import List, Dict, Optional, Tuple
 
 from astrbot.api import AstrBotConfig, logger
 from ..config_manager import ConfigManager
+from ..data.item_catalog import KIND_ITEM
 from ..models import Item
 
 class ShopManager:
@@ -15,92 +16,34 @@ class ShopManager:
     def __init__(self, config: AstrBotConfig, config_manager: ConfigManager):
         self.config = config
         self.config_manager = config_manager
+        # 可售物品列表只依赖物品目录，目录重建（重载配置）后才重新生成
+        self._shop_items: List[Dict] = []
+        self._shop_items_catalog = None
 
     def _format_required_level(self, level_index: int) -> str:
         """同时展示灵修/体修的需求境界名称"""
-        names = []
-        if 0 <= level_index < len(self.config_manager.level_data):
-            name = self.config_manager.level_data[level_index].get("level_name", "")
-            if name:
-                names.append(name)
-        if 0 <= level_index < len(self.config_manager.body_level_data):
-            name = self.config_manager.body_level_data[level_index].get("level_name", "")
-            if name and name not in names:
-                names.append(name)
-        if not names:
-            return "未知境界"
-        return " / ".join(names)
+        return self.config_manager.format_required_level(level_index, "未知境界")
 
     def _get_all_shop_items(self) -> List[Dict]:
-        """获取所有可以在商店出售的物品"""
-        all_items = []
-
-        # 添加武器
-        for weapon in self.config_manager.weapons_data.values():
-            if weapon.get('shop_weight', 0) > 0 and weapon.get('price', 0) > 0:
-                all_items.append({
-                    'id': weapon['id'],
-                    'name': weapon['name'],
-                    'type': 'weapon',
-                    'price': weapon['price'],
-                    'weight': weapon['shop_weight'],
-                    'rank': weapon.get('rank', '凡品'),
-                    'data': weapon
-                })
-
-        # 添加物品（防具、心法、功法）
-        for item in self.config_manager.items_data.values():
-            if item.get('shop_weight', 0) > 0 and item.get('price', 0) > 0:
-                all_items.append({
-                    'id': item.get('id', item['name']),
-                    'name': item['name'],
-                    'type': item['type'],
-                    'price': item['price'],
-                    'weight': item['shop_weight'],
-                    'rank': item.get('rank', '凡品'),
-                    'data': item
-                })
-
-        # 添加破境丹
-        for pill in self.config_manager.pills_data.values():
-            if pill.get('shop_weight', 0) > 0 and pill.get('price', 0) > 0:
-                all_items.append({
-                    'id': pill['id'],
-                    'name': pill['name'],
-                    'type': 'pill',
-                    'price': pill['price'],
-                    'weight': pill['shop_weight'],
-                    'rank': pill.get('rank', '凡品'),
-                    'data': pill
-                })
-
-        # 添加修为丹
-        for pill in self.config_manager.exp_pills_data.values():
-            if pill.get('shop_weight', 0) > 0 and pill.get('price', 0) > 0:
-                all_items.append({
-                    'id': pill['id'],
-                    'name': pill['name'],
-                    'type': 'exp_pill',
-                    'price': pill['price'],
-                    'weight': pill['shop_weight'],
-                    'rank': pill.get('rank', '凡品'),
-                    'data': pill
-                })
-
-        # 添加功能丹
-        for pill in self.config_manager.utility_pills_data.values():
-            if pill.get('shop_weight', 0) > 0 and pill.get('price', 0) > 0:
-                all_items.append({
-                    'id': pill['id'],
-                    'name': pill['name'],
-                    'type': 'utility_pill',
-                    'price': pill['price'],
-                    'weight': pill['shop_weight'],
-                    'rank': pill.get('rank', '凡品'),
-                    'data': pill
-                })
-
-        return all_items
+        """获取所有可以在商店出售的物品（武器、物品、破境丹、修为丹、功能丹）"""
+        catalog = self.config_manager.catalog
+        if self._shop_items_catalog is not catalog:
+            self._shop_items = [
+                {
+                    'id': entry.data.get('id', entry.name),
+                    'name': entry.name,
+                    # 物品（防具、心法、功法）使用配置中的类型，其余使用来源名
+                    'type': entry.item_type if entry.kind == KIND_ITEM else entry.kind,
+                    'price': entry.price,
+                    'weight': entry.shop_weight,
+                    'rank': entry.data.get('rank', '凡品'),
+                    'data': entry.data
+                }
+                for entry in catalog.shop_entries
+            ]
+            self._shop_items_catalog = catalog
+        # 调用方会增删列表元素，返回副本
+        return list(self._shop_items)
 
     def _weighted_random_choice(self, items: List[Dict], count: int) -> List[Dict]:
         """基于权重的随机选择（不重复）"""
@@ -29,27 +29,29 @@ class StorageRingManager:
             return config.get("capacity", 20)
         return 20
 
-    def get_used_slots(self, player: Player) -> int:
+    async def get_used_slots(self, player: Player) -> int:
         """获取已使用的格子数（每种物品占1格，不管数量多少）"""
-        items = player.get_storage_ring_items()
-        return len(items)  # 物品种类数 = 已用格子数
+        return await self.db.ext.count_player_item_kinds(player.user_id)  # 物品种类数 = 已用格子数
 
-    def get_available_slots(self, player: Player) -> int:
+    async def get_available_slots(self, player: Player) -> int:
         """获取可用的格子数"""
         capacity = self.get_ring_capacity(player.storage_ring)
-        used = self.get_used_slots(player)
+        used = await self.get_used_slots(player)
         return capacity - used
 
-    def get_space_warning(self, player: Player) -> Optional[str]:
+    async def get_space_warning(self, player: Player) -> Optional[str]:
         """获取储物戒空间警告（已满或剩余2格以下）
 
         Returns:
             警告消息，如果不需要警告则返回None
         """
-        available = self.get_available_slots(player)
         capacity = self.get_ring_capacity(player.storage_ring)
-        used = self.get_used_slots(player)
+        used = await self.get_used_slots(player)
+        return self._format_space_warning(used, capacity)
 
+    def _format_space_warning(self, used: int, capacity: int) -> Optional[str]:
+        """根据已用格子数与容量生成空间警告"""
+        available = capacity - used
         if available == 0:
             return f"⚠️ 储物戒已满！({used}/{capacity}格)"
         elif available <= 2:
@@ -72,118 +74,78 @@ class StorageRingManager:
 
         return True, ""
 
-    async def store_item(self, player: Player, item_name: str, count: int = 1, silent: bool = False, external_transaction: bool = False) -> Tuple[bool, str]:
+    async def store_item(self, player: Player, item_name: str, count: int = 1, silent: bool = False) -> Tuple[bool, str]:
         """将物品存入储物戒（带事务保护）
-        
-        Args:
-            external_transaction: 如果为True，表示外部已有事务，跳过内部事务管理
+
+        在外部事务中调用时作为其中的一步（保存点），随外部事务提交或回滚。
         """
         can_store, reason = self.can_store_item(item_name)
         if not can_store:
             return False, reason
 
-        if not external_transaction:
-            await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
-            items = player.get_storage_ring_items()
-
-            if item_name not in items:
-                available = self.get_available_slots(player)
-                if available <= 0:
-                    if not external_transaction:
-                        await self.db.conn.rollback()
-                    capacity = self.get_ring_capacity(player.storage_ring)
+            capacity = self.get_ring_capacity(player.storage_ring)
+            used = await self.get_used_slots(player)
+
+            # 新物品需要占用一个空格子
+            if await self.db.ext.get_player_item_count(player.user_id, item_name) <= 0:
+                if capacity - used <= 0:
+                    await tx.rollback()
                     return False, f"储物戒已满！({capacity}/{capacity}格)"
+                used += 1
 
-            items[item_name] = items.get(item_name, 0) + count
-            player.set_storage_ring_items(items)
-            await self.db.update_player(player)
-            if not external_transaction:
-                await self.db.conn.commit()
-
-            capacity = self.get_ring_capacity(player.storage_ring)
-            used = self.get_used_slots(player)
+            await self.db.ext.add_player_item(player.user_id, item_name, count)
 
             if silent:
                 return True, ""
 
-            warning = self.get_space_warning(player)
+            warning = self._format_space_warning(used, capacity)
             msg = f"已将【{item_name}】x{count} 存入储物戒（{used}/{capacity}格）"
             if warning:
                 msg += f"\n{warning}"
 
             return True, msg
-        except Exception:
-            if not external_transaction:
-                await self.db.conn.rollback()
-            raise
 
     async def retrieve_item(self, player: Player, item_name: str, count: int = 1) -> Tuple[bool, str]:
         """从储物戒取出物品（带事务保护）"""
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
-            items = player.get_storage_ring_items()
+            current_count = await self.db.ext.get_player_item_count(player.user_id, item_name)
 
-            if item_name not in items:
-                await self.db.conn.rollback()
+            if current_count <= 0:
+                await tx.rollback()
                 return False, f"储物戒中没有【{item_name}】"
 
-            current_count = items[item_name]
             if count > current_count:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"储物戒中【{item_name}】数量不足（当前：{current_count}个）"
 
-            if count >= current_count:
-                del items[item_name]
-            else:
-                items[item_name] = current_count - count
-
-            player.set_storage_ring_items(items)
-            await self.db.update_player(player)
-            await self.db.conn.commit()
+            await self.db.ext.remove_player_item(player.user_id, item_name, count)
 
             capacity = self.get_ring_capacity(player.storage_ring)
-            used = self.get_used_slots(player)
+            used = await self.get_used_slots(player)
             return True, f"已从储物戒取出【{item_name}】x{count}（{used}/{capacity}格）"
-        except Exception:
-            await self.db.conn.rollback()
-            raise
 
     async def discard_item(self, player: Player, item_name: str, count: int = 1) -> Tuple[bool, str]:
         """丢弃储物戒中的物品（带事务保护）"""
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
-            items = player.get_storage_ring_items()
+            current_count = await self.db.ext.get_player_item_count(player.user_id, item_name)
 
-            if item_name not in items:
-                await self.db.conn.rollback()
+            if current_count <= 0:
+                await tx.rollback()
                 return False, f"储物戒中没有【{item_name}】"
 
-            current_count = items[item_name]
             if count > current_count:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"储物戒中【{item_name}】数量不足（当前：{current_count}个）"
 
-            if count >= current_count:
-                del items[item_name]
-                discard_count = current_count
-            else:
-                items[item_name] = current_count - count
-                discard_count = count
-
-            player.set_storage_ring_items(items)
-            await self.db.update_player(player)
-            await self.db.conn.commit()
+            await self.db.ext.remove_player_item(player.user_id, item_name, count)
 
             capacity = self.get_ring_capacity(player.storage_ring)
-            used = self.get_used_slots(player)
-            return True, f"已丢弃【{item_name}】x{discard_count}（{used}/{capacity}格）"
-        except Exception:
-            await self.db.conn.rollback()
-            raise
+            used = await self.get_used_slots(player)
+            return True, f"已丢弃【{item_name}】x{count}（{used}/{capacity}格）"
 
     def check_upgrade_requirement(self, player: Player, new_ring_name: str) -> Tuple[bool, str]:
         """检查玩家是否满足储物戒升级要求"""
@@ -211,19 +173,7 @@ class StorageRingManager:
 
     def _format_required_level(self, level_index: int) -> str:
         """格式化需求境界名称（同时显示灵修/体修）"""
-        names = []
-        if 0 <= level_index < len(self.config_manager.level_data):
-            name = self.config_manager.level_data[level_index].get("level_name", "")
-            if name:
-                names.append(name)
-        if 0 <= level_index < len(self.config_manager.body_level_data):
-            name = self.config_manager.body_level_data[level_index].get("level_name", "")
-            if name and name not in names:
-                names.append(name)
-
-        if not names:
-            return f"境界{level_index}"
-        return " / ".join(names)
+        return self.config_manager.format_required_level(level_index, f"境界{level_index}")
 
     async def upgrade_ring(self, player: Player, new_ring_name: str) -> Tuple[bool, str]:
         """升级/替换储物戒"""
@@ -257,12 +207,12 @@ class StorageRingManager:
             f"品级：{ring_config.get('rank', '未知')}{cost_msg}"
         )
 
-    def get_storage_ring_info(self, player: Player) -> dict:
+    async def get_storage_ring_info(self, player: Player) -> dict:
         """获取储物戒完整信息"""
         ring_config = self.get_storage_ring_config(player.storage_ring) or {}
-        items = player.get_storage_ring_items()
+        items = await self.db.ext.get_player_items(player.user_id)
         capacity = self.get_ring_capacity(player.storage_ring)
-        used = self.get_used_slots(player)
+        used = len(items)
 
         return {
             "name": player.storage_ring,
@@ -289,11 +239,14 @@ class StorageRingManager:
         rings.sort(key=lambda x: x["capacity"])
         return rings
 
-    def get_item_count(self, player: Player, item_name: str) -> int:
+    async def get_items(self, player: Player) -> Dict[str, int]:
+        """获取储物戒中的全部物品 {物品名: 数量}"""
+        return await self.db.ext.get_player_items(player.user_id)
+
+    async def get_item_count(self, player: Player, item_name: str) -> int:
         """获取储物戒中某物品的数量"""
-        items = player.get_storage_ring_items()
-        return items.get(item_name, 0)
+        return await self.db.ext.get_player_item_count(player.user_id, item_name)
 
-    def has_item(self, player: Player, item_name: str, count: int = 1) -> bool:
+    async def has_item(self, player: Player, item_name: str, count: int = 1) -> bool:
         """检查储物戒中是否有足够数量的物品"""
-        return self.get_item_count(player, item_name) >= count
+        return await self.get_item_count(player, item_name) >= count
@@ -0,0 +1,82 @@
+# data/connection_pool.py
+"""
+SQLite 连接层：连接参数调优与只读连接池
+
+写操作统一走 DataBase.conn（唯一写连接）；排行榜、信息展示等只读查询
+从 ReaderPool 借用只读连接，在 WAL 模式下不会与写连接互相阻塞。
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional
+
+import aiosqlite
+from astrbot.api import logger
+
+
+async def apply_pragmas(conn: aiosqlite.Connection, config: dict, writer: bool):
+    """为连接设置 PRAGMA
+
+    Args:
+        conn: 数据库连接
+        config: PERFORMANCE 配置
+        writer: 是否为写连接（只有写连接负责切换日志模式）
+    """
+    if writer and config.get("SQLITE_WAL_ENABLED", True):
+        async with conn.execute("PRAGMA journal_mode=WAL") as cursor:
+            row = await cursor.fetchone()
+        if row and str(row[0]).lower() != "wal":
+            logger.warning(f"数据库未能切换到WAL模式，当前日志模式: {row[0]}")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+    # 负数表示以 KB 为单位
+    cache_kb = int(config.get("SQLITE_CACHE_SIZE_KB", 8192))
+    await conn.execute(f"PRAGMA cache_size=-{max(cache_kb, 0)}")
+    mmap_bytes = int(config.get("SQLITE_MMAP_SIZE_MB", 64)) * 1024 * 1024
+    await conn.execute(f"PRAGMA mmap_size={max(mmap_bytes, 0)}")
+    await conn.execute("PRAGMA temp_store=MEMORY")
+    await conn.execute(f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+
+
+class ReaderPool:
+    """只读连接池
+
+    每个连接拥有独立的 aiosqlite 工作线程，多个只读查询可以并行执行。
+    """
+
+    def __init__(self, db_path: Path, size: int, config: Optional[dict] = None):
+        self.db_path = Path(db_path)
+        self.size = max(1, int(size))
+        self.config = config or {}
+        self._conns: List[aiosqlite.Connection] = []
+        self._idle: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+
+    async def open(self):
+        """打开连接池（需在写连接切换到WAL之后调用）"""
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            await apply_pragmas(conn, self.config, writer=False)
+            await conn.execute("PRAGMA query_only=ON")
+            self._conns.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        """关闭所有只读连接"""
+        for conn in self._conns:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"关闭只读连接失败: {e}")
+        self._conns.clear()
+        self._idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """借用一个只读连接，用完自动归还"""
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
@@ -1,303 +1,940 @@
 # data/data_manager.py
 
+import asyncio
 import aiosqlite
+import copy
 import json
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dataclasses import fields
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict, Set, Iterable, AsyncIterator, Sequence, Callable
+from astrbot.api import logger
 from ..models import Player
+from .connection_pool import ReaderPool, apply_pragmas
 from .database_extended import DatabaseExtended
+from .group_commit import GroupCommitter
+from .result_cache import ResultCache, RANKING_BOARDS
+from .row_mapper import PlayerRowMapper
+from .transaction import TransactionManager
+
+# 可更新的玩家字段（与 players 表列名一致，主键 user_id 除外）
+PLAYER_UPDATE_COLUMNS = [f.name for f in fields(Player) if f.name != "user_id"]
+PLAYER_UPDATE_COLUMN_SET = frozenset(PLAYER_UPDATE_COLUMNS)
+
+# 影响战力的玩家字段：写入其中任意一个时重算 combat_power
+COMBAT_POWER_FIELDS = frozenset({
+    "weapon", "armor", "main_technique", "techniques",
+    "physical_damage", "magic_damage", "physical_defense", "magic_defense", "mental_power",
+})
+
+
+@lru_cache(maxsize=256)
+def _build_update_sql(columns: Tuple[str, ...]) -> str:
+    """生成只更新指定列的 UPDATE 语句（按列组合缓存）"""
+    return "UPDATE players SET " + ", ".join(f"{col} = ?" for col in columns) + " WHERE user_id = ?"
+
+
+def _sorted_columns(columns: Iterable[str]) -> Tuple[str, ...]:
+    """按表结构顺序排列列名，使相同的列组合得到相同的语句"""
+    column_set = set(columns)
+    return tuple(col for col in PLAYER_UPDATE_COLUMNS if col in column_set)
+
+
+# shop_items 表中单独存储的物品字段，其余字段（data 等）合并存入 extra 列
+SHOP_ITEM_KEYS = ("name", "type", "rank", "price", "original_price", "discount", "stock")
+SHOP_ITEM_COLUMNS = "item_name, item_type, item_rank, price, original_price, discount, stock, extra"
+SHOP_ITEM_INSERT_COLUMNS = (
+    "shop_id, item_name, position, item_type, item_rank, price, original_price, discount, stock, extra"
+)
+
+
+def shop_item_to_row(shop_id: str, position: int, item: dict) -> tuple:
+    """商店物品字典 -> shop_items 行"""
+    extra = {k: v for k, v in item.items() if k not in SHOP_ITEM_KEYS}
+    price = item.get("price", 0) or 0
+    return (
+        shop_id, item["name"], position,
+        item.get("type", ""), item.get("rank", ""),
+        price, item.get("original_price", price) or 0,
+        item.get("discount", 1.0) or 1.0, item.get("stock"),
+        json.dumps(extra, ensure_ascii=False),
+    )
+
+
+def shop_item_from_row(row) -> dict:
+    """shop_items 行 -> 商店物品字典（与原 current_items 中的格式一致）"""
+    try:
+        item = json.loads(row[7])
+    except (json.JSONDecodeError, TypeError):
+        item = {}
+    item.update({
+        "name": row[0], "type": row[1], "rank": row[2], "price": row[3],
+        "original_price": row[4], "discount": row[5], "stock": row[6],
+    })
+    return item
+
+
+def _to_db_value(value):
+    """布尔值以整数形式存储"""
+    return int(value) if isinstance(value, bool) else value
+
+
+class PlayerCache:
+    """玩家写回缓存
+
+    读取直接命中内存；update_player 只在内存中合并修改并记录脏字段，
+    由后台任务按 max_staleness 周期（或脏数据达到 flush_batch 条时提前）合并成一次批量写入。
+    落盘时只写入脏字段，相同字段组合的玩家共用一条语句批量执行。
+    缓存中的条目始终以自身当前值为变更基线（mark_clean）。
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, gate: TransactionManager, max_size: int = 2000,
+                 max_staleness: float = 2.0, flush_batch: int = 64):
+        self.conn = conn
+        self.gate = gate
+        self.max_size = max(1, int(max_size))
+        self.max_staleness = max(0.05, float(max_staleness))
+        self.flush_batch = max(1, int(flush_batch))
+        self._entries: "OrderedDict[str, Player]" = OrderedDict()
+        self._dirty: Dict[str, Set[str]] = {}  # user_id -> 已修改但未落盘的字段
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.flushed_rows = 0
+
+    # ===== 读写 =====
+
+    def get(self, user_id: str) -> Optional[Player]:
+        """获取缓存中的玩家副本，未命中返回 None"""
+        player = self._entries.get(user_id)
+        if player is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return copy.copy(player)
+
+    def find_by_name(self, user_name: str) -> Optional[Player]:
+        """在缓存中按道号查找玩家（覆盖尚未落盘的改名）"""
+        for player in self._entries.values():
+            if player.user_name == user_name:
+                return copy.copy(player)
+        return None
+
+    def peek_name(self, user_id: str) -> Optional[str]:
+        """获取缓存中玩家的道号（不计入命中统计，也不调整淘汰顺序），未缓存返回 None"""
+        player = self._entries.get(user_id)
+        return None if player is None else player.user_name
+
+    def has_newer_name(self, user_id: str, user_name: str) -> bool:
+        """缓存中的玩家是否已改用其他道号"""
+        player = self._entries.get(user_id)
+        return player is not None and player.user_name != user_name
+
+    def put(self, player: Player):
+        """放入从数据库读取到的干净数据（已在缓存中的条目以缓存为准）"""
+        if player.user_id in self._entries:
+            return
+        entry = copy.copy(player)
+        entry.mark_clean()
+        self._entries[player.user_id] = entry
+        self._shrink()
+
+    def apply(self, user_id: str, changed: dict) -> bool:
+        """把字段修改合并进缓存条目并记录脏字段
+
+        只合并调用方实际修改的字段，避免持有旧副本的协程覆盖其他字段的新值。
+
+        Returns:
+            玩家不在缓存中时返回 False，由调用方直接写库
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+        dirty_cols = set()
+        for col, value in changed.items():
+            if getattr(entry, col) != value:
+                setattr(entry, col, value)
+                dirty_cols.add(col)
+        self._entries.move_to_end(user_id)
+        if dirty_cols:
+            entry.mark_clean()
+            self._dirty.setdefault(user_id, set()).update(dirty_cols)
+            if len(self._dirty) >= self.flush_batch:
+                self._wakeup.set()
+        return True
+
+    def apply_written(self, user_id: str, changed: dict) -> dict:
+        """同步已在事务中直接写入数据库的字段（不标记为脏）
+
+        Returns:
+            被覆盖字段的旧值，用于事务回滚时 restore
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return {}
+        previous = {col: getattr(entry, col) for col in changed}
+        for col, value in changed.items():
+            setattr(entry, col, value)
+        entry.mark_clean()
+        return previous
+
+    def restore(self, user_id: str, previous: dict):
+        """事务回滚后恢复 apply_written 覆盖的字段"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        for col, value in previous.items():
+            setattr(entry, col, value)
+        entry.mark_clean()
+
+    def _reinsert(self, entry: Player, dirty_cols: Set[str]):
+        """事务回滚后放回被移出的条目及其脏字段"""
+        if entry.user_id in self._entries:
+            return
+        self._entries[entry.user_id] = entry
+        if dirty_cols:
+            self._dirty.setdefault(entry.user_id, set()).update(dirty_cols)
+
+    def _reinsert_all(self, entries: List[Player], dirty: Dict[str, Set[str]]):
+        """事务回滚后放回 evict_all 清空的全部条目"""
+        for entry in entries:
+            self._reinsert(entry, dirty.get(entry.user_id, set()))
+
+    def discard(self, user_id: str):
+        """移除缓存条目（未落盘的修改一并丢弃）"""
+        self._entries.pop(user_id, None)
+        self._dirty.pop(user_id, None)
+
+    def clear(self):
+        """清空缓存（调用前应先 flush）"""
+        self._entries.clear()
+        self._dirty.clear()
+
+    def is_dirty(self, user_id: str) -> bool:
+        return user_id in self._dirty
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def _shrink(self):
+        """按LRU淘汰干净条目，脏条目等待落盘后再淘汰"""
+        if len(self._entries) <= self.max_size:
+            return
+        for user_id in list(self._entries.keys()):
+            if len(self._entries) <= self.max_size:
+                break
+            if user_id not in self._dirty:
+                del self._entries[user_id]
+        if len(self._entries) > self.max_size:
+            self._wakeup.set()
+
+    # ===== 落盘 =====
+
+    async def flush(self, user_ids: Optional[Iterable[str]] = None) -> int:
+        """将脏玩家合并写入数据库
+
+        当前协程持有事务时写入随该事务提交（回滚后恢复脏标记）；
+        否则等待其他事务结束后自行提交。
+
+        Args:
+            user_ids: 只落盘指定玩家，None 表示全部
+
+        Returns:
+            写入的行数
+        """
+        if not self._dirty:
+            # 没有待落盘的修改时不必等待写连接（排行榜等读取前都会调用）
+            return 0
+        async with self.gate.exclusive():
+            return await self._flush_locked(user_ids)
+
+    async def _flush_locked(self, user_ids: Optional[Iterable[str]]) -> int:
+        if user_ids is None:
+            targets = list(self._dirty.keys())
+        else:
+            targets = [uid for uid in user_ids if uid in self._dirty]
+        if not targets:
+            return 0
+
+        pending = {uid: self._dirty.pop(uid) for uid in targets}
+        # 按脏字段组合分组，每组一条语句
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for uid, cols in pending.items():
+            columns = _sorted_columns(cols)
+            entry = self._entries[uid]
+            params = tuple(_to_db_value(getattr(entry, col)) for col in columns) + (uid,)
+            groups.setdefault(columns, []).append(params)
+        in_transaction = self.gate.owned()
+        try:
+            for columns, rows in groups.items():
+                await self.conn.executemany(_build_update_sql(columns), rows)
+            if not in_transaction:
+                await self.conn.commit()
+        except Exception:
+            self._restore_dirty(pending)
+            raise
+        if in_transaction:
+            self.gate.on_rollback(lambda: self._restore_dirty(pending))
+        self.flushed_rows += len(pending)
+        self._shrink()
+        return len(pending)
+
+    def _restore_dirty(self, pending: Dict[str, Set[str]]):
+        """写入失败或事务回滚时恢复脏标记，等待下次落盘"""
+        for uid, cols in pending.items():
+            if uid in self._entries:
+                self._dirty.setdefault(uid, set()).update(cols)
+
+    async def evict(self, user_id: str):
+        """落盘并移出指定玩家（在绕过缓存直接写 players 表之前调用）"""
+        async with self.gate.exclusive():
+            entry = self._entries.get(user_id)
+            dirty_cols = set(self._dirty.get(user_id, ()))
+            if dirty_cols:
+                await self._flush_locked([user_id])
+            self._entries.pop(user_id, None)
+            if entry is not None:
+                # 事务回滚后直接写入的修改随之撤销，放回原条目
+                self.gate.on_rollback(lambda: self._reinsert(entry, dirty_cols))
+
+    async def evict_all(self):
+        """落盘并清空全部缓存（在批量直接写 players 表之前调用）"""
+        async with self.gate.exclusive():
+            entries = list(self._entries.values())
+            dirty = {uid: set(cols) for uid, cols in self._dirty.items()}
+            await self._flush_locked(None)
+            self.clear()
+            # 事务回滚后直接写入的修改随之撤销，放回原条目
+            self.gate.on_rollback(lambda: self._reinsert_all(entries, dirty))
+
+    def start(self):
+        """启动后台落盘任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """停止后台任务并落盘剩余数据"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        """后台落盘循环"""
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_staleness)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if not self._dirty:
+                    continue
+                started = time.perf_counter()
+                count = await self.flush()
+                logger.debug(f"玩家缓存落盘 {count} 条，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"玩家缓存落盘失败: {e}")
+                await asyncio.sleep(self.max_staleness)
 
-# 获取 Player 模型的所有字段名（用于过滤数据库中的多余字段，作为迁移未完成时的兼容）
-PLAYER_FIELDS = {f.name for f in fields(Player)}
 
 class DataBase:
     """数据库管理类，提供基础玩家操作"""
 
-    def __init__(self, db_file: str = "xiuxian_data_lite.db"):
+    def __init__(self, db_file: str = "xiuxian_data_lite.db", cache_config: Optional[dict] = None):
         self.db_path = Path(db_file)
         self.conn: aiosqlite.Connection = None
         self.ext: Optional[DatabaseExtended] = None  # 扩展操作类
+        self.cache_config = cache_config or {}
+        self.player_cache: Optional[PlayerCache] = None  # 玩家写回缓存（未启用时为None）
+        self.reader_pool: Optional[ReaderPool] = None  # 只读连接池（未启用时为None）
+        self.committer: Optional[GroupCommitter] = None  # 小写入组提交调度器（未启用时为None）
+        self.tx: Optional[TransactionManager] = None  # 写连接事务管理
+        self.player_mapper: Optional[PlayerRowMapper] = None  # players 查询结果映射器
+        self.combat_power_calculator: Optional[Callable[[Player], int]] = None  # 战力计算函数（未设置时不维护战力列）
+        self.name_cache_size = max(0, int(self.cache_config.get("NAME_CACHE_SIZE", 5000)))
+        self._name_cache: "OrderedDict[str, str]" = OrderedDict()  # user_id -> 道号（列表显示用）
+        self._name_generation = 0  # 每次改道号/删除玩家时递增，防止并发查询写回旧道号
+        # 排行榜等只读列表指令的结果缓存
+        ranking_ttl = self.cache_config.get("RESULT_CACHE_RANKING_TTL")
+        self.result_cache = ResultCache(
+            enabled=self.cache_config.get("RESULT_CACHE_ENABLED", True),
+            ttls={board: float(ranking_ttl) for board in RANKING_BOARDS} if ranking_ttl is not None else None,
+        )
 
     async def connect(self):
-        """连接数据库"""
+        """连接数据库（写连接 + 只读连接池）"""
         self.conn = await aiosqlite.connect(self.db_path)
         self.conn.row_factory = aiosqlite.Row
-        self.ext = DatabaseExtended(self.conn)  # 初始化扩展操作
+        await apply_pragmas(self.conn, self.cache_config, writer=True)
+        self.player_mapper = PlayerRowMapper()
+        self.tx = TransactionManager(
+            self.conn,
+            busy_retries=self.cache_config.get("TRANSACTION_BUSY_RETRIES", 5),
+            slow_ms=self.cache_config.get("TRANSACTION_SLOW_MS", 200),
+        )
+        self.result_cache.gate = self.tx
+        pool_size = int(self.cache_config.get("READER_POOL_SIZE", 2))
+        # 只读连接只有在WAL模式下才能与写连接并发
+        if pool_size > 0 and self.cache_config.get("SQLITE_WAL_ENABLED", True):
+            self.reader_pool = ReaderPool(self.db_path, pool_size, self.cache_config)
+            try:
+                await self.reader_pool.open()
+            except Exception as e:
+                logger.warning(f"只读连接池初始化失败，读取将使用写连接: {e}")
+                await self.reader_pool.close()
+                self.reader_pool = None
+        if self.cache_config.get("PLAYER_CACHE_ENABLED", True):
+            self.player_cache = PlayerCache(
+                self.conn,
+                self.tx,
+                max_size=self.cache_config.get("PLAYER_CACHE_SIZE", 2000),
+                max_staleness=self.cache_config.get("PLAYER_CACHE_MAX_STALENESS", 2.0),
+                flush_batch=self.cache_config.get("PLAYER_CACHE_FLUSH_BATCH", 64),
+            )
+            self.player_cache.start()
+        if self.cache_config.get("GROUP_COMMIT_ENABLED", True):
+            self.committer = GroupCommitter(
+                self.conn,
+                self.tx,
+                window_ms=self.cache_config.get("GROUP_COMMIT_WINDOW_MS", 5),
+                max_batch=self.cache_config.get("GROUP_COMMIT_MAX_BATCH", 64),
+            )
+        self.ext = DatabaseExtended(
+            self.conn, self.player_cache, self.reader, self.committer, self.tx, self.player_mapper,
+            self.result_cache
+        )  # 初始化扩展操作
 
     async def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接（先提交排队中的写入并落盘缓存中的玩家数据）"""
+        if self.committer:
+            try:
+                await self.committer.close()
+            except Exception as e:
+                logger.error(f"关闭数据库前提交排队写入失败: {e}")
+        if self.player_cache:
+            try:
+                await self.player_cache.stop()
+            except Exception as e:
+                logger.error(f"关闭数据库前落盘玩家缓存失败: {e}")
+        if self.reader_pool:
+            await self.reader_pool.close()
+            self.reader_pool = None
         if self.conn:
             await self.conn.close()
 
+    @asynccontextmanager
+    async def reader(self):
+        """获取用于只读查询的连接
+
+        优先使用只读连接池；当前协程持有事务时返回写连接，保证能读到本事务尚未提交的修改。
+
+        Example:
+            async with self.reader() as conn:
+                async with conn.execute("SELECT ...") as cursor:
+                    ...
+        """
+        if self.reader_pool is None or self.tx.owned():
+            yield self.conn
+            return
+        async with self.reader_pool.acquire() as conn:
+            yield conn
+
+    def set_combat_power_calculator(self, calculator: Callable[[Player], int]):
+        """设置战力计算函数，之后装备或基础属性的写入会同时更新 combat_power 列"""
+        self.combat_power_calculator = calculator
+
+    # ===== 事务 =====
+
+    def transaction(self):
+        """开启一个工作单元（Unit of Work）
+
+        同一协程内嵌套调用时使用保存点；BEGIN/COMMIT 遇到数据库忙时自动重试。
+
+        Example:
+            async with self.db.transaction() as tx:
+                player = await self.db.get_player_by_id(user_id)
+                if player.gold < cost:
+                    await tx.rollback()
+                    return False, "灵石不足"
+                ...
+        """
+        return self.tx.transaction()
+
+    def get_transaction_stats(self) -> dict:
+        """获取事务统计（次数、回滚、忙重试、平均/最长持锁毫秒）"""
+        return self.tx.get_stats()
+
+    def get_result_cache_stats(self) -> dict:
+        """获取排行榜等列表结果缓存的命中统计"""
+        return self.result_cache.get_stats()
+
+    @asynccontextmanager
+    async def _write_scope(self):
+        """直接写入的作用域：持有事务时随事务提交，否则等待其他事务结束后自行提交"""
+        async with self.tx.exclusive():
+            if self.tx.owned():
+                yield
+                return
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            await self.conn.commit()
+
+    # ===== 玩家缓存控制 =====
+
+    async def flush_player(self, user_id: str):
+        """立即落盘指定玩家的缓存修改"""
+        if self.player_cache:
+            await self.player_cache.flush([str(user_id)])
+
+    async def flush_players(self):
+        """立即落盘所有缓存修改"""
+        if self.player_cache:
+            await self.player_cache.flush()
+
+    async def evict_player(self, user_id: str):
+        """落盘并移出玩家缓存，用于直接通过SQL修改 players 表之前"""
+        if self.player_cache:
+            await self.player_cache.evict(str(user_id))
+
     async def create_player(self, player: Player):
         """创建新玩家"""
-        await self.conn.execute(
-            """
-            INSERT INTO players (
-                user_id, level_index, spiritual_root,cultivation_type, user_name, lifespan,
-                experience, gold, state, cultivation_start_time, last_check_in_date, level_up_rate,
-                weapon, armor, main_technique, techniques,
-                hp, mp, atk, atkpractice,
-                spiritual_qi, max_spiritual_qi, blood_qi, max_blood_qi,
-                magic_damage, physical_damage, magic_defense, physical_defense, mental_power,
-                sect_id, sect_position, sect_contribution, sect_task, sect_elixir_get,
-                blessed_spot_flag, blessed_spot_name,
-                active_pill_effects, permanent_pill_gains, has_resurrection_pill, has_debuff_shield, pills_inventory,
-                storage_ring, storage_ring_items,
-                daily_pill_usage, last_daily_reset
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                player.user_id,
-                player.level_index,
-                player.spiritual_root,
-                player.cultivation_type,
-                player.user_name,
-                player.lifespan,
-                player.experience,
-                player.gold,
-                player.state,
-                player.cultivation_start_time,
-                player.last_check_in_date,
-                player.level_up_rate,
-                player.weapon,
-                player.armor,
-                player.main_technique,
-                player.techniques,
-                player.hp,
-                player.mp,
-                player.atk,
-                player.atkpractice,
-                player.spiritual_qi,
-                player.max_spiritual_qi,
-                player.blood_qi,
-                player.max_blood_qi,
-                player.magic_damage,
-                player.physical_damage,
-                player.magic_defense,
-                player.physical_defense,
-                player.mental_power,
-                player.sect_id,
-                player.sect_position,
-                player.sect_contribution,
-                player.sect_task,
-                player.sect_elixir_get,
-                player.blessed_spot_flag,
-                player.blessed_spot_name,
-                player.active_pill_effects,
-                player.permanent_pill_gains,
-                player.has_resurrection_pill,
-                int(player.has_debuff_shield),
-                player.pills_inventory,
-                player.storage_ring,
-                player.storage_ring_items,
-                player.daily_pill_usage,
-                player.last_daily_reset
+        if self.combat_power_calculator:
+            player.combat_power = self.combat_power_calculator(player)
+        async with self._write_scope():
+            await self.conn.execute(
+                """
+                INSERT INTO players (
+                    user_id, level_index, spiritual_root,cultivation_type, user_name, lifespan,
+                    experience, gold, state, cultivation_start_time, last_check_in_date, level_up_rate,
+                    weapon, armor, main_technique, techniques,
+                    hp, mp, atk, atkpractice,
+                    spiritual_qi, max_spiritual_qi, blood_qi, max_blood_qi,
+                    magic_damage, physical_damage, magic_defense, physical_defense, mental_power,
+                    sect_id, sect_position, sect_contribution, sect_task, sect_elixir_get,
+                    blessed_spot_flag, blessed_spot_name,
+                    active_pill_effects, permanent_pill_gains, has_resurrection_pill, has_debuff_shield, pills_inventory,
+                    storage_ring, storage_ring_items,
+                    daily_pill_usage, last_daily_reset,
+                    combat_power
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    player.user_id,
+                    player.level_index,
+                    player.spiritual_root,
+                    player.cultivation_type,
+                    player.user_name,
+                    player.lifespan,
+                    player.experience,
+                    player.gold,
+                    player.state,
+                    player.cultivation_start_time,
+                    player.last_check_in_date,
+                    player.level_up_rate,
+                    player.weapon,
+                    player.armor,
+                    player.main_technique,
+                    player.techniques,
+                    player.hp,
+                    player.mp,
+                    player.atk,
+                    player.atkpractice,
+                    player.spiritual_qi,
+                    player.max_spiritual_qi,
+                    player.blood_qi,
+                    player.max_blood_qi,
+                    player.magic_damage,
+                    player.physical_damage,
+                    player.magic_defense,
+                    player.physical_defense,
+                    player.mental_power,
+                    player.sect_id,
+                    player.sect_position,
+                    player.sect_contribution,
+                    player.sect_task,
+                    player.sect_elixir_get,
+                    player.blessed_spot_flag,
+                    player.blessed_spot_name,
+                    player.active_pill_effects,
+                    player.permanent_pill_gains,
+                    player.has_resurrection_pill,
+                    int(player.has_debuff_shield),
+                    player.pills_inventory,
+                    player.storage_ring,
+                    player.storage_ring_items,
+                    player.daily_pill_usage,
+                    player.last_daily_reset,
+                    player.combat_power
+                )
             )
-        )
-        await self.conn.commit()
+        player.mark_clean()
+        if self.player_cache and not self.tx.owned():
+            self.player_cache.put(player)
+
+    async def _fetch_player(self, sql: str, params: tuple) -> Optional[Player]:
+        """在写连接上读取一个玩家
+
+        当前协程持有事务时直接读取（能读到本事务的修改）；否则等待其他协程的事务与直接写入结束，
+        不会读到别人尚未提交的修改。
+        """
+        async with self.tx.exclusive():
+            async with self.conn.execute(sql, params) as cursor:
+                return self.player_mapper.map_row(cursor.description, await cursor.fetchone())
 
     async def get_player_by_id(self, user_id: str) -> Player:
-        """根据用户ID获取玩家信息"""
-        async with self.conn.execute(
-            "SELECT * FROM players WHERE user_id = ?",
-            (user_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                # 过滤掉 Player 模型中不存在的字段（兼容旧数据库/迁移未完成的情况）
-                filtered_data = {k: v for k, v in dict(row).items() if k in PLAYER_FIELDS}
-                return Player(**filtered_data)
-            return None
+        """根据用户ID获取玩家信息（优先命中缓存）"""
+        user_id = str(user_id)
+        if self.player_cache:
+            cached = self.player_cache.get(user_id)
+            if cached is not None:
+                return cached
+        player = await self._fetch_player("SELECT * FROM players WHERE user_id = ?", (user_id,))
+        # 事务中读到的可能是未提交数据，不放入缓存；事务外读到的是已提交的数据，
+        # 直接写 players 表的写入都在同一事务中先移出缓存再提交，放入后不会变成旧数据
+        if player and self.player_cache and not self.tx.owned():
+            self.player_cache.put(player)
+        return player
 
     async def get_player_by_name(self, user_name: str) -> Player:
         """根据道号获取玩家信息"""
-        async with self.conn.execute(
-            "SELECT * FROM players WHERE user_name = ?",
-            (user_name,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                filtered_data = {k: v for k, v in dict(row).items() if k in PLAYER_FIELDS}
-                return Player(**filtered_data)
+        if self.player_cache:
+            cached = self.player_cache.find_by_name(user_name)
+            if cached is not None:
+                return cached
+        player = await self._fetch_player("SELECT * FROM players WHERE user_name = ?", (user_name,))
+        # 该玩家已在缓存中改名但尚未落盘，旧道号不再有效
+        if player and self.player_cache and self.player_cache.has_newer_name(player.user_id, user_name):
             return None
+        return player
 
-    async def update_player(self, player: Player):
-        """更新玩家信息"""
-        await self.conn.execute(
-            """
-            UPDATE players SET
-                level_index = ?,
-                spiritual_root = ?,
-                cultivation_type = ?,
-                user_name = ?,
-                lifespan = ?,
-                experience = ?,
-                gold = ?,
-                state = ?,
-                cultivation_start_time = ?,
-                last_check_in_date = ?,
-                level_up_rate = ?,
-                weapon = ?,
-                armor = ?,
-                main_technique = ?,
-                techniques = ?,
-                hp = ?,
-                mp = ?,
-                atk = ?,
-                atkpractice = ?,
-                spiritual_qi = ?,
-                max_spiritual_qi = ?,
-                blood_qi = ?,
-                max_blood_qi = ?,
-                magic_damage = ?,
-                physical_damage = ?,
-                magic_defense = ?,
-                physical_defense = ?,
-                mental_power = ?,
-                sect_id = ?,
-                sect_position = ?,
-                sect_contribution = ?,
-                sect_task = ?,
-                sect_elixir_get = ?,
-                blessed_spot_flag = ?,
-                blessed_spot_name = ?,
-                active_pill_effects = ?,
-                permanent_pill_gains = ?,
-                has_resurrection_pill = ?,
-                has_debuff_shield = ?,
-                pills_inventory = ?,
-                storage_ring = ?,
-                storage_ring_items = ?,
-                daily_pill_usage = ?,
-                last_daily_reset = ?
-            WHERE user_id = ?
-            """,
-            (
-                player.level_index,
-                player.spiritual_root,
-                player.cultivation_type,
-                player.user_name,
-                player.lifespan,
-                player.experience,
-                player.gold,
-                player.state,
-                player.cultivation_start_time,
-                player.last_check_in_date,
-                player.level_up_rate,
-                player.weapon,
-                player.armor,
-                player.main_technique,
-                player.techniques,
-                player.hp,
-                player.mp,
-                player.atk,
-                player.atkpractice,
-                player.spiritual_qi,
-                player.max_spiritual_qi,
-                player.blood_qi,
-                player.max_blood_qi,
-                player.magic_damage,
-                player.physical_damage,
-                player.magic_defense,
-                player.physical_defense,
-                player.mental_power,
-                player.sect_id,
-                player.sect_position,
-                player.sect_contribution,
-                player.sect_task,
-                player.sect_elixir_get,
-                player.blessed_spot_flag,
-                player.blessed_spot_name,
-                player.active_pill_effects,
-                player.permanent_pill_gains,
-                player.has_resurrection_pill,
-                int(player.has_debuff_shield),
-                player.pills_inventory,
-                player.storage_ring,
-                player.storage_ring_items,
-                player.daily_pill_usage,
-                player.last_daily_reset,
-                player.user_id
-            )
-        )
-        await self.conn.commit()
+    async def update_player(self, player: Player, flush: bool = False):
+        """更新玩家信息（只写入自读取以来修改过的字段）
+
+        启用缓存时默认只写入内存，由后台任务批量落盘；
+        flush=True 用于灵石等敏感操作，立即写入数据库。
+        处于事务中时总是直接写入（随事务提交或回滚），缓存条目同步更新并在回滚时恢复。
+        装备或基础属性有修改时一并重算并写入战力。
+        """
+        changed = player.get_changed_fields()
+        if changed and self.combat_power_calculator and not COMBAT_POWER_FIELDS.isdisjoint(changed):
+            power = self.combat_power_calculator(player)
+            if power != player.combat_power:
+                player.combat_power = power
+                changed["combat_power"] = power
+                self.result_cache.invalidate("power")
+        if changed:
+            await self._write_player_fields(player.user_id, changed, flush)
+        player.mark_clean()
+
+    async def update_player_fields(self, user_id: str, **changed):
+        """只更新玩家的指定字段
+
+        用于 HP、灵石等小字段的高频修改，不会重新写入储物戒、丹药背包等大字段。
+
+        Example:
+            await db.update_player_fields(user_id, hp=100, mp=50)
+        """
+        if changed and self.combat_power_calculator and not COMBAT_POWER_FIELDS.isdisjoint(changed):
+            # 战力依赖完整的装备与属性，读出玩家后按整体修改处理
+            player = await self.get_player_by_id(user_id)
+            if player:
+                for name, value in changed.items():
+                    setattr(player, name, value)
+                await self.update_player(player)
+                return
+        if changed:
+            await self._write_player_fields(user_id, changed, False)
+
+    async def _write_player_fields(self, user_id: str, changed: dict, flush: bool):
+        """写入玩家字段修改（优先合并进缓存）"""
+        user_id = str(user_id)
+        unknown = set(changed) - PLAYER_UPDATE_COLUMN_SET
+        if unknown:
+            raise ValueError(f"未知的玩家字段: {', '.join(sorted(unknown))}")
+        renamed = "user_name" in changed
+
+        cache = self.player_cache
+        if cache and not self.tx.owned() and cache.apply(user_id, changed):
+            # 改道号时立即落盘，提交后再使道号缓存与列表结果失效
+            if flush or renamed:
+                await cache.flush([user_id])
+            if renamed:
+                self._forget_name(user_id)
+            return
+
+        columns = _sorted_columns(changed)
+        params = tuple(_to_db_value(changed[col]) for col in columns) + (user_id,)
+        async with self._write_scope():
+            await self.conn.execute(_build_update_sql(columns), params)
+            if cache and self.tx.owned():
+                previous = cache.apply_written(user_id, changed)
+                if previous:
+                    self.tx.on_rollback(lambda: cache.restore(user_id, previous))
+        if cache and not self.tx.owned():
+            # 等待写连接期间该玩家可能被读入缓存（读到的是写入前的行），同步为已提交的值
+            cache.apply_written(user_id, changed)
+        if renamed:
+            self._forget_name(user_id)
 
     async def delete_player(self, user_id: str):
         """删除玩家"""
-        await self.conn.execute(
-            "DELETE FROM players WHERE user_id = ?",
-            (user_id,)
-        )
-        await self.conn.commit()
+        # 移出缓存需要等待写连接，必须在进入写入作用域之前完成
+        if self.player_cache:
+            await self.player_cache.evict(str(user_id))
+        async with self._write_scope():
+            await self.conn.execute(
+                "DELETE FROM players WHERE user_id = ?",
+                (user_id,)
+            )
+            if self.player_cache:
+                # 等待期间可能又被读入缓存
+                self.player_cache.discard(str(user_id))
+        self._forget_name(str(user_id))
 
     async def delete_player_cascade(self, user_id: str):
         """级联删除玩家及所有关联数据"""
-        # 释放灵眼
-        try:
+        async with self.transaction():
+            if self.player_cache:
+                await self.player_cache.evict(str(user_id))
+            # 所在宗门成员数减一
             await self.conn.execute(
-                "UPDATE spirit_eyes SET owner_id = NULL, owner_name = NULL, claim_time = NULL WHERE owner_id = ?",
+                "UPDATE sects SET member_count = member_count - 1 "
+                "WHERE sect_id = (SELECT sect_id FROM players WHERE user_id = ?)",
                 (user_id,)
             )
-        except Exception:
-            pass
-        
-        # 删除各种关联数据，忽略表不存在的错误
-        tables_to_delete = [
-            ("blessed_lands", "user_id"),
-            ("spirit_farms", "user_id"),
-            ("bank_accounts", "user_id"),
-            ("bounty_tasks", "user_id"),
-            ("dual_cultivation", "user_id"),
-            ("user_cd", "user_id"),
-            ("buff_info", "user_id"),
-            ("impart_info", "user_id"),
-            ("tower_progress", "user_id"),
-            ("master_disciple", "master_id"),
-            ("master_disciple", "disciple_id"),
-            ("couples", "user1_id"),
-            ("couples", "user2_id"),
-        ]
-        
-        for table, column in tables_to_delete:
+            # 释放灵眼
             try:
-                await self.conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (user_id,))
+                await self.conn.execute(
+                    "UPDATE spirit_eyes SET owner_id = NULL, owner_name = NULL, claim_time = NULL WHERE owner_id = ?",
+                    (user_id,)
+                )
             except Exception:
                 pass
         
-        # 处理贷款（标记为坏账）
-        try:
-            await self.conn.execute(
-                "UPDATE bank_loans SET status = 'bad_debt' WHERE user_id = ? AND status = 'active'",
-                (user_id,)
-            )
-        except Exception:
-            pass
+            # 删除各种关联数据，忽略表不存在的错误
+            tables_to_delete = [
+                ("blessed_lands", "user_id"),
+                ("spirit_farms", "user_id"),
+                ("bank_accounts", "user_id"),
+                ("bounty_tasks", "user_id"),
+                ("dual_cultivation", "user_id"),
+                ("user_cd", "user_id"),
+                ("buff_info", "user_id"),
+                ("impart_info", "user_id"),
+                ("tower_progress", "user_id"),
+                ("player_items", "user_id"),
+                ("player_pills", "user_id"),
+                ("boss_damage", "user_id"),
+                ("master_disciple", "master_id"),
+                ("master_disciple", "disciple_id"),
+                ("couples", "user1_id"),
+                ("couples", "user2_id"),
+            ]
         
-        # 删除双向关联的数据
-        dual_tables = [
-            ("dual_cultivation_requests", "from_id", "target_id"),
-            ("combat_cooldowns", "attacker_id", "defender_id"),
-            ("pending_gifts", "sender_id", "receiver_id"),
-        ]
+            for table, column in tables_to_delete:
+                try:
+                    await self.conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (user_id,))
+                except Exception:
+                    pass
         
-        for table, col1, col2 in dual_tables:
+            # 处理贷款（标记为坏账）
             try:
-                await self.conn.execute(f"DELETE FROM {table} WHERE {col1} = ? OR {col2} = ?", (user_id, user_id))
+                await self.conn.execute(
+                    "UPDATE bank_loans SET status = 'bad_debt' WHERE user_id = ? AND status = 'active'",
+                    (user_id,)
+                )
             except Exception:
                 pass
         
-        # 最后删除玩家主记录
-        await self.conn.execute("DELETE FROM players WHERE user_id = ?", (user_id,))
-        await self.conn.commit()
+            # 删除双向关联的数据
+            dual_tables = [
+                ("dual_cultivation_requests", "from_id", "target_id"),
+                ("combat_cooldowns", "attacker_id", "defender_id"),
+                ("pending_gifts", "sender_id", "receiver_id"),
+            ]
+        
+            for table, col1, col2 in dual_tables:
+                try:
+                    await self.conn.execute(f"DELETE FROM {table} WHERE {col1} = ? OR {col2} = ?", (user_id, user_id))
+                except Exception:
+                    pass
+        
+            # 最后删除玩家主记录
+            await self.conn.execute("DELETE FROM players WHERE user_id = ?", (user_id,))
+        self._forget_name(str(user_id))
+        # 玩家可能出现在任意榜单中
+        self.result_cache.clear()
+
+    # ===== 道号查询 =====
+
+    async def get_player_names(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """批量获取玩家道号，供排行榜等列表显示使用
+
+        依次使用道号缓存、玩家缓存，剩余的玩家合并为一次 IN 查询，
+        因此列表无论多少行都只需常数次查询。
+
+        Returns:
+            {user_id: 道号}，不存在的玩家不出现在结果中（道号可能为空字符串，由调用方决定显示方式）
+        """
+        names: Dict[str, str] = {}
+        missing: List[str] = []
+        for user_id in dict.fromkeys(str(uid) for uid in user_ids):
+            name = self._name_cache.get(user_id)
+            if name is not None:
+                self._name_cache.move_to_end(user_id)
+            elif self.player_cache:
+                name = self.player_cache.peek_name(user_id)
+            if name is None:
+                missing.append(user_id)
+            else:
+                names[user_id] = name
+
+        generation = self._name_generation
+        # 单条语句的参数数量有上限，超长列表分批查询
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            async with self.reader() as conn:
+                async with conn.execute(
+                    f"SELECT user_id, user_name FROM players WHERE user_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ) as cursor:
+                    rows = await cursor.fetchall()
+            for user_id, user_name in rows:
+                names[user_id] = user_name
+        # 查询期间有人改了道号，或读到的是本事务未提交的数据时，不写入缓存
+        if generation == self._name_generation and not self.tx.owned():
+            for user_id in missing:
+                if user_id in names:
+                    self._remember_name(user_id, names[user_id])
+        return names
+
+    def _remember_name(self, user_id: str, user_name: str):
+        if self.name_cache_size <= 0:
+            return
+        self._name_cache[user_id] = user_name
+        self._name_cache.move_to_end(user_id)
+        while len(self._name_cache) > self.name_cache_size:
+            self._name_cache.popitem(last=False)
+
+    def _forget_name(self, user_id: str):
+        """道号变更或玩家删除提交后使缓存失效（含显示道号的列表结果）
+
+        持有事务时推迟到事务结束：提交前其他协程读到的仍是旧道号，
+        提前失效会让它们把旧道号重新写回缓存。
+        """
+        if self.tx.owned():
+            self.tx.on_finish(lambda: self._forget_name(user_id))
+            return
+        self._name_generation += 1
+        self._name_cache.pop(user_id, None)
+        self.result_cache.invalidate("name")
 
     async def get_all_players(self):
         """获取所有玩家"""
-        async with self.conn.execute("SELECT * FROM players") as cursor:
-            rows = await cursor.fetchall()
-            # 过滤掉 Player 模型中不存在的字段（兼容旧数据库/迁移未完成的情况）
-            return [Player(**{k: v for k, v in dict(row).items() if k in PLAYER_FIELDS}) for row in rows]
+        # 先落盘缓存中的修改，保证全表扫描读到最新数据
+        await self.flush_players()
+        async with self.reader() as conn:
+            async with conn.execute("SELECT * FROM players") as cursor:
+                return self.player_mapper.map_rows(cursor.description, await cursor.fetchall())
+
+    async def iter_players(self, columns: Optional[Iterable[str]] = None, where: Optional[str] = None,
+                           params: Sequence = (), batch: int = 500) -> AsyncIterator[Player]:
+        """分批扫描玩家表（只读，内存占用与玩家总数无关）
+
+        按 rowid 分页，每批单独查询一次，两批之间不占用连接。
+
+        Args:
+            columns: 需要读取的列，None 表示全部列；未读取的字段保持 Player 的默认值，
+                     user_id 总是会被读取
+            where: 额外的过滤条件（SQL 片段，使用 ? 占位）
+            params: where 中占位符对应的参数
+            batch: 每批读取的行数
+
+        Yields:
+            Player 对象（只含所读取列的数据，不要用于整体写回）
+        """
+        if columns is None:
+            select = "*"
+        else:
+            columns = list(dict.fromkeys(["user_id", *columns]))
+            unknown = [col for col in columns if col not in PLAYER_UPDATE_COLUMN_SET and col != "user_id"]
+            if unknown:
+                raise ValueError(f"未知的玩家字段: {', '.join(unknown)}")
+            select = ", ".join(columns)
+        condition = f" AND ({where})" if where else ""
+        sql = (
+            f"SELECT rowid AS scan_rowid, {select} FROM players "
+            f"WHERE rowid > ?{condition} ORDER BY rowid LIMIT ?"
+        )
+        batch = max(1, int(batch))
+        # 先落盘缓存中的修改，保证扫描读到最新数据
+        await self.flush_players()
+        last_rowid = 0
+        while True:
+            async with self.reader() as conn:
+                async with conn.execute(sql, (last_rowid, *params, batch)) as cursor:
+                    rows = await cursor.fetchall()
+                    players = self.player_mapper.map_rows(cursor.description, rows)
+            for player in players:
+                yield player
+            if len(rows) < batch:
+                break
+            last_rowid = rows[-1][0]
+
+    async def rebuild_combat_power(self, batch: int = 500) -> int:
+        """战力一致性检查：按当前配置重算所有玩家的战力，修正与存储值不一致的行
+
+        用于升级到战力列之后的首次填充，以及装备配置调整后的校正。
+
+        Returns:
+            修正的玩家数量
+        """
+        if self.combat_power_calculator is None:
+            return 0
+        fixed = 0
+        pending: List[Tuple[int, str]] = []
+        async for player in self.iter_players(batch=batch):
+            power = self.combat_power_calculator(player)
+            if power != player.combat_power:
+                pending.append((power, player.user_id))
+            if len(pending) >= batch:
+                fixed += await self._write_combat_power(pending)
+                pending = []
+        if pending:
+            fixed += await self._write_combat_power(pending)
+        if fixed:
+            self.result_cache.invalidate("power")
+        return fixed
+
+    async def _write_combat_power(self, rows: List[Tuple[int, str]]) -> int:
+        """批量写入战力（已在缓存中的玩家合并进缓存，其余一次 executemany）"""
+        cache = self.player_cache
+        direct = [
+            (power, user_id) for power, user_id in rows
+            if not (cache and cache.apply(user_id, {"combat_power": power}))
+        ]
+        if direct:
+            async with self.transaction():
+                await self.conn.executemany(
+                    "UPDATE players SET combat_power = ? WHERE user_id = ?", direct
+                )
+        return len(rows)
 
     # ===== 商店数据操作 =====
 
@@ -310,143 +947,108 @@ class DataBase:
         Returns:
             (last_refresh_time, current_items) 元组
         """
-        async with self.conn.execute(
-            "SELECT last_refresh_time, current_items FROM shop WHERE shop_id = ?",
-            (shop_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                last_refresh_time = row[0]
-                try:
-                    current_items = json.loads(row[1])
-                except json.JSONDecodeError:
-                    current_items = []
-                return last_refresh_time, current_items
-            return 0, []
+        async with self.reader() as conn:
+            async with conn.execute(
+                "SELECT last_refresh_time FROM shop WHERE shop_id = ?",
+                (shop_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if not row:
+                return 0, []
+            async with conn.execute(
+                f"SELECT {SHOP_ITEM_COLUMNS} FROM shop_items WHERE shop_id = ? ORDER BY position",
+                (shop_id,)
+            ) as cursor:
+                item_rows = await cursor.fetchall()
+        return row[0], [shop_item_from_row(item_row) for item_row in item_rows]
+
+    async def find_shop_item(self, item_name: str, shop_ids: List[str]) -> Tuple[Optional[str], Optional[dict]]:
+        """在多个商店中查找有库存的物品（按 shop_ids 顺序返回第一个）
+
+        Returns:
+            (shop_id, 物品字典)，找不到时为 (None, None)
+        """
+        if not shop_ids:
+            return None, None
+        placeholders = ", ".join("?" for _ in shop_ids)
+        async with self.reader() as conn:
+            async with conn.execute(
+                f"SELECT shop_id, {SHOP_ITEM_COLUMNS} FROM shop_items "
+                f"WHERE item_name = ? AND stock > 0 AND shop_id IN ({placeholders})",
+                (item_name, *shop_ids)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return None, None
+        row = min(rows, key=lambda r: shop_ids.index(r[0]))
+        return row[0], shop_item_from_row(tuple(row)[1:])
 
     async def update_shop_data(self, shop_id: str, last_refresh_time: int, current_items: List[dict]):
-        """更新商店数据
+        """更新商店数据（整体替换该商店的物品列表）
 
         Args:
             shop_id: 商店ID
             last_refresh_time: 最后刷新时间戳
             current_items: 当前商店物品列表
         """
-        items_json = json.dumps(current_items, ensure_ascii=False)
-        await self.conn.execute(
-            """
-            INSERT OR REPLACE INTO shop (shop_id, last_refresh_time, current_items)
-            VALUES (?, ?, ?)
-            """,
-            (shop_id, last_refresh_time, items_json)
-        )
-        await self.conn.commit()
+        rows = [
+            shop_item_to_row(shop_id, position, item)
+            for position, item in enumerate(current_items)
+            if item.get("name")
+        ]
+        async with self.transaction():
+            await self.conn.execute(
+                """
+                INSERT INTO shop (shop_id, last_refresh_time, current_items) VALUES (?, ?, '[]')
+                ON CONFLICT(shop_id) DO UPDATE SET last_refresh_time = excluded.last_refresh_time
+                """,
+                (shop_id, last_refresh_time)
+            )
+            await self.conn.execute("DELETE FROM shop_items WHERE shop_id = ?", (shop_id,))
+            await self.conn.executemany(
+                f"INSERT OR IGNORE INTO shop_items ({SHOP_ITEM_INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    async def decrement_shop_item_stock(self, shop_id: str, item_name: str, quantity: int = 1) -> tuple[bool, int, int]:
+        """尝试扣减指定商店物品的库存（按行条件扣减，可批量）
 
-    async def decrement_shop_item_stock(self, shop_id: str, item_name: str, quantity: int = 1, external_transaction: bool = False) -> tuple[bool, int, int]:
-        """尝试扣减指定商店物品的库存（原子操作，可批量）
+        在外部事务中调用时作为其中的一步（保存点），随外部事务提交或回滚。
 
         Args:
             shop_id: 商店ID
             item_name: 物品名称
             quantity: 扣减数量（默认1，最小1）
-            external_transaction: 是否由外部管理事务（True时不执行内部BEGIN/COMMIT/ROLLBACK）
 
         Returns:
             (是否成功, last_refresh_time, 扣减后的库存数量)
         """
         quantity = max(1, int(quantity))
-        if not external_transaction:
-            await self.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.transaction():
+            cursor = await self.conn.execute(
+                "UPDATE shop_items SET stock = stock - ? WHERE shop_id = ? AND item_name = ? AND stock >= ?",
+                (quantity, shop_id, item_name, quantity)
+            )
+            reserved = cursor.rowcount > 0
             async with self.conn.execute(
-                "SELECT last_refresh_time, current_items FROM shop WHERE shop_id = ?",
-                (shop_id,)
+                """
+                SELECT s.last_refresh_time, i.stock FROM shop s
+                LEFT JOIN shop_items i ON i.shop_id = s.shop_id AND i.item_name = ?
+                WHERE s.shop_id = ?
+                """,
+                (item_name, shop_id)
             ) as cursor:
                 row = await cursor.fetchone()
 
-            if not row:
-                if not external_transaction:
-                    await self.conn.rollback()
-                return False, 0, 0
-
-            last_refresh_time = row[0]
-            try:
-                current_items = json.loads(row[1])
-            except json.JSONDecodeError:
-                current_items = []
-
-            target_index = -1
-            for idx, item in enumerate(current_items):
-                if item.get('name') == item_name:
-                    target_index = idx
-                    break
-
-            if target_index == -1:
-                if not external_transaction:
-                    await self.conn.rollback()
-                return False, last_refresh_time, 0
-
-            stock = current_items[target_index].get('stock', 0)
-            if stock is None or stock <= 0:
-                if not external_transaction:
-                    await self.conn.rollback()
-                return False, last_refresh_time, max(stock or 0, 0)
-
-            if stock < quantity:
-                if not external_transaction:
-                    await self.conn.rollback()
-                return False, last_refresh_time, stock
-
-            new_stock = stock - quantity
-            current_items[target_index]['stock'] = new_stock
-
-            items_json = json.dumps(current_items, ensure_ascii=False)
-            await self.conn.execute(
-                "UPDATE shop SET current_items = ?, last_refresh_time = ? WHERE shop_id = ?",
-                (items_json, last_refresh_time, shop_id)
-            )
-            if not external_transaction:
-                await self.conn.commit()
-            return True, last_refresh_time, new_stock
-        except Exception:
-            if not external_transaction:
-                await self.conn.rollback()
-            raise
+        if not row:
+            return False, 0, 0
+        return reserved, row[0], max(row[1] or 0, 0)
 
     async def increment_shop_item_stock(self, shop_id: str, item_name: str, quantity: int = 1):
         """回滚库存（在购买失败时恢复库存），支持批量"""
         quantity = max(1, int(quantity))
-        await self.conn.execute("BEGIN IMMEDIATE")
-        try:
-            async with self.conn.execute(
-                "SELECT last_refresh_time, current_items FROM shop WHERE shop_id = ?",
-                (shop_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-
-            if not row:
-                await self.conn.rollback()
-                return
-
-            last_refresh_time = row[0]
-            try:
-                current_items = json.loads(row[1])
-            except json.JSONDecodeError:
-                current_items = []
-
-            for item in current_items:
-                if item.get('name') == item_name:
-                    current_stock = item.get('stock', 0) or 0
-                    item['stock'] = current_stock + quantity
-                    break
-
-            items_json = json.dumps(current_items, ensure_ascii=False)
+        async with self._write_scope():
             await self.conn.execute(
-                "UPDATE shop SET current_items = ?, last_refresh_time = ? WHERE shop_id = ?",
-                (items_json, last_refresh_time, shop_id)
+                "UPDATE shop_items SET stock = COALESCE(stock, 0) + ? WHERE shop_id = ? AND item_name = ?",
+                (quantity, shop_id, item_name)
             )
-            await self.conn.commit()
-        except Exception:
-            await self.conn.rollback()
-            raise
-
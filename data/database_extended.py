@@ -5,23 +5,160 @@
 
 import aiosqlite
 import json
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
+from .group_commit import GroupCommitter
+from .result_cache import ResultCache
+from .row_mapper import PlayerRowMapper
+from .transaction import TransactionManager
 from ..models_extended import (
     Sect, BuffInfo, Boss, Rift, ImpartInfo, UserCd
 )
 
+# 可查询个人排名的榜单：榜单 -> (表名, 排序分数列, 上榜门槛)
+# 分数高于门槛才上榜（None 表示全部上榜）；排名顺序与各排行榜一致：分数从高到低，同分按 user_id 升序，
+# 每个榜单都有 (分数 DESC, user_id) 索引
+RANK_BOARDS: Dict[str, Tuple[str, str, Optional[int]]] = {
+    "level": ("players", "experience", None),
+    "power": ("players", "combat_power", None),
+    "wealth": ("players", "gold", None),
+    "deposit": ("bank_accounts", "balance", 0),
+    "tower": ("tower_data", "highest_floor", 0),
+    "impart": ("impart_info", "impart_atk_per", None),
+}
+
+# 可按页码翻页的榜单：榜单 -> (表名, 排序分数列, 同分排序键, 上榜门槛)
+# 翻页用 keyset 游标（上一页最后一行的 分数 与 排序键），每个榜单都有 (分数 DESC, 排序键) 顺序的索引
+PAGED_BOARDS: Dict[str, Tuple[str, str, str, Optional[int]]] = {
+    board: (table, score, "user_id", threshold) for board, (table, score, threshold) in RANK_BOARDS.items()
+}
+PAGED_BOARDS.update({
+    "tower_points": ("tower_data", "total_points", "user_id", 0),
+    "sect": ("sects", "sect_scale", "sect_id", None),  # idx_sect_scale 的条目按 (sect_scale, rowid) 排列
+})
+
 
 class DatabaseExtended:
     """数据库扩展操作类"""
     
-    def __init__(self, conn: aiosqlite.Connection):
+    def __init__(self, conn: aiosqlite.Connection, player_cache=None, reader=None,
+                 committer: Optional[GroupCommitter] = None, gate: Optional[TransactionManager] = None,
+                 player_mapper: Optional[PlayerRowMapper] = None, result_cache: Optional[ResultCache] = None):
         self.conn = conn
+        self.gate = gate  # DataBase 的事务管理器（可能为None）
+        self.player_cache = player_cache  # DataBase 的玩家写回缓存（可能为None）
+        self._reader_factory = reader  # DataBase.reader，只读查询使用的连接（可能为None）
+        self.committer = committer  # 组提交调度器（可能为None）
+        self.player_mapper = player_mapper or PlayerRowMapper()  # players 查询结果映射器
+        self.result_cache = result_cache  # DataBase 的列表结果缓存（可能为None）
+
+    async def _write(self, sql: str, params=()) -> int:
+        """执行一条小写入并等待提交（启用组提交时与其他写入合并提交）
+
+        Returns:
+            受影响的行数
+        """
+        if self.committer:
+            return await self.committer.execute(sql, params)
+        async with self._write_scope():
+            cursor = await self.conn.execute(sql, params)
+            return cursor.rowcount
+
+    async def _insert(self, sql: str, params=()) -> int:
+        """执行一条 INSERT 并等待提交
+
+        Returns:
+            新行的 rowid
+        """
+        rowids = await self._write_batch([(sql, params)], lastrowid=True)
+        return rowids[0]
+
+    @asynccontextmanager
+    async def _write_scope(self):
+        """直接写入的作用域：处于 DataBase.transaction() 中时随外层事务提交，
+        否则等待其他事务与组提交结束后自行提交（失败时回滚）
+
+        作用域内不能再调用需要等待写连接的方法（_evict_player、_write 等）；
+        需要与写入一起移出玩家缓存时使用 _write_players。
+        """
+        async with (self.gate.exclusive() if self.gate is not None else nullcontext()):
+            if self.gate is not None and self.gate.owned():
+                yield
+                return
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            await self.conn.commit()
+
+    async def _write_batch(self, statements: List[Tuple[str, tuple]], lastrowid: bool = False) -> List[int]:
+        """原子地执行一组小写入并等待提交
+
+        Args:
+            lastrowid: 为 True 时返回每条语句执行后的 cursor.lastrowid（用于 INSERT）
+
+        Returns:
+            每条语句受影响的行数（或 lastrowid）
+        """
+        if self.committer:
+            return await self.committer.execute_batch(statements, lastrowid=lastrowid)
+        results = []
+        async with self._write_scope():
+            for sql, params in statements:
+                cursor = await self.conn.execute(sql, params)
+                results.append(cursor.lastrowid if lastrowid else cursor.rowcount)
+        return results
+
+    @asynccontextmanager
+    async def _reader(self):
+        """获取只读查询连接（未配置连接池时使用写连接）"""
+        if self._reader_factory is None:
+            yield self.conn
+            return
+        async with self._reader_factory() as conn:
+            yield conn
+
+    def _invalidate(self, *tags: str):
+        """写入后使依赖这些数据的排行榜/列表结果失效"""
+        if self.result_cache:
+            self.result_cache.invalidate(*tags)
+
+    async def _evict_player(self, user_id: str):
+        """直接写 players 表前，先落盘并移出该玩家的缓存"""
+        if self.player_cache:
+            await self.player_cache.evict(str(user_id))
+
+    async def _evict_all_players(self):
+        """批量直接写 players 表前，先落盘并清空玩家缓存"""
+        if self.player_cache:
+            await self.player_cache.evict_all()
+
+    async def _write_players(self, statements: List[Tuple[str, tuple]], user_id: Optional[str] = None) -> List[int]:
+        """直接写 players 表：移出玩家缓存与写入在同一事务中完成
+
+        提交前一直持有写连接，其他协程既读不到旧行，也无法把旧行重新放入缓存；
+        事务回滚时被移出的缓存条目会放回。
+
+        Args:
+            user_id: 只移出该玩家，None 表示清空整个玩家缓存
+
+        Returns:
+            每条语句受影响的行数
+        """
+        async with (self.gate.transaction() if self.gate is not None else nullcontext()):
+            if user_id is None:
+                await self._evict_all_players()
+            else:
+                await self._evict_player(user_id)
+            return await self._write_batch(statements)
     
     # ===== 宗门系统 CRUD =====
     
     async def create_sect(self, sect: Sect):
         """创建宗门"""
-        await self.conn.execute(
+        sect_id = await self._insert(
             """
             INSERT INTO sects (
                 sect_name, sect_owner, sect_scale, sect_used_stone,
@@ -34,12 +171,8 @@ class DatabaseExtended:
                 sect.mainbuff, sect.secbuff, sect.elixir_room_level
             )
         )
-        await self.conn.commit()
-        
-        # 获取刚插入的sect_id
-        async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        self._invalidate("sect")
+        return sect_id
     
     async def get_sect_by_id(self, sect_id: int) -> Optional[Sect]:
         """根据ID获取宗门信息"""
@@ -76,7 +209,7 @@ class DatabaseExtended:
     
     async def update_sect(self, sect: Sect):
         """更新宗门信息"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE sects SET
                 sect_name = ?, sect_owner = ?, sect_scale = ?, sect_used_stone = ?,
@@ -91,18 +224,31 @@ class DatabaseExtended:
                 sect.sect_id
             )
         )
-        await self.conn.commit()
+        self._invalidate("sect")
     
     async def delete_sect(self, sect_id: int):
         """删除宗门"""
-        await self.conn.execute("DELETE FROM sects WHERE sect_id = ?", (sect_id,))
-        await self.conn.commit()
+        await self._write("DELETE FROM sects WHERE sect_id = ?", (sect_id,))
+        self._invalidate("sect")
+    
+    async def get_sect_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List[Sect]:
+        """按建设度获取 limit 个宗门（走 idx_sect_scale，成员数取自 member_count）
+
+        Args:
+            after: keyset 游标 (建设度, sect_id)，从该宗门之后开始读取；None 表示从第一名开始
+        """
+        async with self._reader() as conn:
+            _, rows = await self._fetch_keyset_page(
+                conn, "SELECT * FROM sects", "sect_scale", "sect_id", limit, after
+            )
+        return [Sect(**dict(row)) for row in rows]
     
     async def get_all_sects(self) -> List[Sect]:
         """获取所有宗门"""
-        async with self.conn.execute("SELECT * FROM sects ORDER BY sect_scale DESC") as cursor:
-            rows = await cursor.fetchall()
-            return [Sect(**dict(row)) for row in rows]
+        async with self._reader() as conn:
+            async with conn.execute("SELECT * FROM sects ORDER BY sect_scale DESC") as cursor:
+                rows = await cursor.fetchall()
+        return [Sect(**dict(row)) for row in rows]
     
     async def update_sect_materials(self, sect_id: int, materials: int, operation: int = 1):
         """更新宗门资材
@@ -113,20 +259,19 @@ class DatabaseExtended:
             operation: 1=增加, 2=减少
         """
         if operation == 1:
-            await self.conn.execute(
+            await self._write(
                 "UPDATE sects SET sect_materials = sect_materials + ? WHERE sect_id = ?",
                 (materials, sect_id)
             )
         else:
-            await self.conn.execute(
+            await self._write(
                 "UPDATE sects SET sect_materials = sect_materials - ? WHERE sect_id = ?",
                 (materials, sect_id)
             )
-        await self.conn.commit()
     
     async def donate_to_sect(self, sect_id: int, stone_num: int):
         """宗门捐献（增加灵石和建设度）"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE sects SET 
                 sect_used_stone = sect_used_stone + ?,
@@ -135,13 +280,13 @@ class DatabaseExtended:
             """,
             (stone_num, stone_num * 10, sect_id)  # 1灵石 = 10建设度
         )
-        await self.conn.commit()
+        self._invalidate("sect")
     
     # ===== BuffInfo 系统 CRUD =====
     
     async def create_buff_info(self, user_id: str):
         """初始化用户的buff信息"""
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO buff_info (
                 user_id, main_buff, sec_buff, faqi_buff, fabao_weapon,
@@ -150,7 +295,6 @@ class DatabaseExtended:
             """,
             (user_id,)
         )
-        await self.conn.commit()
     
     async def get_buff_info(self, user_id: str) -> Optional[BuffInfo]:
         """获取用户buff信息"""
@@ -165,7 +309,7 @@ class DatabaseExtended:
     
     async def update_buff_info(self, buff_info: BuffInfo):
         """更新用户buff信息"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE buff_info SET
                 main_buff = ?, sec_buff = ?, faqi_buff = ?, fabao_weapon = ?,
@@ -178,29 +322,26 @@ class DatabaseExtended:
                 buff_info.blessed_spot, buff_info.sub_buff, buff_info.user_id
             )
         )
-        await self.conn.commit()
     
     async def update_user_main_buff(self, user_id: str, buff_id: int):
         """更新用户主修功法"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE buff_info SET main_buff = ? WHERE user_id = ?",
             (buff_id, user_id)
         )
-        await self.conn.commit()
     
     async def update_user_sec_buff(self, user_id: str, buff_id: int):
         """更新用户辅修功法"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE buff_info SET sec_buff = ? WHERE user_id = ?",
             (buff_id, user_id)
         )
-        await self.conn.commit()
     
     # ===== Boss 系统 CRUD =====
     
     async def create_boss(self, boss: Boss) -> int:
         """创建Boss"""
-        await self.conn.execute(
+        boss_id = await self._insert(
             """
             INSERT INTO boss (
                 boss_name, boss_level, hp, max_hp, atk, defense,
@@ -213,11 +354,8 @@ class DatabaseExtended:
                 boss.create_time, boss.status
             )
         )
-        await self.conn.commit()
-        
-        async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        self._invalidate("boss")
+        return boss_id
     
     async def get_active_boss(self) -> Optional[Boss]:
         """获取当前存活的Boss（返回最新的一个，兼容旧代码）"""
@@ -250,7 +388,7 @@ class DatabaseExtended:
     
     async def update_boss(self, boss: Boss):
         """更新Boss信息"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE boss SET
                 boss_name = ?, boss_level = ?, hp = ?, max_hp = ?, atk = ?,
@@ -263,21 +401,143 @@ class DatabaseExtended:
                 boss.boss_id
             )
         )
-        await self.conn.commit()
+        self._invalidate("boss")
     
     async def defeat_boss(self, boss_id: int):
         """标记Boss为已击败"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE boss SET status = 0 WHERE boss_id = ?",
             (boss_id,)
         )
-        await self.conn.commit()
+        self._invalidate("boss")
+    
+    async def apply_boss_damage(self, boss_id: int, user_id: str, damage: int) -> Tuple[bool, bool]:
+        """原子地对Boss造成伤害并记录贡献
+        
+        三条语句作为一个整体执行（启用组提交时，同一时刻的多次挑战在同一个事务中依次结算）：
+        贡献按Boss当时的剩余气血封顶后累加；气血扣减为 hp = MAX(hp - ?, 0)，
+        不再读出后写回；只有把存活的Boss气血打到0的那一次会把状态改为已击败，
+        因此同一个Boss只会有一名击杀者。
+        
+        Returns:
+            (伤害是否生效, 是否由本次伤害击杀)；Boss已被击败时伤害不生效
+        """
+        damage = max(0, int(damage))
+        applied, _, killed = await self._write_batch([
+            (
+                "INSERT INTO boss_damage (boss_id, user_id, damage, hits) "
+                "SELECT boss_id, ?, MIN(?, hp), 1 FROM boss WHERE boss_id = ? AND status = 1 "
+                "ON CONFLICT(boss_id, user_id) DO UPDATE SET "
+                "damage = damage + excluded.damage, hits = hits + 1",
+                (str(user_id), damage, boss_id),
+            ),
+            ("UPDATE boss SET hp = MAX(hp - ?, 0) WHERE boss_id = ? AND status = 1", (damage, boss_id)),
+            ("UPDATE boss SET status = 0 WHERE boss_id = ? AND status = 1 AND hp <= 0", (boss_id,)),
+        ])
+        self._invalidate("boss")
+        return applied > 0, killed > 0
+    
+    async def get_boss_damage_ranking(self, boss_id: int, limit: int = 5) -> List[dict]:
+        """获取Boss伤害贡献排行（按累计有效伤害降序）
+        
+        Returns:
+            [{"user_id", "damage", "hits"}, ...]
+        """
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT user_id, damage, hits FROM boss_damage "
+                "WHERE boss_id = ? ORDER BY damage DESC, user_id LIMIT ?",
+                (boss_id, limit)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        return [{"user_id": row[0], "damage": row[1], "hits": row[2]} for row in rows]
+    
+    async def pay_boss_kill_rewards(self, boss_id: int, total_reward: int, killer_id: str) -> Dict[str, int]:
+        """按伤害贡献瓜分Boss击杀奖励，并在同一事务中发放给所有参与者
+        
+        每名参与者分得 total_reward × 本人累计有效伤害 ÷ 全部有效伤害（向下取整），
+        取整余下的灵石归击杀者。Boss被击败后不再记录伤害，击杀后调用时贡献已经确定。
+        
+        Returns:
+            {user_id: 分得灵石}（含击杀者）
+        """
+        total_reward = max(0, int(total_reward))
+        killer_id = str(killer_id)
+        async with (self.gate.transaction() if self.gate is not None else nullcontext()):
+            async with self.conn.execute(
+                "SELECT user_id, damage FROM boss_damage WHERE boss_id = ? AND damage > 0",
+                (boss_id,)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            total_damage = sum(row[1] for row in rows)
+            shares = {row[0]: total_reward * row[1] // total_damage for row in rows} if total_damage else {}
+            shares[killer_id] = shares.get(killer_id, 0) + total_reward - sum(shares.values())
+            for user_id, share in shares.items():
+                if share > 0:
+                    await self._evict_player(user_id)
+                    await self._write("UPDATE players SET gold = gold + ? WHERE user_id = ?", (share, user_id))
+        return shares
+    
+    # ===== 战斗回放 =====
+    
+    async def save_combat_replay(self, kind: str, seed: int, first: dict, second: dict,
+                                 combat_type: int = 1, keep: int = 5000) -> int:
+        """保存战斗回放（随机种子与双方开战属性），每100条清理一次，保留最近 keep 条以上
+        
+        Returns:
+            回放编号
+        """
+        statements = [(
+            """
+            INSERT INTO combat_replays (kind, seed, combat_type, first_stats, second_stats, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                kind, seed, combat_type,
+                json.dumps(first, ensure_ascii=False, separators=(",", ":")),
+                json.dumps(second, ensure_ascii=False, separators=(",", ":")),
+                int(time.time())
+            )
+        )]
+        if keep > 0:
+            # 每100条清理一次过旧的回放；编号取自同一连接上刚插入的行，随插入一起提交
+            statements.append((
+                "DELETE FROM combat_replays "
+                "WHERE last_insert_rowid() % 100 = 0 AND replay_id <= last_insert_rowid() - ?",
+                (keep,)
+            ))
+        rowids = await self._write_batch(statements, lastrowid=True)
+        return rowids[0]
+    
+    async def get_combat_replay(self, replay_id: int) -> Optional[dict]:
+        """获取战斗回放
+        
+        Returns:
+            {"kind", "seed", "combat_type", "first", "second", "created_at"}，不存在时返回 None
+        """
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT kind, seed, combat_type, first_stats, second_stats, created_at "
+                "FROM combat_replays WHERE replay_id = ?",
+                (replay_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "kind": row[0],
+            "seed": row[1],
+            "combat_type": row[2],
+            "first": json.loads(row[3]),
+            "second": json.loads(row[4]),
+            "created_at": row[5],
+        }
     
     # ===== 秘境系统 CRUD =====
     
     async def create_rift(self, rift: Rift) -> int:
         """创建秘境"""
-        await self.conn.execute(
+        rift_id = await self._insert(
             """
             INSERT INTO rifts (
                 rift_name, rift_level, required_level, rewards
@@ -285,11 +545,8 @@ class DatabaseExtended:
             """,
             (rift.rift_name, rift.rift_level, rift.required_level, rift.rewards)
         )
-        await self.conn.commit()
-        
-        async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        self._invalidate("rift")
+        return rift_id
     
     async def get_rift_by_id(self, rift_id: int) -> Optional[Rift]:
         """根据ID获取秘境信息"""
@@ -304,17 +561,18 @@ class DatabaseExtended:
     
     async def get_all_rifts(self) -> List[Rift]:
         """获取所有秘境"""
-        async with self.conn.execute(
-            "SELECT * FROM rifts ORDER BY rift_level ASC"
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [Rift(**dict(row)) for row in rows]
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT * FROM rifts ORDER BY rift_level ASC"
+            ) as cursor:
+                rows = await cursor.fetchall()
+        return [Rift(**dict(row)) for row in rows]
     
     # ===== 传承系统 CRUD =====
     
     async def create_impart_info(self, user_id: str):
         """初始化用户传承信息"""
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO impart_info (
                 user_id, impart_hp_per, impart_mp_per, impart_atk_per,
@@ -323,7 +581,7 @@ class DatabaseExtended:
             """,
             (user_id,)
         )
-        await self.conn.commit()
+        self._invalidate("impart")
     
     async def get_impart_info(self, user_id: str) -> Optional[ImpartInfo]:
         """获取用户传承信息"""
@@ -338,7 +596,7 @@ class DatabaseExtended:
     
     async def update_impart_info(self, impart: ImpartInfo):
         """更新用户传承信息"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE impart_info SET
                 impart_hp_per = ?, impart_mp_per = ?, impart_atk_per = ?,
@@ -350,20 +608,19 @@ class DatabaseExtended:
                 impart.impart_know_per, impart.impart_burst_per, impart.user_id
             )
         )
-        await self.conn.commit()
+        self._invalidate("impart")
     
     # ===== 用户CD系统 CRUD =====
     
     async def create_user_cd(self, user_id: str):
         """初始化用户CD信息"""
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO user_cd (user_id, type, create_time, scheduled_time)
             VALUES (?, 0, 0, 0)
             """,
             (user_id,)
         )
-        await self.conn.commit()
     
     async def get_user_cd(self, user_id: str) -> Optional[UserCd]:
         """获取用户CD信息"""
@@ -378,7 +635,7 @@ class DatabaseExtended:
     
     async def update_user_cd(self, user_cd: UserCd):
         """更新用户CD信息"""
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE user_cd SET
                 type = ?, create_time = ?, scheduled_time = ?, extra_data = ?
@@ -386,7 +643,6 @@ class DatabaseExtended:
             """,
             (user_cd.type, user_cd.create_time, user_cd.scheduled_time, user_cd.extra_data, user_cd.user_id)
         )
-        await self.conn.commit()
     
     async def set_user_busy(self, user_id: str, busy_type: int, scheduled_time: int = 0, extra_data: dict = None):
         """设置用户忙碌状态
@@ -397,17 +653,15 @@ class DatabaseExtended:
             scheduled_time: 计划完成时间戳
             extra_data: 额外数据（如秘境ID等）
         """
-        import time
         import json
         extra_json = json.dumps(extra_data or {}, ensure_ascii=False)
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE user_cd SET type = ?, create_time = ?, scheduled_time = ?, extra_data = ?
             WHERE user_id = ?
             """,
             (busy_type, int(time.time()), scheduled_time, extra_json, user_id)
         )
-        await self.conn.commit()
     
     async def set_user_free(self, user_id: str):
         """设置用户为空闲状态"""
@@ -417,58 +671,357 @@ class DatabaseExtended:
     
     async def update_player_hp_mp(self, user_id: str, hp: int, mp: int):
         """更新玩家HP和MP"""
-        await self.conn.execute(
-            "UPDATE players SET hp = ?, mp = ? WHERE user_id = ?",
-            (hp, mp, user_id)
-        )
-        await self.conn.commit()
+        await self._write_players([
+            ("UPDATE players SET hp = ?, mp = ? WHERE user_id = ?", (hp, mp, user_id))
+        ], user_id)
     
     async def update_player_sect_info(self, user_id: str, sect_id: int, sect_position: int):
-        """更新玩家宗门信息"""
-        await self.conn.execute(
-            "UPDATE players SET sect_id = ?, sect_position = ? WHERE user_id = ?",
-            (sect_id, sect_position, user_id)
-        )
-        await self.conn.commit()
+        """更新玩家宗门信息（加入、退出、被踢出时同步维护宗门成员数）"""
+        # 成员数按玩家原来所在的宗门计算，与玩家记录在同一事务中原子更新
+        await self._write_players([
+            (
+                """
+                UPDATE sects SET member_count = member_count - 1
+                WHERE sect_id = (SELECT sect_id FROM players WHERE user_id = ?) AND sect_id != ?
+                """,
+                (user_id, sect_id)
+            ),
+            (
+                """
+                UPDATE sects SET member_count = member_count + 1
+                WHERE sect_id = ? AND sect_id != (SELECT sect_id FROM players WHERE user_id = ?)
+                """,
+                (sect_id, user_id)
+            ),
+            (
+                "UPDATE players SET sect_id = ?, sect_position = ? WHERE user_id = ?",
+                (sect_id, sect_position, user_id)
+            ),
+        ], user_id)
+        self._invalidate("sect")
     
     async def update_player_sect_contribution(self, user_id: str, contribution: int):
         """更新玩家宗门贡献度"""
-        await self.conn.execute(
-            "UPDATE players SET sect_contribution = ? WHERE user_id = ?",
-            (contribution, user_id)
-        )
-        await self.conn.commit()
+        await self._write_players([
+            ("UPDATE players SET sect_contribution = ? WHERE user_id = ?", (contribution, user_id))
+        ], user_id)
     
     async def increment_sect_task_count(self, user_id: str, count: int = 1):
         """增加宗门任务完成次数"""
-        await self.conn.execute(
-            "UPDATE players SET sect_task = sect_task + ? WHERE user_id = ?",
-            (count, user_id)
-        )
-        await self.conn.commit()
+        await self._write_players([
+            ("UPDATE players SET sect_task = sect_task + ? WHERE user_id = ?", (count, user_id))
+        ], user_id)
     
     async def reset_sect_tasks(self):
         """重置所有用户的宗门任务次数（定时任务）"""
-        await self.conn.execute("UPDATE players SET sect_task = 0")
-        await self.conn.commit()
+        await self._write_players([("UPDATE players SET sect_task = 0", ())])
     
     async def reset_sect_elixir_get(self):
         """重置所有用户的宗门丹药领取标记（定时任务）"""
-        await self.conn.execute("UPDATE players SET sect_elixir_get = 0")
-        await self.conn.commit()
+        await self._write_players([("UPDATE players SET sect_elixir_get = 0", ())])
     
     async def get_sect_members(self, sect_id: int) -> List:
         """获取宗门所有成员"""
-        from ..models import Player
-        async with self.conn.execute(
-            "SELECT * FROM players WHERE sect_id = ? ORDER BY sect_position ASC, level_index DESC",
-            (sect_id,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            # 简化返回，只返回部分字段
-            from dataclasses import fields
-            PLAYER_FIELDS = {f.name for f in fields(Player)}
-            return [Player(**{k: v for k, v in dict(row).items() if k in PLAYER_FIELDS}) for row in rows]
+        if self.player_cache:
+            await self.player_cache.flush()
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT * FROM players WHERE sect_id = ? ORDER BY sect_position ASC, level_index DESC",
+                (sect_id,)
+            ) as cursor:
+                return self.player_mapper.map_rows(cursor.description, await cursor.fetchall())
+    
+    # ===== 排行榜查询 =====
+    
+    async def get_experience_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List:
+        """按修为从高到低获取 limit 名玩家（走覆盖索引 idx_players_rank_exp）
+
+        Args:
+            after: keyset 游标 (修为, user_id)，从该玩家之后开始读取；None 表示从第一名开始
+
+        Returns:
+            只含 user_id、user_name、experience、level_index、cultivation_type 的 Player 列表
+        """
+        return await self._query_player_ranking(
+            "SELECT user_id, user_name, experience, level_index, cultivation_type FROM players",
+            "experience", limit, after
+        )
+    
+    async def get_gold_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List:
+        """按灵石从高到低获取 limit 名玩家（走覆盖索引 idx_players_rank_gold）
+
+        Args:
+            after: keyset 游标 (灵石, user_id)
+
+        Returns:
+            只含 user_id、user_name、gold 的 Player 列表
+        """
+        return await self._query_player_ranking(
+            "SELECT user_id, user_name, gold FROM players", "gold", limit, after
+        )
+    
+    async def get_power_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List:
+        """按存储的战力从高到低获取 limit 名玩家（走索引 idx_players_rank_power）
+
+        Args:
+            after: keyset 游标 (战力, user_id)
+
+        Returns:
+            完整的 Player 列表（排行需要根据装备显示主攻属性）
+        """
+        return await self._query_player_ranking(
+            "SELECT * FROM players", "combat_power", limit, after
+        )
+    
+    async def _query_player_ranking(self, select: str, score: str, limit: int,
+                                    after: Optional[tuple]) -> List:
+        # 先落盘缓存中的修改，保证排行读到最新数据
+        if self.player_cache:
+            await self.player_cache.flush()
+        async with self._reader() as conn:
+            description, rows = await self._fetch_keyset_page(conn, select, score, "user_id", limit, after)
+        return self.player_mapper.map_rows(description, rows)
+    
+    async def _fetch_keyset_page(self, conn: aiosqlite.Connection, select: str, score: str, key: str,
+                                 limit: int, after: Optional[tuple] = None,
+                                 where: str = "", params: tuple = ()) -> Tuple[Sequence, list]:
+        """按 (score 降序, key 升序) 的榜单顺序读取游标之后的 limit 行
+
+        游标之后的行分为「同分且 key 更大」与「分数更低」两段，各走一次索引范围查询，
+        本查询只读取本页的行。按页码跳转时游标由 get_ranking_cursor 定位，那一步仍需
+        在索引上用 OFFSET 跳过前面的条目。
+
+        Args:
+            select: 不含 WHERE 的 SELECT ... FROM 部分
+            after: 上一页最后一行的 (分数, key)，None 表示从第一名开始
+            where/params: 额外的筛选条件（如上榜门槛）
+
+        Returns:
+            (游标 description, 行列表)
+        """
+        conditions = [where] if where else []
+        description = None
+        rows: list = []
+        if after is not None:
+            value, last_key = after
+            async with conn.execute(
+                f"{select} WHERE {' AND '.join(conditions + [f'{score} = ?', f'{key} > ?'])} "
+                f"ORDER BY {key} LIMIT ?",
+                (*params, value, last_key, limit)
+            ) as cursor:
+                description = cursor.description
+                rows = list(await cursor.fetchall())
+            conditions.append(f"{score} < ?")
+            params = (*params, value)
+        if len(rows) < limit or description is None:
+            clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            async with conn.execute(
+                f"{select}{clause} ORDER BY {score} DESC, {key} LIMIT ?",
+                (*params, limit - len(rows))
+            ) as cursor:
+                description = cursor.description
+                rows += await cursor.fetchall()
+        return description, rows
+    
+    async def get_ranking_cursor(self, board: str, position: int) -> Optional[tuple]:
+        """获取榜单第 position 名的 keyset 游标 (分数, 排序键)，用于按页码跳转
+
+        在 PAGED_BOARDS 的排行索引上用 LIMIT 1 OFFSET 跳过前面的条目（覆盖索引，不回表），
+        代价随 position 线性增长，但只扫索引条目；随后的整页数据由 keyset 查询读取。
+
+        Returns:
+            榜单不足 position 名时返回 None
+        """
+        table, score, key, threshold = PAGED_BOARDS[board]
+        if table == "players" and self.player_cache:
+            await self.player_cache.flush()
+        where = "" if threshold is None else f" WHERE {score} > {int(threshold)}"
+        async with self._reader() as conn:
+            async with conn.execute(
+                f"SELECT {score}, {key} FROM {table}{where} ORDER BY {score} DESC, {key} LIMIT 1 OFFSET ?",
+                (max(0, position - 1),)
+            ) as cursor:
+                row = await cursor.fetchone()
+        return (row[0], row[1]) if row else None
+    
+    async def get_player_rank(self, board: str, user_id: str, neighbours: int = 2) -> Optional[dict]:
+        """查询玩家在某个榜单上的名次及前后相邻的玩家
+
+        名次由索引上的 COUNT(*) 得出，相邻玩家从玩家所在位置沿索引向前/向后各取几条，
+        不需要读取整个榜单。
+
+        Args:
+            board: RANK_BOARDS 中的榜单名
+            user_id: 玩家ID
+            neighbours: 前后各显示的玩家数
+
+        Returns:
+            {"rank", "score", "entries": [(名次, user_id, 道号, 分数), ...]}（entries 含玩家本人，按名次排列），
+            玩家未上榜时返回 None
+        """
+        table, score, threshold = RANK_BOARDS[board]
+        user_id = str(user_id)
+        if table == "players" and self.player_cache:
+            await self.player_cache.flush()
+        if table == "players":
+            select = f"SELECT t.user_id, t.user_name, t.{score} FROM players t WHERE "
+        else:
+            select = (
+                f"SELECT t.user_id, p.user_name, t.{score} FROM {table} t "
+                f"LEFT JOIN players p ON p.user_id = t.user_id WHERE "
+            )
+        floor = float("-inf") if threshold is None else threshold
+
+        async with self._reader() as conn:
+            async with conn.execute(f"{select}t.user_id = ?", (user_id,)) as cursor:
+                me = await cursor.fetchone()
+            if me is None or me[2] <= floor:
+                return None
+            value = me[2]
+
+            # 分数不低于本人的玩家必然也过了上榜门槛，只有向后取相邻玩家时需要门槛条件
+            async with conn.execute(
+                f"""
+                SELECT (SELECT COUNT(*) FROM {table} WHERE {score} > ?)
+                     + (SELECT COUNT(*) FROM {table} WHERE {score} = ? AND user_id < ?)
+                """,
+                (value, value, user_id)
+            ) as cursor:
+                rank = (await cursor.fetchone())[0] + 1
+
+            async def fetch(where: str, order: str, params: tuple, limit: int) -> list:
+                if limit <= 0:
+                    return []
+                async with conn.execute(
+                    f"{select}{where} ORDER BY {order} LIMIT ?", (*params, limit)
+                ) as cursor:
+                    return list(await cursor.fetchall())
+
+            # 排在前面的玩家（由近到远）：先取同分中 user_id 更小的，再取分数更高的
+            above = await fetch(f"t.{score} = ? AND t.user_id < ?", "t.user_id DESC",
+                                (value, user_id), neighbours)
+            above += await fetch(f"t.{score} > ?", f"t.{score} ASC, t.user_id DESC",
+                                 (value,), neighbours - len(above))
+            # 排在后面的玩家（由近到远）
+            below = await fetch(f"t.{score} = ? AND t.user_id > ?", "t.user_id",
+                                (value, user_id), neighbours)
+            if threshold is None:
+                below += await fetch(f"t.{score} < ?", f"t.{score} DESC, t.user_id",
+                                     (value,), neighbours - len(below))
+            else:
+                below += await fetch(f"t.{score} < ? AND t.{score} > ?", f"t.{score} DESC, t.user_id",
+                                     (value, threshold), neighbours - len(below))
+
+        entries = [(rank - i, r[0], r[1], r[2]) for i, r in enumerate(above, 1)][::-1]
+        entries.append((rank, user_id, me[1], value))
+        entries += [(rank + i, r[0], r[1], r[2]) for i, r in enumerate(below, 1)]
+        return {"rank": rank, "score": value, "entries": entries}
+    
+    # ===== 储物戒物品 / 丹药背包 CRUD =====
+    
+    async def get_player_items(self, user_id: str) -> Dict[str, int]:
+        """获取储物戒中的全部物品 {物品名: 数量}（按存入顺序）"""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT item_name, count FROM player_items WHERE user_id = ? AND count > 0 ORDER BY rowid",
+                (str(user_id),)
+            ) as cursor:
+                return {row[0]: row[1] for row in await cursor.fetchall()}
+    
+    async def get_player_item_count(self, user_id: str, item_name: str) -> int:
+        """获取储物戒中某物品的数量"""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT count FROM player_items WHERE user_id = ? AND item_name = ?",
+                (str(user_id), item_name)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return max(row[0], 0) if row else 0
+    
+    async def count_player_item_kinds(self, user_id: str) -> int:
+        """获取储物戒中的物品种类数（即已用格子数）"""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT COUNT(*) FROM player_items WHERE user_id = ? AND count > 0",
+                (str(user_id),)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else 0
+    
+    async def add_player_item(self, user_id: str, item_name: str, count: int, bound: bool = False):
+        """原子地增加储物戒物品数量（不存在时插入）"""
+        await self._write(
+            """
+            INSERT INTO player_items (user_id, item_name, count, bound) VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, item_name) DO UPDATE SET count = count + excluded.count
+            """,
+            (str(user_id), item_name, count, 1 if bound else 0)
+        )
+    
+    async def remove_player_item(self, user_id: str, item_name: str, count: int) -> bool:
+        """原子地扣减储物戒物品数量，数量不足时不做修改
+
+        Returns:
+            是否扣减成功
+        """
+        rowcounts = await self._write_batch([
+            (
+                "UPDATE player_items SET count = count - ? WHERE user_id = ? AND item_name = ? AND count >= ?",
+                (count, str(user_id), item_name, count)
+            ),
+            (
+                "DELETE FROM player_items WHERE user_id = ? AND item_name = ? AND count <= 0",
+                (str(user_id), item_name)
+            ),
+        ])
+        return rowcounts[0] > 0
+    
+    async def get_player_pills(self, user_id: str) -> Dict[str, int]:
+        """获取丹药背包 {丹药名: 数量}（按获得顺序）"""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT pill_name, count FROM player_pills WHERE user_id = ? AND count > 0 ORDER BY rowid",
+                (str(user_id),)
+            ) as cursor:
+                return {row[0]: row[1] for row in await cursor.fetchall()}
+    
+    async def get_player_pill_count(self, user_id: str, pill_name: str) -> int:
+        """获取丹药背包中某丹药的数量"""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT count FROM player_pills WHERE user_id = ? AND pill_name = ?",
+                (str(user_id), pill_name)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return max(row[0], 0) if row else 0
+    
+    async def add_player_pill(self, user_id: str, pill_name: str, count: int):
+        """原子地增加丹药数量（不存在时插入）"""
+        await self._write(
+            """
+            INSERT INTO player_pills (user_id, pill_name, count) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, pill_name) DO UPDATE SET count = count + excluded.count
+            """,
+            (str(user_id), pill_name, count)
+        )
+    
+    async def remove_player_pill(self, user_id: str, pill_name: str, count: int = 1) -> bool:
+        """原子地扣减丹药数量，数量不足时不做修改
+
+        Returns:
+            是否扣减成功
+        """
+        rowcounts = await self._write_batch([
+            (
+                "UPDATE player_pills SET count = count - ? WHERE user_id = ? AND pill_name = ? AND count >= ?",
+                (count, str(user_id), pill_name, count)
+            ),
+            (
+                "DELETE FROM player_pills WHERE user_id = ? AND pill_name = ? AND count <= 0",
+                (str(user_id), pill_name)
+            ),
+        ])
+        return rowcounts[0] > 0
     
     # ===== Phase 2: 灵石银行 CRUD =====
     
@@ -485,7 +1038,7 @@ class DatabaseExtended:
     
     async def update_bank_account(self, user_id: str, balance: int, last_interest_time: int):
         """更新或创建银行账户"""
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO bank_accounts (user_id, balance, last_interest_time)
             VALUES (?, ?, ?)
@@ -495,33 +1048,12 @@ class DatabaseExtended:
             """,
             (user_id, balance, last_interest_time)
         )
-        await self.conn.commit()
+        self._invalidate("deposit")
     
     # ===== Phase 2: 悬赏令系统 CRUD =====
     
-    async def ensure_bounty_tables(self):
-        """确保悬赏系统表存在（运行时检查）"""
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS bounty_tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                bounty_id INTEGER NOT NULL,
-                bounty_name TEXT NOT NULL,
-                target_type TEXT NOT NULL,
-                target_count INTEGER NOT NULL,
-                current_progress INTEGER NOT NULL DEFAULT 0,
-                rewards TEXT NOT NULL DEFAULT '{}',
-                start_time INTEGER NOT NULL,
-                expire_time INTEGER NOT NULL,
-                status INTEGER NOT NULL DEFAULT 1
-            )
-        """)
-        await self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bounty_user ON bounty_tasks(user_id)")
-        await self.conn.commit()
-    
     async def get_active_bounty(self, user_id: str) -> Optional[dict]:
         """获取用户当前进行中的悬赏任务"""
-        await self.ensure_bounty_tables()  # 确保表存在
         async with self.conn.execute(
             "SELECT * FROM bounty_tasks WHERE user_id = ? AND status = 1",
             (user_id,)
@@ -535,8 +1067,7 @@ class DatabaseExtended:
                            target_type: str, target_count: int, rewards: str, 
                            expire_time: int):
         """创建悬赏任务"""
-        import time
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO bounty_tasks (
                 user_id, bounty_id, bounty_name, target_type, 
@@ -547,46 +1078,31 @@ class DatabaseExtended:
             (user_id, bounty_id, bounty_name, target_type, 
              target_count, rewards, int(time.time()), expire_time)
         )
-        await self.conn.commit()
     
     async def update_bounty_progress(self, user_id: str, progress: int):
         """更新悬赏任务进度"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE bounty_tasks SET current_progress = ? WHERE user_id = ? AND status = 1",
             (progress, user_id)
         )
-        await self.conn.commit()
     
     async def complete_bounty(self, user_id: str) -> bool:
         """完成悬赏任务"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE bounty_tasks SET status = 2 WHERE user_id = ? AND status = 1",
             (user_id,)
         )
-        await self.conn.commit()
         return True
     
     async def cancel_bounty(self, user_id: str):
         """取消悬赏任务"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE bounty_tasks SET status = 0 WHERE user_id = ? AND status = 1",
             (user_id,)
         )
-        await self.conn.commit()
     
     # ===== 系统配置 CRUD =====
     
-    async def ensure_system_config_table(self):
-        """确保系统配置表存在"""
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS system_config (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                updated_at INTEGER DEFAULT 0
-            )
-        """)
-        await self.conn.commit()
-    
     async def ensure_default_rifts(self):
         """确保默认秘境数据存在"""
         # 检查秘境表是否有数据
@@ -604,18 +1120,19 @@ class DatabaseExtended:
                 (5, "上古遗迹", 5, 15, json.dumps({"exp": [10000, 30000], "gold": [5000, 20000]})),
             ]
             
-            for rift in default_rifts:
-                await self.conn.execute(
+            await self._write_batch([
+                (
                     "INSERT OR IGNORE INTO rifts (rift_id, rift_name, rift_level, required_level, rewards) VALUES (?, ?, ?, ?, ?)",
                     rift
                 )
-            await self.conn.commit()
+                for rift in default_rifts
+            ])
+            self._invalidate("rift")
             return True
         return False
     
     async def get_system_config(self, key: str) -> Optional[str]:
         """获取系统配置"""
-        await self.ensure_system_config_table()
         async with self.conn.execute(
             "SELECT value FROM system_config WHERE key = ?",
             (key,)
@@ -625,16 +1142,13 @@ class DatabaseExtended:
     
     async def set_system_config(self, key: str, value: str):
         """设置系统配置"""
-        import time
-        await self.ensure_system_config_table()
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO system_config (key, value, updated_at) VALUES (?, ?, ?)
             ON CONFLICT(key) DO UPDATE SET value = ?, updated_at = ?
             """,
             (key, value, int(time.time()), value, int(time.time()))
         )
-        await self.conn.commit()
     
     # ===== 赠予请求系统 CRUD =====
     
@@ -653,11 +1167,10 @@ class DatabaseExtended:
         Returns:
             新创建的赠予请求ID
         """
-        import time
         now = int(time.time())
         expires_at = now + expires_hours * 3600
         
-        await self.conn.execute(
+        return await self._insert(
             """
             INSERT INTO pending_gifts (
                 receiver_id, sender_id, sender_name, item_name, count, created_at, expires_at
@@ -665,15 +1178,9 @@ class DatabaseExtended:
             """,
             (receiver_id, sender_id, sender_name, item_name, count, now, expires_at)
         )
-        await self.conn.commit()
-        
-        async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
     
     async def get_pending_gift(self, receiver_id: str) -> Optional[dict]:
         """获取接收者的待处理赠予请求（最新的一个）"""
-        import time
         now = int(time.time())
         
         # 先清理过期的请求
@@ -705,7 +1212,6 @@ class DatabaseExtended:
     
     async def get_all_pending_gifts(self, receiver_id: str) -> List[dict]:
         """获取接收者的所有待处理赠予请求"""
-        import time
         now = int(time.time())
         
         async with self.conn.execute(
@@ -734,29 +1240,25 @@ class DatabaseExtended:
     
     async def delete_pending_gift(self, gift_id: int):
         """删除赠予请求"""
-        await self.conn.execute(
+        await self._write(
             "DELETE FROM pending_gifts WHERE id = ?",
             (gift_id,)
         )
-        await self.conn.commit()
     
     async def delete_pending_gift_by_receiver(self, receiver_id: str):
         """删除接收者的所有赠予请求"""
-        await self.conn.execute(
+        await self._write(
             "DELETE FROM pending_gifts WHERE receiver_id = ?",
             (receiver_id,)
         )
-        await self.conn.commit()
     
     async def cleanup_expired_gifts(self):
         """清理过期的赠予请求"""
-        import time
         now = int(time.time())
-        await self.conn.execute(
+        await self._write(
             "DELETE FROM pending_gifts WHERE expires_at < ?",
             (now,)
         )
-        await self.conn.commit()
     
     # ===== Phase 3: 银行贷款系统 CRUD =====
     
@@ -784,31 +1286,25 @@ class DatabaseExtended:
     async def create_loan(self, user_id: str, principal: int, interest_rate: float, 
                           borrowed_at: int, due_at: int, loan_type: str = "normal") -> int:
         """创建贷款记录"""
-        await self.conn.execute(
+        return await self._insert(
             """INSERT INTO bank_loans (user_id, principal, interest_rate, borrowed_at, due_at, status, loan_type)
                VALUES (?, ?, ?, ?, ?, 'active', ?)""",
             (user_id, principal, interest_rate, borrowed_at, due_at, loan_type)
         )
-        await self.conn.commit()
-        async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else 0
     
     async def close_loan(self, loan_id: int):
         """关闭贷款（标记为已还清）"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE bank_loans SET status = 'closed' WHERE id = ?",
             (loan_id,)
         )
-        await self.conn.commit()
     
     async def mark_loan_overdue(self, loan_id: int):
         """标记贷款逾期"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE bank_loans SET status = 'overdue' WHERE id = ?",
             (loan_id,)
         )
-        await self.conn.commit()
     
     async def get_overdue_loans(self, current_time: int) -> List[dict]:
         """获取所有逾期贷款"""
@@ -835,21 +1331,29 @@ class DatabaseExtended:
     async def add_bank_transaction(self, user_id: str, trans_type: str, amount: int, 
                                     balance_after: int, description: str, created_at: int):
         """添加银行交易流水"""
-        await self.conn.execute(
+        await self._write(
             """INSERT INTO bank_transactions (user_id, trans_type, amount, balance_after, description, created_at)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (user_id, trans_type, amount, balance_after, description, created_at)
         )
-        await self.conn.commit()
     
-    async def get_bank_transactions(self, user_id: str, limit: int = 20) -> List[dict]:
-        """获取用户银行交易流水"""
+    async def get_bank_transactions(self, user_id: str, limit: int = 20,
+                                    before: Optional[tuple] = None) -> List[dict]:
+        """获取用户银行交易流水（从新到旧，走 idx_bank_trans_user_time）
+
+        Args:
+            before: keyset 游标 (created_at, id)，只读取比该条更早的流水；None 表示从最新一条开始
+        """
         transactions = []
+        if before is None:
+            where, params = "user_id = ?", (user_id,)
+        else:
+            where, params = "user_id = ? AND (created_at, id) < (?, ?)", (user_id, *before)
         async with self.conn.execute(
-            """SELECT id, trans_type, amount, balance_after, description, created_at
-               FROM bank_transactions WHERE user_id = ?
-               ORDER BY created_at DESC LIMIT ?""",
-            (user_id, limit)
+            f"""SELECT id, trans_type, amount, balance_after, description, created_at
+               FROM bank_transactions WHERE {where}
+               ORDER BY created_at DESC, id DESC LIMIT ?""",
+            (*params, limit)
         ) as cursor:
             async for row in cursor:
                 transactions.append({
@@ -862,43 +1366,40 @@ class DatabaseExtended:
                 })
         return transactions
     
-    async def get_deposit_ranking(self, limit: int = 10) -> List[dict]:
-        """获取存款排行榜"""
-        rankings = []
+    async def get_bank_transaction_cursor(self, user_id: str, position: int) -> Optional[tuple]:
+        """获取用户第 position 条流水（从新到旧）的 keyset 游标 (created_at, id)，用于按页码跳转
+
+        在 idx_bank_trans_user_time 上用 LIMIT 1 OFFSET 跳过前面的流水（覆盖索引，不回表），
+        代价随 position 线性增长。
+
+        Returns:
+            流水不足 position 条时返回 None
+        """
         async with self.conn.execute(
-            """SELECT user_id, balance FROM bank_accounts
-               WHERE balance > 0
-               ORDER BY balance DESC LIMIT ?""",
-            (limit,)
+            """SELECT created_at, id FROM bank_transactions WHERE user_id = ?
+               ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?""",
+            (user_id, max(0, position - 1))
         ) as cursor:
-            async for row in cursor:
-                rankings.append({
-                    "user_id": row[0],
-                    "balance": row[1]
-                })
-        return rankings
-
-    # ===== 通天塔系统 CRUD =====
+            row = await cursor.fetchone()
+        return (row[0], row[1]) if row else None
     
-    async def ensure_tower_table(self):
-        """确保通天塔数据表存在"""
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS tower_data (
-                user_id TEXT PRIMARY KEY,
-                current_floor INTEGER DEFAULT 0,
-                highest_floor INTEGER DEFAULT 0,
-                points INTEGER DEFAULT 0,
-                total_points INTEGER DEFAULT 0,
-                weekly_purchases TEXT DEFAULT '{}',
-                extra_data TEXT DEFAULT '{}',
-                last_reset INTEGER DEFAULT 0
+    async def get_deposit_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List[dict]:
+        """获取存款排行榜
+
+        Args:
+            after: keyset 游标 (存款, user_id)
+        """
+        async with self._reader() as conn:
+            _, rows = await self._fetch_keyset_page(
+                conn, "SELECT user_id, balance FROM bank_accounts", "balance", "user_id",
+                limit, after, "balance > 0"
             )
-        """)
-        await self.conn.commit()
+        return [{"user_id": row[0], "balance": row[1]} for row in rows]
+
+    # ===== 通天塔系统 CRUD =====
     
     async def get_tower_data(self, user_id: str) -> Optional[dict]:
         """获取玩家通天塔数据"""
-        await self.ensure_tower_table()
         async with self.conn.execute(
             "SELECT * FROM tower_data WHERE user_id = ?",
             (user_id,)
@@ -919,11 +1420,10 @@ class DatabaseExtended:
     
     async def save_tower_data(self, user_id: str, data: dict):
         """保存玩家通天塔数据"""
-        await self.ensure_tower_table()
         weekly_purchases = json.dumps(data.get("weekly_purchases", {}))
         extra_data = json.dumps(data.get("extra_data", data.get("extra_buffs", {})))
         
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO tower_data (user_id, current_floor, highest_floor, points, total_points, weekly_purchases, extra_data)
             VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -938,48 +1438,42 @@ class DatabaseExtended:
                 data.get("points", 0), data.get("total_points", 0), weekly_purchases, extra_data
             )
         )
-        await self.conn.commit()
+        self._invalidate("tower")
     
-    async def get_tower_floor_ranking(self, limit: int = 10) -> List[tuple]:
-        """获取通天塔层数排行榜"""
-        await self.ensure_tower_table()
-        async with self.conn.execute(
-            """
-            SELECT t.user_id, p.user_name, t.highest_floor
-            FROM tower_data t
-            LEFT JOIN players p ON t.user_id = p.user_id
-            WHERE t.highest_floor > 0
-            ORDER BY t.highest_floor DESC
-            LIMIT ?
-            """,
-            (limit,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [(row[0], row[1], row[2]) for row in rows]
+    async def get_tower_floor_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List[tuple]:
+        """获取通天塔层数排行榜
+
+        Args:
+            after: keyset 游标 (层数, user_id)
+        """
+        async with self._reader() as conn:
+            _, rows = await self._fetch_keyset_page(
+                conn,
+                "SELECT t.user_id, p.user_name, t.highest_floor FROM tower_data t "
+                "LEFT JOIN players p ON t.user_id = p.user_id",
+                "t.highest_floor", "t.user_id", limit, after, "t.highest_floor > 0"
+            )
+        return [(row[0], row[1], row[2]) for row in rows]
     
-    async def get_tower_points_ranking(self, limit: int = 10) -> List[tuple]:
-        """获取通天塔积分排行榜"""
-        await self.ensure_tower_table()
-        async with self.conn.execute(
-            """
-            SELECT t.user_id, p.user_name, t.total_points
-            FROM tower_data t
-            LEFT JOIN players p ON t.user_id = p.user_id
-            WHERE t.total_points > 0
-            ORDER BY t.total_points DESC
-            LIMIT ?
-            """,
-            (limit,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [(row[0], row[1], row[2]) for row in rows]
+    async def get_tower_points_ranking(self, limit: int = 10, after: Optional[tuple] = None) -> List[tuple]:
+        """获取通天塔积分排行榜
+
+        Args:
+            after: keyset 游标 (积分, user_id)
+        """
+        async with self._reader() as conn:
+            _, rows = await self._fetch_keyset_page(
+                conn,
+                "SELECT t.user_id, p.user_name, t.total_points FROM tower_data t "
+                "LEFT JOIN players p ON t.user_id = p.user_id",
+                "t.total_points", "t.user_id", limit, after, "t.total_points > 0"
+            )
+        return [(row[0], row[1], row[2]) for row in rows]
     
     async def reset_tower_weekly(self):
         """每周重置通天塔（层数和限购）"""
-        import time
-        await self.ensure_tower_table()
         current_time = int(time.time())
-        await self.conn.execute(
+        await self._write(
             """
             UPDATE tower_data SET
                 current_floor = 0,
@@ -988,33 +1482,11 @@ class DatabaseExtended:
             """,
             (current_time,)
         )
-        await self.conn.commit()
 
     # ===== 社交系统 CRUD =====
     
-    async def ensure_social_table(self):
-        """确保社交数据表存在"""
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS social_data (
-                user_id TEXT PRIMARY KEY,
-                master_id TEXT DEFAULT NULL,
-                couple_id TEXT DEFAULT NULL,
-                couple_time INTEGER DEFAULT 0
-            )
-        """)
-        await self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS debate_cooldowns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user1_id TEXT NOT NULL,
-                user2_id TEXT NOT NULL,
-                last_time INTEGER NOT NULL
-            )
-        """)
-        await self.conn.commit()
-    
     async def get_social_data(self, user_id: str) -> Optional[dict]:
         """获取用户社交数据"""
-        await self.ensure_social_table()
         async with self.conn.execute(
             "SELECT * FROM social_data WHERE user_id = ?",
             (user_id,)
@@ -1031,29 +1503,24 @@ class DatabaseExtended:
     
     async def set_master_disciple(self, master_id: str, disciple_id: str):
         """建立师徒关系"""
-        await self.ensure_social_table()
         # 更新徒弟的师父
-        await self.conn.execute(
+        await self._write(
             """
             INSERT INTO social_data (user_id, master_id) VALUES (?, ?)
             ON CONFLICT(user_id) DO UPDATE SET master_id = ?
             """,
             (disciple_id, master_id, master_id)
         )
-        await self.conn.commit()
     
     async def remove_master_disciple(self, disciple_id: str):
         """解除师徒关系"""
-        await self.ensure_social_table()
-        await self.conn.execute(
+        await self._write(
             "UPDATE social_data SET master_id = NULL WHERE user_id = ?",
             (disciple_id,)
         )
-        await self.conn.commit()
     
     async def get_disciples(self, master_id: str) -> List[str]:
         """获取师父的所有徒弟"""
-        await self.ensure_social_table()
         async with self.conn.execute(
             "SELECT user_id FROM social_data WHERE master_id = ?",
             (master_id,)
@@ -1063,48 +1530,30 @@ class DatabaseExtended:
     
     async def set_couple(self, user1_id: str, user2_id: str):
         """建立道侣关系"""
-        import time
-        await self.ensure_social_table()
         now = int(time.time())
         
         # 双向建立关系
-        await self.conn.execute(
-            """
+        sql = """
             INSERT INTO social_data (user_id, couple_id, couple_time) VALUES (?, ?, ?)
             ON CONFLICT(user_id) DO UPDATE SET couple_id = ?, couple_time = ?
-            """,
-            (user1_id, user2_id, now, user2_id, now)
-        )
-        await self.conn.execute(
             """
-            INSERT INTO social_data (user_id, couple_id, couple_time) VALUES (?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET couple_id = ?, couple_time = ?
-            """,
-            (user2_id, user1_id, now, user1_id, now)
-        )
-        await self.conn.commit()
+        await self._write_batch([
+            (sql, (user1_id, user2_id, now, user2_id, now)),
+            (sql, (user2_id, user1_id, now, user1_id, now)),
+        ])
     
     async def remove_couple(self, user_id: str):
         """解除道侣关系"""
-        await self.ensure_social_table()
         # 获取道侣ID
         social_data = await self.get_social_data(user_id)
         if social_data and social_data.get("couple_id"):
             couple_id = social_data["couple_id"]
             # 双向解除
-            await self.conn.execute(
-                "UPDATE social_data SET couple_id = NULL, couple_time = 0 WHERE user_id = ?",
-                (user_id,)
-            )
-            await self.conn.execute(
-                "UPDATE social_data SET couple_id = NULL, couple_time = 0 WHERE user_id = ?",
-                (couple_id,)
-            )
-            await self.conn.commit()
+            sql = "UPDATE social_data SET couple_id = NULL, couple_time = 0 WHERE user_id = ?"
+            await self._write_batch([(sql, (user_id,)), (sql, (couple_id,))])
     
     async def get_debate_cooldown(self, user1_id: str, user2_id: str) -> Optional[int]:
         """获取论道冷却时间"""
-        await self.ensure_social_table()
         # 双向查询
         async with self.conn.execute(
             """
@@ -1118,21 +1567,20 @@ class DatabaseExtended:
     
     async def set_debate_cooldown(self, user1_id: str, user2_id: str):
         """设置论道冷却"""
-        import time
-        await self.ensure_social_table()
         now = int(time.time())
         
-        # 先删除旧记录
-        await self.conn.execute(
-            """
-            DELETE FROM debate_cooldowns 
-            WHERE (user1_id = ? AND user2_id = ?) OR (user1_id = ? AND user2_id = ?)
-            """,
-            (user1_id, user2_id, user2_id, user1_id)
-        )
-        # 插入新记录
-        await self.conn.execute(
-            "INSERT INTO debate_cooldowns (user1_id, user2_id, last_time) VALUES (?, ?, ?)",
-            (user1_id, user2_id, now)
-        )
-        await self.conn.commit()
+        await self._write_batch([
+            # 先删除旧记录
+            (
+                """
+                DELETE FROM debate_cooldowns 
+                WHERE (user1_id = ? AND user2_id = ?) OR (user1_id = ? AND user2_id = ?)
+                """,
+                (user1_id, user2_id, user2_id, user1_id)
+            ),
+            # 插入新记录
+            (
+                "INSERT INTO debate_cooldowns (user1_id, user2_id, last_time) VALUES (?, ?, ?)",
+                (user1_id, user2_id, now)
+            ),
+        ])
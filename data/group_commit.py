@@ -0,0 +1,201 @@
+# data/group_commit.py
+"""
+组提交调度器
+
+小写入（忙碌状态、悬赏进度、银行流水、通天塔数据、系统配置等）不再各自提交，
+而是先排队，每隔几毫秒（或积累到一定数量时）在同一个事务中执行并提交一次，
+调用方仍然会等到自己的写入真正落盘后才返回。
+
+批次在事务管理器的 exclusive() 中执行，与 db.transaction() 及其他直接写入
+互斥：批次开始时写连接上不会有别人的事务，批次内的写入也不会被别人提前提交。
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import aiosqlite
+from astrbot.api import logger
+
+from .transaction import TransactionManager
+
+Statement = Tuple[str, Sequence]
+
+
+class GroupCommitter:
+    """写连接上的组提交调度器"""
+
+    def __init__(self, conn: aiosqlite.Connection, gate: TransactionManager,
+                 window_ms: float = 5.0, max_batch: int = 64):
+        self.conn = conn
+        self.gate = gate
+        self.window = max(0.0, float(window_ms)) / 1000
+        self.max_batch = max(1, int(max_batch))
+        self._queue: List[Tuple[List[Statement], asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # 统计信息
+        self.writes = 0
+        self.commits = 0
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """排队执行一条写语句并等待提交完成
+
+        Returns:
+            受影响的行数
+        """
+        rowcounts = await self.execute_batch([(sql, params)])
+        return rowcounts[0]
+
+    async def execute_batch(self, statements: List[Statement], lastrowid: bool = False) -> List[int]:
+        """排队执行一组写语句（同一批次内连续执行）并等待提交完成
+
+        当前协程持有事务时直接执行，由该事务负责提交或回滚。
+
+        Args:
+            lastrowid: 为 True 时返回每条语句执行后的 cursor.lastrowid（用于 INSERT）
+
+        Returns:
+            每条语句受影响的行数（或 lastrowid）
+        """
+        results = await self._submit(statements)
+        index = 1 if lastrowid else 0
+        return [result[index] for result in results]
+
+    async def _submit(self, statements: List[Statement]) -> List[Tuple[int, int]]:
+        if self.gate.owned():
+            return await self._run_statements(statements)
+        if self._closed:
+            async with self.gate.exclusive():
+                try:
+                    results = await self._run_statements(statements)
+                except BaseException:
+                    await self.conn.rollback()
+                    raise
+                await self.conn.commit()
+            return results
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((statements, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._commit_loop())
+        if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+            self._wakeup.set()
+        return await future
+
+    async def flush(self):
+        """立即提交所有排队中的写入（持有事务的协程调用时不做任何事）"""
+        if self.gate.owned():
+            return
+        while self._queue:
+            await self._commit_pending()
+
+    async def close(self):
+        """停止调度器并提交剩余写入"""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run_statements(self, statements: List[Statement]) -> List[Tuple[int, int]]:
+        """依次执行语句，返回每条语句的 (受影响行数, lastrowid)"""
+        results = []
+        for sql, params in statements:
+            cursor = await self.conn.execute(sql, params)
+            results.append((cursor.rowcount, cursor.lastrowid))
+        return results
+
+    async def _run_unit(self, statements: List[Statement]):
+        """在批次事务中执行一组语句，失败时只撤销这一组
+
+        Returns:
+            (执行结果列表, None) 或 (None, 异常)
+        """
+        if len(statements) == 1:
+            # 单条语句失败时 SQLite 只回滚该语句本身
+            try:
+                return await self._run_statements(statements), None
+            except Exception as e:
+                return None, e
+        await self.conn.execute("SAVEPOINT group_commit_unit")
+        try:
+            results = await self._run_statements(statements)
+            await self.conn.execute("RELEASE SAVEPOINT group_commit_unit")
+        except Exception as e:
+            # 撤销失败也要向上抛出，由批次整体回滚
+            await self.conn.execute("ROLLBACK TO SAVEPOINT group_commit_unit")
+            await self.conn.execute("RELEASE SAVEPOINT group_commit_unit")
+            return None, e
+        return results, None
+
+    async def _commit_pending(self):
+        """等待其他事务与直接写入结束，执行并提交当前队列中的全部写入"""
+        async with self.gate.exclusive():
+            await self._commit_pending_locked()
+
+    async def _commit_pending_locked(self):
+        batch, self._queue = self._queue, []
+        if not batch:
+            return
+        results = []
+        begun = False
+        try:
+            # 持有 exclusive() 时写连接上不应有未提交的事务；BEGIN 失败说明有写入绕过了事务管理器，
+            # 整批失败，既不把别人的写入一并提交，也不回滚它
+            await self.conn.execute("BEGIN IMMEDIATE")
+            begun = True
+            for statements, future in batch:
+                results.append((future, *await self._run_unit(statements)))
+            await self.conn.commit()
+        except Exception as e:
+            if begun:
+                try:
+                    await self.conn.rollback()
+                except Exception:
+                    pass
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.writes += len(batch)
+        self.commits += 1
+        for future, unit_results, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(unit_results)
+
+    async def _commit_loop(self):
+        """后台提交循环"""
+        while True:
+            try:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if not self._queue:
+                    continue
+                # 等待一个提交窗口，让更多写入合并进同一批次（批次满时提前结束）
+                if len(self._queue) < self.max_batch and self.window > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                started = time.perf_counter()
+                size = len(self._queue)
+                # 等待其他协程的事务结束，避免把它提前提交
+                await self._commit_pending()
+                if self._queue:
+                    self._wakeup.set()
+                logger.debug(f"组提交 {size} 个写入，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"组提交失败: {e}")
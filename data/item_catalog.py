@@ -0,0 +1,226 @@
+# data/item_catalog.py
+"""
+统一物品目录
+
+物品、武器、破境丹、修为丹、功能丹、储物戒分散在六个配置文件中，
+各处查找时需要依次探测多个字典、反复拼接列表。ConfigManager 在加载配置时
+把它们合并成一个不可变的目录：名称 -> 条目，并预先建立按类型、品级、
+需求境界的二级索引，以及商店可售物品、丹药名称集合等常用视图。
+物品与武器在构建时就解析成不可变的 Item，装备计算直接按名称取用。
+
+重新加载配置时整体构建一个新目录再替换引用，正在使用旧目录的调用方
+看到的始终是一份完整、一致的数据。
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from ..models import Item
+
+# 物品来源（对应的配置文件）
+KIND_ITEM = "item"  # items.json
+KIND_WEAPON = "weapon"  # weapons.json
+KIND_PILL = "pill"  # pills.json（破境丹）
+KIND_EXP_PILL = "exp_pill"  # exp_pills.json
+KIND_UTILITY_PILL = "utility_pill"  # utility_pills.json
+KIND_STORAGE_RING = "storage_ring"  # storage_rings.json
+
+# 同名物品出现在多个文件中时的查找顺序
+PILL_KINDS = (KIND_PILL, KIND_EXP_PILL, KIND_UTILITY_PILL)
+EQUIPMENT_KINDS = (KIND_ITEM, KIND_WEAPON)
+LOOKUP_ORDER = PILL_KINDS + EQUIPMENT_KINDS + (KIND_STORAGE_RING,)
+# 商店物品的排列顺序
+SHOP_KINDS = (KIND_WEAPON, KIND_ITEM, KIND_PILL, KIND_EXP_PILL, KIND_UTILITY_PILL)
+
+# 装备属性字段
+EQUIP_STAT_FIELDS = (
+    "magic_damage", "physical_damage", "magic_defense", "physical_defense",
+    "mental_power", "exp_multiplier", "spiritual_qi", "blood_qi",
+)
+
+
+def parse_equipment_config(item_config: dict) -> Tuple[str, Dict[str, float]]:
+    """解析装备配置，兼容 items.json 中的旧格式
+
+    Returns:
+        (装备类型, 属性字典)；装备类型为 weapon/armor/accessory/technique 或原始 type
+    """
+    item_type = item_config.get("type", "")
+    stats = {name: item_config.get(name, 0.0 if name == "exp_multiplier" else 0) for name in EQUIP_STAT_FIELDS}
+
+    # 旧格式兼容：处理 items.json 中的法器（equip_effects 格式）
+    equip_effects = item_config.get("equip_effects")
+    if equip_effects:
+        # 旧格式 attack -> physical_damage
+        if "attack" in equip_effects:
+            stats["physical_damage"] = equip_effects["attack"]
+        # 旧格式 defense -> physical_defense
+        if "defense" in equip_effects:
+            stats["physical_defense"] = equip_effects["defense"]
+
+    # 旧格式兼容：处理类型映射
+    # "法器" + subtype="武器" -> "weapon"
+    # "法器" + subtype="防具" -> "armor"
+    # "法器" + subtype="饰品" -> "accessory" (暂不支持装备)
+    if item_type == "法器":
+        subtype = item_config.get("subtype", "")
+        if subtype == "武器":
+            item_type = "weapon"
+        elif subtype == "防具":
+            item_type = "armor"
+        elif subtype == "饰品":
+            item_type = "accessory"
+    elif item_type == "功法":
+        # 旧格式功法 -> technique
+        item_type = "technique"
+
+    return item_type, stats
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """物品目录条目"""
+    name: str
+    kind: str  # 来源，见 KIND_*
+    item_type: str  # 配置中的 type 字段（修为丹/功能丹没有该字段时为来源名）
+    item_id: str
+    rank: str
+    price: float
+    shop_weight: float  # 商店权重可以是小数（如 0.1）
+    required_level_index: int
+    equip_type: str  # 兼容旧格式后的装备类型
+    stats: Mapping[str, float]  # 装备属性（只读）
+    data: dict = field(compare=False, repr=False)  # 原始配置，只读使用
+    item: Optional[Item] = field(default=None, compare=False, repr=False)  # 物品/武器解析出的装备对象
+
+    @property
+    def is_pill(self) -> bool:
+        return self.kind in PILL_KINDS or (self.kind == KIND_ITEM and self.item_type == "丹药")
+
+    @property
+    def for_sale(self) -> bool:
+        """是否可以出现在商店中"""
+        return self.kind in SHOP_KINDS and self.price > 0 and self.shop_weight > 0
+
+    @classmethod
+    def from_config(cls, name: str, kind: str, item_config: dict) -> "CatalogEntry":
+        equip_type, stats = parse_equipment_config(item_config)
+        item = None
+        if kind in EQUIPMENT_KINDS:
+            item = Item(
+                item_id=item_config.get("id", name),
+                name=name,
+                item_type=equip_type,
+                description=item_config.get("description", ""),
+                rank=item_config.get("rank", ""),
+                required_level_index=item_config.get("required_level_index", 0),
+                weapon_category=item_config.get("weapon_category", ""),
+                **stats
+            )
+        return cls(
+            name=name,
+            kind=kind,
+            item_type=item_config.get("type") or kind,
+            item_id=str(item_config.get("id", name)),
+            rank=item_config.get("rank", ""),
+            price=item_config.get("price", 0) or 0,
+            shop_weight=item_config.get("shop_weight", 0) or 0,
+            required_level_index=int(item_config.get("required_level_index", 0) or 0),
+            equip_type=equip_type,
+            stats=MappingProxyType(stats),
+            data=item_config,
+            item=item,
+        )
+
+
+def _group(entries: Iterable[CatalogEntry], key) -> Mapping[object, Tuple[CatalogEntry, ...]]:
+    groups: Dict[object, list] = {}
+    for entry in entries:
+        groups.setdefault(key(entry), []).append(entry)
+    return MappingProxyType({k: tuple(v) for k, v in groups.items()})
+
+
+class ItemCatalog:
+    """不可变的物品目录（构建后不再修改，重载配置时整体替换）"""
+
+    __slots__ = ("_by_name", "_by_name_in", "equipment", "items", "by_kind", "by_type", "by_rank", "by_level",
+                 "_level_keys", "_level_entries", "pill_names", "shop_entries")
+
+    def __init__(self, sources: Mapping[str, Mapping[str, dict]]):
+        """
+        Args:
+            sources: 来源 -> {物品名称: 配置}（即 ConfigManager 中的 *_data 字典）
+        """
+        by_kind = {
+            kind: tuple(
+                CatalogEntry.from_config(name, kind, item_config)
+                for name, item_config in sources.get(kind, {}).items()
+            )
+            for kind in LOOKUP_ORDER
+        }
+        entries = [entry for kind in LOOKUP_ORDER for entry in by_kind[kind]]
+
+        # 名称 -> 同名条目（按 LOOKUP_ORDER 排列）
+        by_name: Dict[str, list] = {}
+        for entry in entries:
+            by_name.setdefault(entry.name, []).append(entry)
+        self._by_name = MappingProxyType({name: tuple(group) for name, group in by_name.items()})
+        # 常用来源组合（丹药、装备）预先解析同名优先级，查找只需一次字典访问
+        self._by_name_in = {
+            # 倒序写入，排在前面的来源覆盖后面的同名条目
+            kinds: {entry.name: entry for kind in reversed(kinds) for entry in by_kind[kind]}
+            for kinds in (PILL_KINDS, EQUIPMENT_KINDS)
+        }
+        # 名称 -> 装备对象（物品优先于武器），装备计算只需一次字典访问
+        self.equipment = MappingProxyType(
+            {name: entry.item for name, entry in self._by_name_in[EQUIPMENT_KINDS].items()}
+        )
+        self.items = MappingProxyType({entry.name: entry.item for entry in by_kind[KIND_ITEM]})
+
+        self.by_kind = MappingProxyType(by_kind)
+        self.by_type = _group(entries, lambda e: e.item_type)
+        self.by_rank = _group(entries, lambda e: e.rank)
+        self.by_level = _group(entries, lambda e: e.required_level_index)
+
+        # 按需求境界排序，用于“某境界可用的全部物品”
+        ordered = sorted(entries, key=lambda e: e.required_level_index)
+        self._level_keys = tuple(e.required_level_index for e in ordered)
+        self._level_entries = tuple(ordered)
+
+        self.pill_names = frozenset(entry.name for entry in entries if entry.is_pill)
+        self.shop_entries = tuple(
+            entry for kind in SHOP_KINDS for entry in by_kind[kind] if entry.for_sale
+        )
+
+    def get(self, name: str, kinds: Optional[Tuple[str, ...]] = None) -> Optional[CatalogEntry]:
+        """按名称查找条目
+
+        Args:
+            kinds: 只在这些来源中查找，按给定顺序优先；None 表示按 LOOKUP_ORDER 查找所有来源
+        """
+        if kinds is not None:
+            view = self._by_name_in.get(kinds)
+            if view is not None:
+                return view.get(name)
+        group = self._by_name.get(name)
+        if not group:
+            return None
+        if kinds is None:
+            return group[0]
+        for kind in kinds:
+            for entry in group:
+                if entry.kind == kind:
+                    return entry
+        return None
+
+    def up_to_level(self, level_index: int) -> Tuple[CatalogEntry, ...]:
+        """需求境界不高于 level_index 的全部条目（按需求境界升序）"""
+        return self._level_entries[:bisect_right(self._level_keys, level_index)]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self._by_name)
@@ -0,0 +1,115 @@
+# data/level_table.py
+"""
+境界表
+
+level_config.json / body_level_config.json 是字典列表，调用方原本每次都要
+检查下标、按键取值、补默认值。ConfigManager 在加载配置时为每种修炼类型
+构建一张只读的境界表：名称、所需修为、突破成功率、基础属性都按境界下标
+存放在元组中，按下标取值为 O(1)，越界时统一返回默认值；按修为反查境界用 bisect，为 O(log n)。
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+
+DEFAULT_SUCCESS_RATE = 0.5
+
+
+def default_base_stats(level_index: int) -> Dict[str, int]:
+    """境界配置未提供基础属性时的默认值（随境界线性增长）"""
+    return {
+        "lifespan": 100 + level_index * 50,
+        "max_spiritual_qi": 50 + level_index * 20,
+        "max_blood_qi": 50 + level_index * 20,
+        "mental_power": 50 + level_index * 20,
+        "physical_damage": 10 + level_index * 8,
+        "magic_damage": 10 + level_index * 8,
+        "physical_defense": 5 + level_index * 4,
+        "magic_defense": 5 + level_index * 4,
+    }
+
+
+# 基础属性 -> 境界配置中的字段名
+BASE_STAT_FIELDS = {
+    "lifespan": "base_lifespan",
+    "max_spiritual_qi": "base_max_spiritual_qi",
+    "max_blood_qi": "base_max_blood_qi",
+    "mental_power": "base_mental_power",
+    "physical_damage": "base_physical_damage",
+    "magic_damage": "base_magic_damage",
+    "physical_defense": "base_physical_defense",
+    "magic_defense": "base_magic_defense",
+}
+
+
+@dataclass(frozen=True)
+class LevelTable:
+    """单一修炼类型的境界表（只读）"""
+    cultivation_type: str
+    names: Tuple[str, ...]  # 境界名称
+    exp_needed: Tuple[int, ...]  # 到达该境界所需的总修为
+    success_rates: Tuple[float, ...]  # 突破到该境界的基础成功率
+    base_stats: Tuple[Mapping[str, int], ...]  # 该境界的基础属性
+    entries: Tuple[dict, ...]  # 原始配置（突破属性增益等），只读使用
+    _exp_floor: Tuple[int, ...]  # exp_needed 的前缀最大值，保证有序以便 bisect
+
+    @classmethod
+    def from_config(cls, cultivation_type: str, level_data: List[dict]) -> "LevelTable":
+        exp_needed = tuple(int(level.get("exp_needed", 0) or 0) for level in level_data)
+        base_stats = []
+        for index, level in enumerate(level_data):
+            stats = default_base_stats(index)
+            for stat, key in BASE_STAT_FIELDS.items():
+                if key in level:
+                    stats[stat] = level[key]
+            base_stats.append(MappingProxyType(stats))
+        return cls(
+            cultivation_type=cultivation_type,
+            names=tuple(level.get("level_name", "") for level in level_data),
+            exp_needed=exp_needed,
+            success_rates=tuple(level.get("success_rate", DEFAULT_SUCCESS_RATE) for level in level_data),
+            base_stats=tuple(base_stats),
+            entries=tuple(level_data),
+            _exp_floor=tuple(accumulate(exp_needed, max)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def max_index(self) -> int:
+        """最高境界下标（无境界数据时为 -1）"""
+        return len(self.names) - 1
+
+    def has_level(self, level_index: int) -> bool:
+        return 0 <= level_index < len(self.names)
+
+    def name(self, level_index: int, default: str = "未知境界") -> str:
+        """境界名称，下标越界时返回 default"""
+        if 0 <= level_index < len(self.names):
+            return self.names[level_index]
+        return default
+
+    def required_exp(self, level_index: int) -> int:
+        """从 level_index 突破到下一境界所需的总修为，已是最高境界时为 0"""
+        if 0 <= level_index + 1 < len(self.exp_needed):
+            return self.exp_needed[level_index + 1]
+        return 0
+
+    def success_rate(self, level_index: int) -> float:
+        """突破到 level_index 的基础成功率"""
+        if 0 <= level_index < len(self.success_rates):
+            return self.success_rates[level_index]
+        return DEFAULT_SUCCESS_RATE
+
+    def get_base_stats(self, level_index: int) -> Dict[str, int]:
+        """境界基础属性（返回副本，越界时使用默认公式）"""
+        if 0 <= level_index < len(self.base_stats):
+            return dict(self.base_stats[level_index])
+        return default_base_stats(level_index)
+
+    def level_for_exp(self, experience: int) -> int:
+        """总修为足以达到的最高境界下标（无境界数据时为 -1）"""
+        return max(bisect_right(self._exp_floor, experience) - 1, 0) if self._exp_floor else -1
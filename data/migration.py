@@ -1,11 +1,14 @@
 # data/migration.py
 
+import json
 import aiosqlite
 from typing import Dict, Callable, Awaitable
 from astrbot.api import logger
 from ..config_manager import ConfigManager
+from .data_manager import shop_item_to_row
+from .schema import apply_schema_registry
 
-LATEST_DB_VERSION = 24  # v24: 修复灵田表缺少crops列
+LATEST_DB_VERSION = 33  # v33: 战斗回放表
 
 MIGRATION_TASKS: Dict[int, Callable[[aiosqlite.Connection, ConfigManager], Awaitable[None]]] = {}
 
@@ -34,6 +37,7 @@ class MigrationManager:
                 await self.conn.execute("INSERT INTO db_info (version) VALUES (?)", (LATEST_DB_VERSION,))
                 await self.conn.commit()
                 logger.info(f"数据库已初始化到最新版本: v{LATEST_DB_VERSION}")
+                await self._apply_schema_registry()
                 return
 
         async with self.conn.execute("SELECT version FROM db_info") as cursor:
@@ -60,6 +64,17 @@ class MigrationManager:
             logger.info(f"数据库已升级到最新版本: v{LATEST_DB_VERSION}")
         else:
             logger.info("数据库已是最新版本，无需升级。")
+        await self._apply_schema_registry()
+
+    async def _apply_schema_registry(self):
+        """创建各子系统注册的运行时表（每次启动执行一次）"""
+        await self.conn.execute("BEGIN")
+        try:
+            await apply_schema_registry(self.conn)
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
 
 async def _create_all_tables_v1(conn: aiosqlite.Connection):
     """创建所有表 - v1，只保留玩家基础信息"""
@@ -355,12 +370,16 @@ async def _create_all_tables_v2(conn: aiosqlite.Connection):
             storage_ring_items TEXT NOT NULL DEFAULT '{}',
             
             daily_pill_usage TEXT NOT NULL DEFAULT '{}',
-            last_daily_reset TEXT NOT NULL DEFAULT ''
+            last_daily_reset TEXT NOT NULL DEFAULT '',
+
+            combat_power INTEGER NOT NULL DEFAULT 0
         )
     """)
 
     # 创建索引
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_player_level ON players(level_index)")
+    await _create_ranking_indexes(conn)
+    await _create_power_ranking_index(conn)
 
     # 创建商店表
     await conn.execute("""
@@ -375,6 +394,7 @@ async def _create_all_tables_v2(conn: aiosqlite.Connection):
         INSERT OR IGNORE INTO shop (shop_id, last_refresh_time, current_items)
         VALUES ('global', 0, '[]')
     """)
+    await _create_shop_items_table(conn)
     
     # 创建宗门表
     await conn.execute("""
@@ -388,11 +408,13 @@ async def _create_all_tables_v2(conn: aiosqlite.Connection):
             sect_materials INTEGER NOT NULL DEFAULT 0,
             mainbuff TEXT NOT NULL DEFAULT '0',
             secbuff TEXT NOT NULL DEFAULT '0',
-            elixir_room_level INTEGER NOT NULL DEFAULT 0
+            elixir_room_level INTEGER NOT NULL DEFAULT 0,
+            member_count INTEGER NOT NULL DEFAULT 0
         )
     """)
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_sect_owner ON sects(sect_owner)")
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_sect_scale ON sects(sect_scale DESC)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_sect ON players(sect_id)")
     
     # 创建Buff信息表
     await conn.execute("""
@@ -519,10 +541,122 @@ async def _create_all_tables_v2(conn: aiosqlite.Connection):
     """)
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_bank_trans_user ON bank_transactions(user_id)")
     await conn.execute("CREATE INDEX IF NOT EXISTS idx_bank_trans_time ON bank_transactions(created_at)")
+    await _create_board_ranking_indexes(conn)
+    await _create_bank_transaction_page_index(conn)
+    await _create_boss_damage_table(conn)
+    await _create_combat_replay_table(conn)
+
+    # 储物戒物品表与丹药背包表
+    await _create_inventory_tables(conn)
 
     logger.info("数据库表已创建完成（v2 - 完整修仙系统）")
 
 
+async def _create_ranking_indexes(conn: aiosqlite.Connection):
+    """创建排行榜使用的覆盖索引（排行查询只需按索引顺序读取前几条，不回表）"""
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_rank_exp "
+        "ON players(experience DESC, user_id, user_name, level_index, cultivation_type)"
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_rank_gold ON players(gold DESC, user_id, user_name)"
+    )
+
+
+async def _create_power_ranking_index(conn: aiosqlite.Connection):
+    """创建战力排行索引（combat_power 列自v28起存在）"""
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_rank_power ON players(combat_power DESC, user_id)"
+    )
+
+
+async def _create_board_ranking_indexes(conn: aiosqlite.Connection):
+    """创建存款榜、传承榜的排名索引（个人排名按索引计数，与排行榜同序：分数降序、user_id 升序）"""
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bank_rank_balance ON bank_accounts(balance DESC, user_id)"
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_impart_rank_atk ON impart_info(impart_atk_per DESC, user_id)"
+    )
+
+
+async def _create_bank_transaction_page_index(conn: aiosqlite.Connection):
+    """创建银行流水的分页索引（按用户从新到旧翻页，keyset 游标为 (created_at, id)）"""
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bank_trans_user_time ON bank_transactions(user_id, created_at DESC, id DESC)"
+    )
+
+
+async def _create_boss_damage_table(conn: aiosqlite.Connection):
+    """创建世界Boss伤害贡献表（每个Boss每个玩家一行，累计有效伤害与挑战次数）"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS boss_damage (
+            boss_id INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            damage INTEGER NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (boss_id, user_id)
+        )
+    """)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_boss_damage_rank ON boss_damage(boss_id, damage DESC)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_boss_damage_user ON boss_damage(user_id)")
+
+
+async def _create_combat_replay_table(conn: aiosqlite.Connection):
+    """创建战斗回放表（只保存随机种子与双方开战属性，日志在查看时重新生成）"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS combat_replays (
+            replay_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            seed INTEGER NOT NULL,
+            combat_type INTEGER NOT NULL DEFAULT 1,
+            first_stats TEXT NOT NULL,
+            second_stats TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+
+
+async def _create_shop_items_table(conn: aiosqlite.Connection):
+    """创建商店物品表（每个商店的每种物品一行，库存可按行原子扣减）"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS shop_items (
+            shop_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            item_type TEXT NOT NULL DEFAULT '',
+            item_rank TEXT NOT NULL DEFAULT '',
+            price INTEGER NOT NULL DEFAULT 0,
+            original_price INTEGER NOT NULL DEFAULT 0,
+            discount REAL NOT NULL DEFAULT 1.0,
+            stock INTEGER,
+            extra TEXT NOT NULL DEFAULT '{}',
+            PRIMARY KEY (shop_id, item_name)
+        )
+    """)
+
+
+async def _create_inventory_tables(conn: aiosqlite.Connection):
+    """创建储物戒物品表与丹药背包表（每种物品一行）"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_items (
+            user_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            bound INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, item_name)
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_pills (
+            user_id TEXT NOT NULL,
+            pill_name TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, pill_name)
+        )
+    """)
+
+
 @migration(12)
 async def _migrate_to_v12(conn: aiosqlite.Connection, config_manager: ConfigManager):
     """迁移到v12 - 添加完整修仙系统（宗门、Boss、秘境、战斗系统等）"""
@@ -1164,3 +1298,155 @@ async def _migrate_to_v24(conn: aiosqlite.Connection, config_manager: ConfigMana
         logger.info(f"v24迁移完成：为灵田表添加了列 {', '.join(added)}")
     else:
         logger.info("v24迁移完成：灵田表结构正常")
+
+
+@migration(25)
+async def _migrate_to_v25(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v25 - 储物戒物品与丹药背包从玩家表的JSON字段拆分为独立表"""
+    logger.info("开始迁移到v25：拆分储物戒物品与丹药背包")
+
+    await _create_inventory_tables(conn)
+
+    item_rows = []
+    pill_rows = []
+    async with conn.execute(
+        "SELECT user_id, storage_ring_items, pills_inventory FROM players"
+    ) as cursor:
+        async for user_id, items_json, pills_json in cursor:
+            try:
+                items = json.loads(items_json or "{}")
+            except (json.JSONDecodeError, TypeError):
+                logger.warning(f"玩家 {user_id} 的储物戒数据无法解析，已跳过")
+                items = {}
+            for item_name, value in items.items():
+                # 兼容 {物品名: 数量} 与 {物品名: {count, bound}} 两种格式
+                if isinstance(value, dict):
+                    count = int(value.get("count", 0))
+                    bound = 1 if value.get("bound") else 0
+                else:
+                    count, bound = int(value), 0
+                if count > 0:
+                    item_rows.append((user_id, item_name, count, bound))
+
+            try:
+                pills = json.loads(pills_json or "{}")
+            except (json.JSONDecodeError, TypeError):
+                logger.warning(f"玩家 {user_id} 的丹药背包数据无法解析，已跳过")
+                pills = {}
+            for pill_name, count in pills.items():
+                if int(count) > 0:
+                    pill_rows.append((user_id, pill_name, int(count)))
+
+    await conn.executemany(
+        """
+        INSERT INTO player_items (user_id, item_name, count, bound) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, item_name) DO UPDATE SET count = count + excluded.count
+        """,
+        item_rows
+    )
+    await conn.executemany(
+        """
+        INSERT INTO player_pills (user_id, pill_name, count) VALUES (?, ?, ?)
+        ON CONFLICT(user_id, pill_name) DO UPDATE SET count = count + excluded.count
+        """,
+        pill_rows
+    )
+    # 旧字段不再使用，清空以免与新表数据不一致
+    await conn.execute("UPDATE players SET storage_ring_items = '{}', pills_inventory = '{}'")
+
+    logger.info(f"v25迁移完成：迁移储物戒物品 {len(item_rows)} 条，丹药 {len(pill_rows)} 条")
+
+
+@migration(26)
+async def _migrate_to_v26(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v26 - 商店物品从 shop.current_items 的JSON字段拆分为 shop_items 表"""
+    logger.info("开始迁移到v26：拆分商店物品")
+    await _create_shop_items_table(conn)
+
+    rows = []
+    async with conn.execute("SELECT shop_id, current_items FROM shop") as cursor:
+        async for shop_id, items_json in cursor:
+            try:
+                items = json.loads(items_json or "[]")
+            except (json.JSONDecodeError, TypeError):
+                logger.warning(f"商店 {shop_id} 的物品数据无法解析，已跳过")
+                items = []
+            for position, item in enumerate(items):
+                if isinstance(item, dict) and item.get("name"):
+                    rows.append(shop_item_to_row(shop_id, position, item))
+
+    # 同名物品只保留第一个（与原先按名称查找第一个匹配项一致）
+    await conn.executemany(
+        """
+        INSERT OR IGNORE INTO shop_items (
+            shop_id, item_name, position, item_type, item_rank, price,
+            original_price, discount, stock, extra
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows
+    )
+    await conn.execute("UPDATE shop SET current_items = '[]'")
+
+    logger.info(f"v26迁移完成：迁移商店物品 {len(rows)} 条")
+
+
+@migration(27)
+async def _migrate_to_v27(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v27 - 境界/财富排行榜覆盖索引"""
+    logger.info("开始迁移到v27：创建排行榜索引")
+    await _create_ranking_indexes(conn)
+    logger.info("v27迁移完成：排行榜索引")
+
+
+@migration(28)
+async def _migrate_to_v28(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v28 - 存储玩家战力，战力排行改为索引查询"""
+    logger.info("开始迁移到v28：添加战力列")
+    await conn.execute("ALTER TABLE players ADD COLUMN combat_power INTEGER NOT NULL DEFAULT 0")
+    await _create_power_ranking_index(conn)
+    # 战力的计算依赖装备配置，由插件启动时的战力一致性检查统一填充
+    logger.info("v28迁移完成：战力列与战力排行索引")
+
+
+@migration(29)
+async def _migrate_to_v29(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v29 - 个人排名查询使用的存款/传承榜索引"""
+    logger.info("开始迁移到v29：创建排名索引")
+    await _create_board_ranking_indexes(conn)
+    logger.info("v29迁移完成：排名索引")
+
+
+@migration(30)
+async def _migrate_to_v30(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v30 - 宗门表记录成员数，宗门排行不再逐个统计成员"""
+    logger.info("开始迁移到v30：添加宗门成员数")
+    await conn.execute("ALTER TABLE sects ADD COLUMN member_count INTEGER NOT NULL DEFAULT 0")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_sect ON players(sect_id)")
+    await conn.execute(
+        "UPDATE sects SET member_count = (SELECT COUNT(*) FROM players WHERE players.sect_id = sects.sect_id)"
+    )
+    logger.info("v30迁移完成：宗门成员数")
+
+
+@migration(31)
+async def _migrate_to_v31(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v31 - 银行流水按 keyset 游标翻页的索引"""
+    logger.info("开始迁移到v31：创建银行流水分页索引")
+    await _create_bank_transaction_page_index(conn)
+    logger.info("v31迁移完成：银行流水分页索引")
+
+
+@migration(32)
+async def _migrate_to_v32(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v32 - 世界Boss伤害贡献表，Boss扣血改为原子更新"""
+    logger.info("开始迁移到v32：创建世界Boss伤害贡献表")
+    await _create_boss_damage_table(conn)
+    logger.info("v32迁移完成：世界Boss伤害贡献表")
+
+
+@migration(33)
+async def _migrate_to_v33(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """迁移到v33 - 战斗回放表（随机种子 + 开战属性）"""
+    logger.info("开始迁移到v33：创建战斗回放表")
+    await _create_combat_replay_table(conn)
+    logger.info("v33迁移完成：战斗回放表")
@@ -0,0 +1,180 @@
+# data/result_cache.py
+"""
+只读列表指令的结果缓存
+
+排行榜、宗门列表、秘境列表、世界Boss等指令的读取频率远高于数据变化频率
+（广播后群友会连续刷屏查询），因此把格式化好的结果按榜单缓存一段时间：
+
+- 每个榜单有自己的过期时间（TTL）；
+- 写入宗门、Boss、秘境、银行、通天塔、传承、道号等数据后按标签立即失效，
+  修为、灵石等高频变化的数据只依赖 TTL；
+- 同一结果并发未命中时只计算一次，其余请求等待同一个结果；
+- 记录各榜单的命中/未命中次数。
+"""
+
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from .transaction import TransactionManager
+
+# 各榜单默认过期时间（秒）
+# 排行类结果还依赖修为、灵石等不触发失效的数据，过期时间较短；
+# 宗门/秘境/Boss 的所有写入都会触发失效，过期时间只作为兜底
+DEFAULT_TTLS: Dict[str, float] = {
+    "level": 30,
+    "power": 30,
+    "wealth": 30,
+    "deposit": 30,
+    "impart": 30,
+    "tower": 30,
+    "sect": 300,
+    "rift": 600,
+    "boss": 300,
+}
+
+# 依赖修为、灵石等高频数据、只靠过期时间刷新的榜单（RESULT_CACHE_RANKING_TTL 统一调整）
+RANKING_BOARDS = ("level", "power", "wealth", "deposit", "impart", "tower")
+
+
+class ResultCache:
+    """按榜单分组、带标签失效的结果缓存"""
+
+    def __init__(self, enabled: bool = True, ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 256, gate: Optional[TransactionManager] = None):
+        self.enabled = enabled
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.max_entries = max(1, int(max_entries))
+        self.gate = gate  # 写连接的事务管理器，事务中的读取结果不缓存
+        # (榜单, 参数) -> (过期时间, 依赖标签的版本号, 结果)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}  # 标签 -> 版本号，失效时递增
+        self._epoch = 0  # 整体版本号，clear() 时递增
+        # 统计信息：榜单 -> [命中, 未命中]
+        self._stats: Dict[str, list] = {}
+
+    async def get_or_compute(self, board: str, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                             depends: Iterable[str] = ()) -> Any:
+        """获取缓存的结果，未命中或已失效时调用 compute 计算并缓存
+
+        Args:
+            board: 榜单名称，同时也是失效标签
+            key: 区分同一榜单不同结果的参数（如显示数量）
+            compute: 计算结果的协程函数
+            depends: 额外依赖的失效标签（如 "name" 表示结果中含玩家道号）
+        """
+        if not self.enabled:
+            return await compute()
+        tags = (board,) + tuple(depends)
+        cache_key = (board, key)
+        stats = self._stats.setdefault(board, [0, 0])
+
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            expires, generations, value = entry
+            if expires > time.monotonic() and generations == self._snapshot(tags):
+                stats[0] += 1
+                self._entries.move_to_end(cache_key)
+                return value
+            del self._entries[cache_key]
+
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            # 已有协程在计算同一结果，直接等待
+            stats[0] += 1
+            return await asyncio.shield(pending)
+
+        stats[1] += 1
+        in_transaction = self.gate is not None and self.gate.owned()
+        if in_transaction:
+            # 事务中可能读到尚未提交的数据，不缓存也不与其他协程共享
+            return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        generations = self._snapshot(tags)
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有其他协程等待时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # 计算期间发生过失效时结果可能已过时，只返回不缓存
+            if generations == self._snapshot(tags):
+                self._entries[cache_key] = (time.monotonic() + self.ttls.get(board, 30), generations, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    def invalidate(self, *tags: str):
+        """使依赖指定标签的结果失效
+
+        在事务中调用时，事务结束后会再失效一次，
+        避免其他协程在提交前读到旧数据并写回缓存。
+        """
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        if self.gate is not None and self.gate.owned():
+            self.gate.on_finish(lambda: self.invalidate(*tags))
+
+    def clear(self):
+        """使所有结果失效（统计保留），在事务中调用时事务结束后再清空一次"""
+        self._epoch += 1
+        self._entries.clear()
+        if self.gate is not None and self.gate.owned():
+            self.gate.on_finish(self.clear)
+
+    def _snapshot(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def get_stats(self) -> dict:
+        """获取命中统计（总命中/未命中、命中率、各榜单明细、当前条目数）"""
+        hits = sum(s[0] for s in self._stats.values())
+        misses = sum(s[1] for s in self._stats.values())
+        total = hits + misses
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "boards": {board: {"hits": s[0], "misses": s[1]} for board, s in self._stats.items()},
+        }
+
+
+def cached_result(board: str, depends: Iterable[str] = ()):
+    """管理器方法的结果缓存装饰器（实例需要有 db 属性）
+
+    以方法参数作为缓存键，结果在调用方之间共享，调用方不应修改返回值。
+
+    Example:
+        @cached_result("level", depends=("name",))
+        async def get_level_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+            ...
+    """
+    depends = tuple(depends)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache = getattr(self.db, "result_cache", None)
+            if cache is None:
+                return await func(self, *args, **kwargs)
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_compute(
+                board, key, lambda: func(self, *args, **kwargs), depends
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,82 @@
+# data/row_mapper.py
+"""
+查询结果到 Player 的预编译映射
+
+按查询返回的列顺序预先算好每个 Player 字段在行中的位置（每种列组合只算一次），
+之后直接按位置取值构造 Player，不再逐行 dict(row) 并按字段名过滤。
+"""
+
+from dataclasses import fields
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..models import Player
+
+# Player 字段名（按定义顺序，即构造函数的位置参数顺序）
+PLAYER_FIELD_NAMES: Tuple[str, ...] = tuple(f.name for f in fields(Player))
+
+
+class _Plan:
+    """一种列组合对应的映射方案"""
+
+    __slots__ = ("names", "getter", "complete")
+
+    def __init__(self, columns: Tuple[str, ...]):
+        positions = {}
+        for index, column in enumerate(columns):
+            positions.setdefault(column, index)
+        # 只取 Player 中存在的字段（兼容旧数据库/迁移未完成时的多余或缺失列）
+        self.names = tuple(name for name in PLAYER_FIELD_NAMES if name in positions)
+        indexes = [positions[name] for name in self.names]
+        if len(indexes) == 1:
+            index = indexes[0]
+            self.getter = lambda row: (row[index],)
+        else:
+            self.getter = itemgetter(*indexes)
+        # 列齐全时可以按位置参数直接构造
+        self.complete = self.names == PLAYER_FIELD_NAMES
+
+
+class PlayerRowMapper:
+    """players 表查询结果的映射器（每个数据库连接持有一个）"""
+
+    def __init__(self):
+        self._plans: Dict[Tuple[str, ...], _Plan] = {}
+
+    def _plan(self, description: Sequence[Sequence]) -> _Plan:
+        columns = tuple(column[0] for column in description)
+        plan = self._plans.get(columns)
+        if plan is None:
+            plan = _Plan(columns)
+            self._plans[columns] = plan
+        return plan
+
+    def map_row(self, description: Sequence[Sequence], row) -> Optional[Player]:
+        """把单行转换为 Player（已记录修改基线）"""
+        if row is None:
+            return None
+        return self.map_rows(description, (row,))[0]
+
+    def map_rows(self, description: Sequence[Sequence], rows: Iterable) -> List[Player]:
+        """把多行转换为 Player 列表（已记录修改基线）
+
+        Args:
+            description: 游标的 description（列名信息）
+            rows: 查询返回的行（sqlite3.Row 或元组）
+        """
+        plan = self._plan(description)
+        names, getter = plan.names, plan.getter
+        players = []
+        if plan.complete:
+            for row in rows:
+                values = getter(row)
+                player = Player(*values)
+                # 等价于 mark_clean()，直接复用已取出的值
+                player._snapshot = dict(zip(names, values))
+                players.append(player)
+        else:
+            for row in rows:
+                player = Player(**dict(zip(names, getter(row))))
+                player.mark_clean()
+                players.append(player)
+        return players
@@ -0,0 +1,154 @@
+# data/schema.py
+"""
+运行时表结构注册表
+
+不经过版本迁移、由各子系统自行维护的表（通天塔、社交、悬赏、系统配置、黑市等）
+在这里声明建表与索引语句，由 MigrationManager.migrate() 在插件初始化时统一执行一次，
+业务代码中不再出现 CREATE TABLE / CREATE INDEX。依赖这些表的模块可以用
+require_schema() 确认表已创建，迁移未执行时得到明确的 SchemaNotReadyError，
+而不是查询时才出现的 "no such table"。
+"""
+
+import re
+from typing import Dict, Tuple
+
+import aiosqlite
+from astrbot.api import logger
+
+# 子系统名称 -> 建表/建索引语句（均为 IF NOT EXISTS，可重复执行）
+SCHEMA_REGISTRY: Dict[str, Tuple[str, ...]] = {}
+
+_CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE)
+
+
+class SchemaNotReadyError(RuntimeError):
+    """子系统依赖的运行时表不存在（插件初始化时 MigrationManager.migrate() 未执行或执行失败）"""
+
+
+def register_schema(subsystem: str, *statements: str):
+    """声明某个子系统需要的表与索引"""
+    SCHEMA_REGISTRY[subsystem] = SCHEMA_REGISTRY.get(subsystem, ()) + tuple(statements)
+
+
+async def apply_schema_registry(conn: aiosqlite.Connection):
+    """执行所有已注册的建表语句（由调用方负责提交）"""
+    for subsystem, statements in SCHEMA_REGISTRY.items():
+        for statement in statements:
+            await conn.execute(statement)
+    logger.info(f"已检查运行时表结构：{', '.join(SCHEMA_REGISTRY)}")
+
+
+def schema_tables(subsystem: str) -> Tuple[str, ...]:
+    """某个子系统注册的表名"""
+    return tuple(
+        match.group(1)
+        for statement in SCHEMA_REGISTRY.get(subsystem, ())
+        for match in [_CREATE_TABLE.search(statement)]
+        if match
+    )
+
+
+async def require_schema(conn: aiosqlite.Connection, subsystem: str):
+    """确认子系统注册的表都已创建
+
+    Raises:
+        SchemaNotReadyError: 有表不存在（迁移未执行）
+    """
+    tables = schema_tables(subsystem)
+    if not tables:
+        return
+    async with conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(tables))})",
+        tables
+    ) as cursor:
+        existing = {row[0] for row in await cursor.fetchall()}
+    missing = [table for table in tables if table not in existing]
+    if missing:
+        raise SchemaNotReadyError(
+            f"{subsystem}所需的表 {', '.join(missing)} 不存在，"
+            f"请确认插件初始化时 MigrationManager.migrate() 已成功执行"
+        )
+
+
+register_schema(
+    "悬赏令",
+    """
+    CREATE TABLE IF NOT EXISTS bounty_tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        bounty_id INTEGER NOT NULL,
+        bounty_name TEXT NOT NULL,
+        target_type TEXT NOT NULL,
+        target_count INTEGER NOT NULL,
+        current_progress INTEGER NOT NULL DEFAULT 0,
+        rewards TEXT NOT NULL DEFAULT '{}',
+        start_time INTEGER NOT NULL,
+        expire_time INTEGER NOT NULL,
+        status INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_bounty_user ON bounty_tasks(user_id)",
+)
+
+register_schema(
+    "系统配置",
+    """
+    CREATE TABLE IF NOT EXISTS system_config (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at INTEGER DEFAULT 0
+    )
+    """,
+)
+
+register_schema(
+    "通天塔",
+    """
+    CREATE TABLE IF NOT EXISTS tower_data (
+        user_id TEXT PRIMARY KEY,
+        current_floor INTEGER DEFAULT 0,
+        highest_floor INTEGER DEFAULT 0,
+        points INTEGER DEFAULT 0,
+        total_points INTEGER DEFAULT 0,
+        weekly_purchases TEXT DEFAULT '{}',
+        extra_data TEXT DEFAULT '{}',
+        last_reset INTEGER DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tower_rank_floor ON tower_data(highest_floor DESC, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tower_rank_points ON tower_data(total_points DESC, user_id)",
+)
+
+register_schema(
+    "社交",
+    """
+    CREATE TABLE IF NOT EXISTS social_data (
+        user_id TEXT PRIMARY KEY,
+        master_id TEXT DEFAULT NULL,
+        couple_id TEXT DEFAULT NULL,
+        couple_time INTEGER DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS debate_cooldowns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user1_id TEXT NOT NULL,
+        user2_id TEXT NOT NULL,
+        last_time INTEGER NOT NULL
+    )
+    """,
+)
+
+register_schema(
+    "黑市",
+    """
+    CREATE TABLE IF NOT EXISTS black_market_purchases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        pill_name TEXT NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 1,
+        purchase_time INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_black_market_user_time ON black_market_purchases(user_id, purchase_time)",
+)
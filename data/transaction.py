@@ -0,0 +1,204 @@
+# data/transaction.py
+"""
+写连接上的事务管理（Unit of Work）
+
+    async with db.transaction() as tx:
+        ...
+        if 条件不满足:
+            await tx.rollback()
+            return False, "..."
+
+- 同一协程内嵌套调用时自动转为 SAVEPOINT；
+- 开启事务（BEGIN IMMEDIATE）与提交遇到 SQLITE_BUSY 时自动退避重试；
+- 写连接同一时间只允许一个事务，后台落盘/组提交通过 exclusive() 排队，不会把事务提前提交；
+- 记录事务次数、回滚次数、重试次数与持锁耗时。
+"""
+
+import asyncio
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional, Tuple
+
+import aiosqlite
+from astrbot.api import logger
+
+
+def _is_busy_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class Transaction:
+    """事务句柄"""
+
+    def __init__(self, manager: "TransactionManager", savepoint: Optional[str] = None):
+        self.manager = manager
+        self.savepoint = savepoint  # 嵌套事务对应的保存点名称，最外层为None
+        self.finished = False
+
+    async def rollback(self):
+        """立即回滚本层事务，退出 async with 时不再提交"""
+        if self.finished:
+            return
+        self.finished = True
+        await self.manager._rollback(self.savepoint)
+
+
+class TransactionManager:
+    """写连接的事务管理器"""
+
+    def __init__(self, conn: aiosqlite.Connection, busy_retries: int = 5,
+                 busy_backoff_ms: float = 20, slow_ms: float = 200):
+        self.conn = conn
+        self.busy_retries = max(0, int(busy_retries))
+        self.busy_backoff = max(0.0, float(busy_backoff_ms)) / 1000
+        self.slow_threshold = max(0.0, float(slow_ms)) / 1000
+        self._lock = asyncio.Lock()
+        self._owner: Optional[asyncio.Task] = None
+        self._depth = 0
+        # (保存点深度, 回调)：回滚时按注册的逆序执行，用于恢复内存中的缓存
+        self._rollback_callbacks: List[Tuple[int, Callable[[], None]]] = []
+        # 最外层事务结束（提交或回滚）后执行的回调，用于使结果缓存失效
+        self._finish_callbacks: List[Callable[[], None]] = []
+        # 统计信息
+        self.count = 0
+        self.rollbacks = 0
+        self.busy_retry_count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def owned(self) -> bool:
+        """当前协程是否持有事务"""
+        return self._owner is not None and self._owner is asyncio.current_task()
+
+    def on_rollback(self, callback: Callable[[], None]):
+        """注册回滚回调（仅在持有事务时有效）"""
+        if self.owned():
+            self._rollback_callbacks.append((self._depth, callback))
+
+    def on_finish(self, callback: Callable[[], None]):
+        """注册事务结束回调（仅在持有事务时有效），无论提交还是回滚都会执行"""
+        if self.owned():
+            self._finish_callbacks.append(callback)
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """独占写连接，等待其他协程的事务结束（当前协程持有事务时直接进入）"""
+        if self.owned():
+            yield
+            return
+        async with self._lock:
+            yield
+
+    @asynccontextmanager
+    async def transaction(self):
+        """开启事务；同一协程内嵌套时使用保存点"""
+        if self.owned():
+            async with self._savepoint() as tx:
+                yield tx
+            return
+
+        async with self._lock:
+            if self.conn.in_transaction:
+                # 未经事务管理的写入留下的隐式事务：无法确认它是否完整，回滚而不是替它提交
+                # （与组提交拒绝合并外来事务一致）
+                logger.error("写连接上有未经事务管理器开启的未提交事务，已回滚")
+                await self.conn.rollback()
+            await self._retry_busy(lambda: self.conn.execute("BEGIN IMMEDIATE"))
+            self._owner = asyncio.current_task()
+            self._depth = 0
+            started = time.perf_counter()
+            tx = Transaction(self)
+            try:
+                yield tx
+            except BaseException:
+                if not tx.finished:
+                    tx.finished = True
+                    await self._rollback(None)
+                raise
+            else:
+                if not tx.finished:
+                    tx.finished = True
+                    try:
+                        await self._retry_busy(self.conn.commit)
+                    except BaseException:
+                        await self._rollback(None)
+                        raise
+            finally:
+                self._owner = None
+                self._rollback_callbacks.clear()
+                finish_callbacks, self._finish_callbacks = self._finish_callbacks, []
+                for callback in finish_callbacks:
+                    try:
+                        callback()
+                    except Exception as e:
+                        logger.error(f"事务结束回调执行失败: {e}")
+                elapsed = time.perf_counter() - started
+                self.count += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+                if self.slow_threshold and elapsed > self.slow_threshold:
+                    logger.warning(f"数据库事务持锁 {elapsed * 1000:.0f}ms，超过 {self.slow_threshold * 1000:.0f}ms")
+
+    @asynccontextmanager
+    async def _savepoint(self):
+        self._depth += 1
+        name = f"uow_{self._depth}"
+        await self.conn.execute(f"SAVEPOINT {name}")
+        tx = Transaction(self, name)
+        try:
+            yield tx
+            if not tx.finished:
+                tx.finished = True
+                await self.conn.execute(f"RELEASE SAVEPOINT {name}")
+        except BaseException:
+            if not tx.finished:
+                tx.finished = True
+                await self._rollback(name)
+            raise
+        finally:
+            # 已释放/回滚的保存点上注册的回调并入上一层
+            self._rollback_callbacks = [
+                (min(depth, self._depth - 1), callback) for depth, callback in self._rollback_callbacks
+            ]
+            self._depth -= 1
+
+    async def _rollback(self, savepoint: Optional[str]):
+        """回滚整个事务或回滚到保存点，并执行对应层级的回滚回调"""
+        self.rollbacks += 1
+        if savepoint is None:
+            await self.conn.rollback()
+            callbacks = self._rollback_callbacks
+            self._rollback_callbacks = []
+        else:
+            await self.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            await self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            callbacks = [item for item in self._rollback_callbacks if item[0] >= self._depth]
+            self._rollback_callbacks = [item for item in self._rollback_callbacks if item[0] < self._depth]
+        for _, callback in reversed(callbacks):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"事务回滚回调执行失败: {e}")
+
+    async def _retry_busy(self, operation):
+        """执行操作，遇到 SQLITE_BUSY/locked 时退避重试"""
+        for attempt in range(self.busy_retries + 1):
+            try:
+                return await operation()
+            except sqlite3.OperationalError as e:
+                if attempt >= self.busy_retries or not _is_busy_error(e):
+                    raise
+                self.busy_retry_count += 1
+                await asyncio.sleep(self.busy_backoff * (2 ** attempt))
+
+    def get_stats(self) -> dict:
+        """获取事务统计信息"""
+        return {
+            "count": self.count,
+            "rollbacks": self.rollbacks,
+            "busy_retries": self.busy_retry_count,
+            "avg_ms": (self.total_time / self.count * 1000) if self.count else 0.0,
+            "max_ms": self.max_time * 1000,
+        }
@@ -5,6 +5,7 @@ import re
 from astrbot.api.event import AstrMessageEvent
 from ..data import DataBase
 from ..managers.bank_manager import BankManager
+from ..managers.ranking_manager import page_footer
 from ..models import Player
 from .utils import player_required
 
@@ -177,16 +178,17 @@ class BankHandlers:
         yield event.plain_result(msg)
     
     @player_required
-    async def handle_transactions(self, player: Player, event: AstrMessageEvent):
-        """查看银行流水"""
-        transactions = await self.bank_mgr.get_transactions(player.user_id, 15)
+    async def handle_transactions(self, player: Player, event: AstrMessageEvent, page: int = 1):
+        """查看银行流水（每页15条）"""
+        page = max(1, page)
+        transactions = await self.bank_mgr.get_transactions(player.user_id, 15, page)
         
         if not transactions:
-            yield event.plain_result("📋 暂无交易记录")
+            yield event.plain_result("📋 暂无交易记录" if page == 1 else f"📋 第{page}页暂无交易记录")
             return
         
         msg_lines = [
-            "📋 银行交易流水（最近15条）",
+            "📋 银行交易流水（最近15条）" if page == 1 else f"📋 银行交易流水（第{page}页）",
             "━━━━━━━━━━━━━━━",
         ]
         
@@ -207,10 +209,12 @@ class BankHandlers:
             
             msg_lines.append(f"{trans_time} {type_name} {amount_str}")
         
-        msg_lines.extend([
-            "━━━━━━━━━━━━━━━",
-            f"当前余额：{transactions[0]['balance_after']:,} 灵石" if transactions else ""
-        ])
+        msg_lines.append("━━━━━━━━━━━━━━━")
+        if page == 1:
+            msg_lines.append(f"当前余额：{transactions[0]['balance_after']:,} 灵石")
+        footer = page_footer("银行流水", page, 15, len(transactions))
+        if footer:
+            msg_lines.append(footer)
         
         yield event.plain_result("\n".join(msg_lines))
     
@@ -1,5 +1,10 @@
 # handlers/black_market_handler.py
-"""黑市处理器 - 可购买所有丹药但价格翻倍，每日限购5颗"""
+"""黑市处理器 - 可购买所有丹药但价格翻倍，每日限购5颗
+
+购买记录表 black_market_purchases 在 data/schema.py 中注册，只由
+MigrationManager.migrate() 创建；处理器首次使用前检查该表，迁移未执行时
+记录错误并提示黑市不可用。
+"""
 import re
 import time
 from astrbot.api.event import AstrMessageEvent
@@ -8,6 +13,8 @@ from ..data import DataBase
 from ..core import PillManager
 from ..models import Player
 from ..config_manager import ConfigManager
+from ..data.item_catalog import PILL_KINDS
+from ..data.schema import SchemaNotReadyError, require_schema
 from .utils import player_required
 
 __all__ = ["BlackMarketHandler"]
@@ -15,6 +22,7 @@ __all__ = ["BlackMarketHandler"]
 # 黑市配置
 BLACK_MARKET_PRICE_MULTIPLIER = 2.0  # 价格翻倍（贵100%）
 DAILY_PURCHASE_LIMIT = 5  # 每日限购数量
+SCHEMA_MISSING_MESSAGE = "❌ 黑市数据表未初始化，请联系管理员检查插件数据库迁移。"
 
 
 class BlackMarketHandler:
@@ -24,23 +32,24 @@ class BlackMarketHandler:
         self.db = db
         self.config_manager = config_manager
         self.pill_manager = PillManager(db, config_manager)
-        self._all_pills = None
+        self._schema_ready = False  # 购买记录表已确认存在
+    
+    async def _check_schema(self) -> bool:
+        """确认购买记录表已由迁移创建（确认后不再检查）"""
+        if self._schema_ready:
+            return True
+        try:
+            await require_schema(self.db.conn, "黑市")
+        except SchemaNotReadyError as e:
+            logger.error(f"黑市不可用：{e}")
+            return False
+        self._schema_ready = True
+        return True
     
     def _get_all_pills(self) -> list:
-        """获取所有丹药配置"""
-        if self._all_pills is None:
-            pills = []
-            # 从 pills_data 获取破境丹
-            for name, pill in self.config_manager.pills_data.items():
-                pills.append(pill)
-            # 从 exp_pills_data 获取修为丹
-            for name, pill in self.config_manager.exp_pills_data.items():
-                pills.append(pill)
-            # 从 utility_pills_data 获取功能丹
-            for name, pill in self.config_manager.utility_pills_data.items():
-                pills.append(pill)
-            self._all_pills = pills
-        return self._all_pills
+        """获取所有丹药配置（破境丹、修为丹、功能丹）"""
+        by_kind = self.config_manager.catalog.by_kind
+        return [entry.data for kind in PILL_KINDS for entry in by_kind[kind]]
     
     def _get_black_market_price(self, original_price: int) -> int:
         """计算黑市价格"""
@@ -78,30 +87,17 @@ class BlackMarketHandler:
             (user_id, pill_name, quantity, now)
         )
     
-    async def _ensure_table_exists(self):
-        """确保黑市购买记录表存在"""
-        await self.db.conn.execute("""
-            CREATE TABLE IF NOT EXISTS black_market_purchases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                pill_name TEXT NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 1,
-                purchase_time INTEGER NOT NULL
-            )
-        """)
-        await self.db.conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_black_market_user_time ON black_market_purchases(user_id, purchase_time)"
-        )
-    
     async def handle_black_market(self, event: AstrMessageEvent):
         """显示黑市丹药列表"""
-        await self._ensure_table_exists()
-        
         pills = self._get_all_pills()
         if not pills:
             yield event.plain_result("🏴 黑市暂无货物...")
             return
         
+        if not await self._check_schema():
+            yield event.plain_result(SCHEMA_MISSING_MESSAGE)
+            return
+        
         # 获取用户今日购买数量
         user_id = event.get_sender_id()
         today_count = await self._get_today_purchase_count(user_id)
@@ -176,8 +172,6 @@ class BlackMarketHandler:
     @player_required
     async def handle_black_market_buy(self, player: Player, event: AstrMessageEvent, item_name: str = "", quantity: int = 1):
         """黑市购买丹药"""
-        await self._ensure_table_exists()
-        
         # 解析参数
         parsed_name, parsed_qty = self._parse_buy_args(event)
         if parsed_name:
@@ -191,6 +185,10 @@ class BlackMarketHandler:
         if quantity <= 0:
             quantity = 1
         
+        if not await self._check_schema():
+            yield event.plain_result(SCHEMA_MISSING_MESSAGE)
+            return
+        
         # 检查每日限购
         today_count = await self._get_today_purchase_count(player.user_id)
         remaining = DAILY_PURCHASE_LIMIT - today_count
@@ -212,12 +210,8 @@ class BlackMarketHandler:
             return
         
         # 查找丹药
-        pills = self._get_all_pills()
-        target_pill = None
-        for pill in pills:
-            if pill["name"] == item_name:
-                target_pill = pill
-                break
+        entry = self.config_manager.catalog.get(item_name, PILL_KINDS)
+        target_pill = entry.data if entry else None
         
         if not target_pill:
             yield event.plain_result(f"❌ 黑市没有【{item_name}】这种丹药。")
@@ -239,18 +233,26 @@ class BlackMarketHandler:
             return
         
         # 执行购买
-        await self.db.conn.execute("BEGIN IMMEDIATE")
         try:
-            player = await self.db.get_player_by_id(player.user_id)
+            message = await self._purchase(player.user_id, item_name, quantity, total_price, remaining)
+        except Exception as e:
+            logger.error(f"黑市购买异常: {e}")
+            message = f"❌ 交易失败，请稍后重试。"
+        yield event.plain_result(message)
+
+    async def _purchase(self, user_id: str, item_name: str, quantity: int, total_price: int, remaining: int) -> str:
+        """在一个事务内完成发放丹药、扣除灵石与记录购买，返回结果消息"""
+        async with self.db.transaction() as tx:
+            player = await self.db.get_player_by_id(user_id)
             if player.gold < total_price:
-                await self.db.conn.rollback()
-                yield event.plain_result(f"❌ 灵石不足！需要 {total_price:,} 灵石。")
-                return
+                await tx.rollback()
+                return f"❌ 灵石不足！需要 {total_price:,} 灵石。"
             
             # 添加丹药
             await self.pill_manager.add_pill_to_inventory(player, item_name, count=quantity)
             
             # 扣除灵石
+            await self.db.evict_player(player.user_id)
             await self.db.conn.execute(
                 "UPDATE players SET gold = gold - ? WHERE user_id = ?",
                 (total_price, player.user_id)
@@ -259,22 +261,15 @@ class BlackMarketHandler:
             
             # 记录购买
             await self._record_purchase(player.user_id, item_name, quantity)
-            
-            await self.db.conn.commit()
-            
-            new_remaining = remaining - quantity
-            qty_str = f"x{quantity}" if quantity > 1 else ""
-            yield event.plain_result(
-                f"🏴 黑市交易成功！\n"
-                f"━━━━━━━━━━━━━━━\n"
-                f"购买：【{item_name}】{qty_str}\n"
-                f"花费：{total_price:,} 灵石\n"
-                f"剩余：{player.gold:,} 灵石\n"
-                f"━━━━━━━━━━━━━━━\n"
-                f"📦 今日剩余额度：{new_remaining}/{DAILY_PURCHASE_LIMIT}"
-            )
-            
-        except Exception as e:
-            await self.db.conn.rollback()
-            logger.error(f"黑市购买异常: {e}")
-            yield event.plain_result(f"❌ 交易失败，请稍后重试。")
+        
+        new_remaining = remaining - quantity
+        qty_str = f"x{quantity}" if quantity > 1 else ""
+        return (
+            f"🏴 黑市交易成功！\n"
+            f"━━━━━━━━━━━━━━━\n"
+            f"购买：【{item_name}】{qty_str}\n"
+            f"花费：{total_price:,} 灵石\n"
+            f"剩余：{player.gold:,} 灵石\n"
+            f"━━━━━━━━━━━━━━━\n"
+            f"📦 今日剩余额度：{new_remaining}/{DAILY_PURCHASE_LIMIT}"
+        )
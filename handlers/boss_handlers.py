@@ -11,7 +11,14 @@ class BossHandlers:
 
     async def handle_boss_info(self, event: AstrMessageEvent, boss_id: int = 0):
         """查询世界Boss"""
-        success, msg, _ = await self.boss_mgr.get_boss_info(boss_id)
+        success, msg, boss = await self.boss_mgr.get_boss_info(boss_id)
+        if success and boss:
+            # 查看指定Boss时附上查询者的胜率预估
+            player = await self.db.get_player_by_id(event.get_sender_id())
+            if player:
+                preview = await self.boss_mgr.get_win_preview(player, boss.boss_id)
+                if preview:
+                    msg = f"{msg}\n{preview}"
         yield event.plain_result(msg)
 
     async def handle_boss_fight(self, user_id: str, boss_id: int = 0) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
@@ -33,11 +33,11 @@ class BreakthroughHandler:
         """查看突破信息"""
         display_name = event.get_sender_name()
 
-        # 根据修炼类型获取对应的境界数据
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
+        # 根据修炼类型获取对应的境界表
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
 
         # 检查是否已经是最高境界
-        if player.level_index >= len(level_data) - 1:
+        if player.level_index >= level_table.max_index:
             yield event.plain_result("你已经达到了最高境界，无法继续突破！")
             return
 
@@ -45,17 +45,15 @@ class BreakthroughHandler:
         modifiers = self.pill_manager.get_breakthrough_modifiers(player)
 
         # 获取当前和下一境界信息
-        current_level_data = level_data[player.level_index]
-        next_level_data = level_data[player.level_index + 1]
-
-        current_level_name = current_level_data["level_name"]
-        next_level_name = next_level_data["level_name"]
-        required_exp = next_level_data.get("exp_needed", 0)
-        base_success_rate = next_level_data.get("success_rate", 0.5)
+        current_level_name = level_table.name(player.level_index)
+        next_level_name = level_table.name(player.level_index + 1)
+        required_exp = level_table.required_exp(player.level_index)
+        base_success_rate = level_table.success_rate(player.level_index + 1)
         temp_bonus = modifiers["temp_bonus"]
 
-        # 检查修为是否满足
-        exp_satisfied = player.experience >= required_exp
+        # 检查修为是否满足：修为足以达到的最高境界须高于当前境界
+        reachable_index = level_table.level_for_exp(player.experience)
+        exp_satisfied = reachable_index > player.level_index
         exp_status = "✅ 满足" if exp_satisfied else "❌ 不足"
 
         # 查找适用的破境丹
@@ -82,6 +80,7 @@ class BreakthroughHandler:
             f"【突破条件】\n",
             f"所需修为：{required_exp}\n",
             f"当前修为：{player.experience}\n",
+            f"修为可达：{level_table.name(reachable_index)}\n",
             f"修为状态：{exp_status}\n",
             f"━━━━━━━━━━━━━━━\n",
             f"【突破成功率】\n",
@@ -136,8 +135,8 @@ class BreakthroughHandler:
         await self.pill_manager.update_temporary_effects(player)
         modifiers = self.pill_manager.get_breakthrough_modifiers(player)
 
-        # 根据修炼类型获取对应的境界数据
-        level_data = self.config_manager.get_level_data(player.cultivation_type)
+        # 根据修炼类型获取对应的境界表
+        level_table = self.config_manager.get_level_table(player.cultivation_type)
 
         # 如果指定了破境丹，验证其有效性
         if pill_name and pill_name.strip():
@@ -155,11 +154,9 @@ class BreakthroughHandler:
             # 检查是否适用于当前突破
             target_level = pill_data.get("target_level_index", -1)
             if target_level != player.level_index + 1:
-                current_level = level_data[player.level_index]["level_name"]
+                current_level = level_table.name(player.level_index)
                 # 获取丹药目标境界名称
-                target_level_name = f"境界{target_level}"
-                if 0 <= target_level < len(level_data):
-                    target_level_name = level_data[target_level]["level_name"]
+                target_level_name = level_table.name(target_level, f"境界{target_level}")
                 yield event.plain_result(
                     f"❌ {pill_name} 不适用于当前突破\n"
                     f"当前境界：{current_level}\n"
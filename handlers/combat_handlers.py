@@ -2,7 +2,7 @@
 import time
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api.all import *
-from ..managers.combat_manager import CombatManager, CombatStats
+from ..managers.combat_manager import CombatManager, CombatReplay, CombatStats
 from ..data.data_manager import DataBase
 from .utils import player_required
 from ..models import Player
@@ -37,25 +37,25 @@ class CombatHandlers:
         """更新战斗冷却时间"""
         now = int(time.time())
         try:
-            if combat_type == "duel":
-                await self.db.conn.execute(
-                    """
-                    INSERT INTO combat_cooldowns (user_id, last_duel_time, last_spar_time)
-                    VALUES (?, ?, 0)
-                    ON CONFLICT(user_id) DO UPDATE SET last_duel_time = ?
-                    """,
-                    (user_id, now, now)
-                )
-            else:
-                await self.db.conn.execute(
-                    """
-                    INSERT INTO combat_cooldowns (user_id, last_duel_time, last_spar_time)
-                    VALUES (?, 0, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET last_spar_time = ?
-                    """,
-                    (user_id, now, now)
-                )
-            await self.db.conn.commit()
+            async with self.db.transaction():
+                if combat_type == "duel":
+                    await self.db.conn.execute(
+                        """
+                        INSERT INTO combat_cooldowns (user_id, last_duel_time, last_spar_time)
+                        VALUES (?, ?, 0)
+                        ON CONFLICT(user_id) DO UPDATE SET last_duel_time = ?
+                        """,
+                        (user_id, now, now)
+                    )
+                else:
+                    await self.db.conn.execute(
+                        """
+                        INSERT INTO combat_cooldowns (user_id, last_duel_time, last_spar_time)
+                        VALUES (?, 0, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET last_spar_time = ?
+                        """,
+                        (user_id, now, now)
+                    )
         except Exception as e:
             from astrbot.api import logger
             logger.warning(f"更新战斗冷却失败: {e}")
@@ -175,18 +175,19 @@ class CombatHandlers:
             return
 
         # 战斗
-        result = self.combat_mgr.player_vs_player(p1_stats, p2_stats, combat_type=2) # 2=决斗
+        result = self.combat_mgr.player_vs_player(
+            p1_stats, p2_stats, combat_type=2, summary=self.combat_mgr.summary_reports
+        ) # 2=决斗
         
         # 结算（更新HP）
-        await self.db.ext.update_player_hp_mp(user_id, result['player1_final_hp'], result['player1_final_mp'])
-        await self.db.ext.update_player_hp_mp(target_id, result['player2_final_hp'], result['player2_final_mp'])
+        await self.db.update_player_fields(user_id, hp=result['player1_final_hp'], mp=result['player1_final_mp'])
+        await self.db.update_player_fields(target_id, hp=result['player2_final_hp'], mp=result['player2_final_mp'])
         
         # 更新冷却
         await self._update_combat_cooldown(user_id, "duel")
         
         # 生成战报
-        log = "\n".join(result['combat_log'])
-        yield event.plain_result(f"{log}")
+        yield event.plain_result(await self._format_report(result))
 
     async def handle_spar(self, event: AstrMessageEvent, target: str):
         """切磋 (不消耗气血)"""
@@ -231,10 +232,42 @@ class CombatHandlers:
              yield event.plain_result("❌ 双方都需要踏入修仙之路")
              return
 
-        result = self.combat_mgr.player_vs_player(p1_stats, p2_stats, combat_type=1) # 1=切磋
+        result = self.combat_mgr.player_vs_player(
+            p1_stats, p2_stats, combat_type=1, summary=self.combat_mgr.summary_reports
+        ) # 1=切磋
         
         # 更新冷却
         await self._update_combat_cooldown(user_id, "spar")
         
+        yield event.plain_result(await self._format_report(result))
+    
+    async def _format_report(self, result: dict) -> str:
+        """保存战斗回放并生成战报：战况摘要 + 回放编号（完整过程用「战斗回放」查看）"""
+        replay_id = None
+        if self.combat_mgr.replay_keep > 0:
+            replay_id = await self.db.ext.save_combat_replay(
+                **vars(result["replay"]), keep=self.combat_mgr.replay_keep
+            )
+        report = self.combat_mgr.format_report(result["combat_log"], replay_id)
+        return report + self.combat_mgr.format_replay_hint(replay_id)
+    
+    async def handle_replay(self, event: AstrMessageEvent, replay_id: int = 0):
+        """战斗回放（按随机种子与开战属性重新生成战斗过程）"""
+        if replay_id <= 0:
+            yield event.plain_result("❌ 请指定回放编号，例如：战斗回放 12")
+            return
+        
+        data = await self.db.ext.get_combat_replay(replay_id)
+        if not data:
+            yield event.plain_result(f"❌ 未找到编号为 {replay_id} 的战斗回放（可能已过期）")
+            return
+        
+        result = self.combat_mgr.replay(CombatReplay(
+            kind=data["kind"],
+            seed=data["seed"],
+            first=data["first"],
+            second=data["second"],
+            combat_type=data["combat_type"]
+        ))
         log = "\n".join(result['combat_log'])
-        yield event.plain_result(f"{log}")
+        yield event.plain_result(f"📼 战斗回放 #{replay_id}\n{log}")
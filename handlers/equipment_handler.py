@@ -125,7 +125,7 @@ class EquipmentHandler:
             return
 
         # 检查储物戒中是否有该物品
-        if not self.storage_ring_manager.has_item(player, item_name, 1):
+        if not await self.storage_ring_manager.has_item(player, item_name, 1):
             yield event.plain_result(
                 f"❌ 储物戒中没有【{item_name}】\n"
                 f"请先通过购买或获得该装备"
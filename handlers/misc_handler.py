@@ -82,6 +82,7 @@ class MiscHandler:
             "【⚔️ 战斗系统】\n"
             "  切磋 @某人 - 友好切磋\n"
             "  决斗 @某人 - 生死决斗\n"
+            "  战斗回放 <编号> - 重看战斗过程\n"
             "  世界Boss [编号] - 查看Boss\n"
             "  挑战Boss <编号> - 挑战Boss\n"
             "  传承挑战 @某人 / 传承排行\n"
@@ -89,6 +90,8 @@ class MiscHandler:
             "【📊 排行榜】\n"
             "  境界排行 / 战力排行 / 灵石排行\n"
             "  宗门排行 / 存款排行 / 贡献排行\n"
+            "  （排行后加页码翻页，如：境界排行 2）\n"
+            "  我的排名 [战力/境界/灵石/存款/通天塔/传承]\n"
             "\n"
             "【🚶 历练系统】\n"
             "  开始历练 [短途/中途/长途]\n"
@@ -17,26 +17,15 @@ __all__ = ["PillHandler"]
 class PillHandler:
     """丹药系统处理器 - 处理丹药使用和查看"""
 
-    def __init__(self, db: DataBase, config_manager: ConfigManager):
-        self.db = db
-        self.config_manager = config_manager
-        self.pill_manager = PillManager(db, config_manager)
-
-    def _format_required_level(self, level_index: int) -> str:
-        """同时展示灵修/体修的需求境界名称"""
-        names = []
-        if 0 <= level_index < len(self.config_manager.level_data):
-            name = self.config_manager.level_data[level_index].get("level_name", "")
-            if name:
-                names.append(name)
-        if 0 <= level_index < len(self.config_manager.body_level_data):
-            name = self.config_manager.body_level_data[level_index].get("level_name", "")
-            if name and name not in names:
-                names.append(name)
-        if not names:
-            return "未知境界"
-        return " / ".join(names)
-
+    def __init__(self, db: DataBase, config_manager: ConfigManager):
+        self.db = db
+        self.config_manager = config_manager
+        self.pill_manager = PillManager(db, config_manager)
+
+    def _format_required_level(self, level_index: int) -> str:
+        """同时展示灵修/体修的需求境界名称"""
+        return self.config_manager.format_required_level(level_index, "未知境界")
+
     @player_required
     async def handle_use_pill(self, player: Player, event: AstrMessageEvent, pill_name: str = ""):
         """处理服用丹药指令
@@ -80,7 +69,7 @@ class PillHandler:
         await self.pill_manager.update_temporary_effects(player)
 
         # 获取丹药背包显示
-        inventory_display = self.pill_manager.get_pill_inventory_display(player)
+        inventory_display = await self.pill_manager.get_pill_inventory_display(player)
 
         # 获取当前生效的临时效果
         active_effects = player.get_active_pill_effects()
@@ -158,9 +147,9 @@ class PillHandler:
 
         # 需求境界
         required_level = pill_data.get('required_level_index', 0)
-        if required_level > 0:
-            level_name = self._format_required_level(required_level)
-            info_lines.append(f"需求境界：{level_name}")
+        if required_level > 0:
+            level_name = self._format_required_level(required_level)
+            info_lines.append(f"需求境界：{level_name}")
 
         # 价格
         price = pill_data.get('price', 0)
@@ -128,6 +128,7 @@ class PlayerHandler:
 
         # 获取装备加成后的属性
         from ..core import EquipmentManager
+        from ..core.equipment_manager import combat_power_from_attributes
         equipment_manager = EquipmentManager(self.db, self.config_manager)
         equipped_items = equipment_manager.get_equipped_items(
             player,
@@ -142,11 +143,7 @@ class PlayerHandler:
         # 文本模式 (完整信息显示)
         
         # 获取战力（综合攻防）
-        combat_power = (
-            int(total_attrs['physical_damage']) + int(total_attrs['magic_damage']) +
-            int(total_attrs['physical_defense']) + int(total_attrs['magic_defense']) +
-            int(total_attrs['mental_power']) // 10
-        )
+        combat_power = combat_power_from_attributes(total_attrs)
         
         # 获取宗门信息
         sect_name = "无宗门"
@@ -8,29 +8,41 @@ class RankingHandlers:
         self.db = db
         self.rank_mgr = rank_mgr
 
-    async def handle_rank_level(self, event: AstrMessageEvent):
-        """境界排行"""
-        success, msg = await self.rank_mgr.get_level_ranking()
+    async def handle_rank_level(self, event: AstrMessageEvent, page: int = 1):
+        """境界排行（可带页码）"""
+        success, msg = await self.rank_mgr.get_level_ranking(page=page)
         yield event.plain_result(msg)
 
-    async def handle_rank_power(self, event: AstrMessageEvent):
-        """战力排行"""
-        success, msg = await self.rank_mgr.get_power_ranking()
+    async def handle_rank_power(self, event: AstrMessageEvent, page: int = 1):
+        """战力排行（可带页码）"""
+        success, msg = await self.rank_mgr.get_power_ranking(page=page)
         yield event.plain_result(msg)
     
-    async def handle_rank_wealth(self, event: AstrMessageEvent):
-        """财富排行"""
-        success, msg = await self.rank_mgr.get_wealth_ranking()
+    async def handle_rank_wealth(self, event: AstrMessageEvent, page: int = 1):
+        """财富排行（可带页码）"""
+        success, msg = await self.rank_mgr.get_wealth_ranking(page=page)
         yield event.plain_result(msg)
     
-    async def handle_rank_sect(self, event: AstrMessageEvent):
-        """宗门排行"""
-        success, msg = await self.rank_mgr.get_sect_ranking()
+    async def handle_rank_sect(self, event: AstrMessageEvent, page: int = 1):
+        """宗门排行（可带页码）"""
+        success, msg = await self.rank_mgr.get_sect_ranking(page=page)
         yield event.plain_result(msg)
     
-    async def handle_rank_deposit(self, event: AstrMessageEvent):
-        """存款排行"""
-        success, msg = await self.rank_mgr.get_deposit_ranking()
+    async def handle_rank_deposit(self, event: AstrMessageEvent, page: int = 1):
+        """存款排行（可带页码）"""
+        success, msg = await self.rank_mgr.get_deposit_ranking(page=page)
+        yield event.plain_result(msg)
+    
+    async def handle_my_rank(self, event: AstrMessageEvent, board_name: str = ""):
+        """我的排名"""
+        user_id = str(event.get_sender_id())
+        player = await self.db.get_player_by_id(user_id)
+        
+        if not player:
+            yield event.plain_result("❌ 你还未踏入修仙之路，请先发送「我要修仙」开始修行。")
+            return
+        
+        success, msg = await self.rank_mgr.get_my_rank(user_id, board_name)
         yield event.plain_result(msg)
     
     async def handle_rank_sect_contribution(self, event: AstrMessageEvent):
@@ -79,13 +79,7 @@ class ShopHandler:
 
     async def _find_item_in_pavilions(self, item_name: str):
         """在所有阁楼中查找物品"""
-        for pavilion_id in ["pill_pavilion", "weapon_pavilion", "treasure_pavilion"]:
-            _, items = await self.db.get_shop_data(pavilion_id)
-            if items:
-                for item in items:
-                    if item['name'] == item_name and item.get('stock', 0) > 0:
-                        return pavilion_id, item
-        return None, None
+        return await self.db.find_shop_item(item_name, ["pill_pavilion", "weapon_pavilion", "treasure_pavilion"])
 
     @player_required
     async def handle_buy(self, player: Player, event: AstrMessageEvent, item_name: str = ""):
@@ -144,28 +138,37 @@ class ShopHandler:
             )
             return
 
+        try:
+            message = await self._purchase(
+                event.get_sender_id(), pavilion_id, target_item, item_name, quantity, price, total_price
+            )
+        except Exception as e:
+            logger.error(f"购买异常: {e}")
+            raise
+        yield event.plain_result(message)
+
+    async def _purchase(self, user_id: str, pavilion_id: str, target_item: dict, item_name: str,
+                        quantity: int, price: int, total_price: int) -> str:
+        """在一个事务内完成扣库存、发放物品与扣除灵石，返回结果消息"""
         item_type = target_item['type']
         result_lines = []
 
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
-            player = await self.db.get_player_by_id(event.get_sender_id())
+        async with self.db.transaction() as tx:
+            player = await self.db.get_player_by_id(user_id)
             if player.gold < total_price:
-                await self.db.conn.rollback()
-                yield event.plain_result(
+                await tx.rollback()
+                return (
                     f"灵石不足！\n【{target_item['name']}】价格: {price} 灵石\n"
                     f"购买数量: {quantity}\n需要灵石: {total_price}\n你的灵石: {player.gold}"
                 )
-                return
 
-            reserved, _, remaining = await self.db.decrement_shop_item_stock(pavilion_id, item_name, quantity, external_transaction=True)
+            reserved, _, remaining = await self.db.decrement_shop_item_stock(pavilion_id, item_name, quantity)
             if not reserved:
-                await self.db.conn.rollback()
-                yield event.plain_result(f"【{item_name}】已售罄，请等待刷新。")
-                return
+                await tx.rollback()
+                return f"【{item_name}】已售罄，请等待刷新。"
 
             if item_type in ['weapon', 'armor', 'main_technique', 'technique', 'accessory']:
-                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity, external_transaction=True)
+                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity)
                 if success:
                     type_name = {"weapon": "武器", "armor": "防具", "main_technique": "心法", "technique": "功法", "accessory": "饰品"}.get(item_type, "装备")
                     result_lines.append(f"成功购买{type_name}【{target_item['name']}】x{quantity}，已存入储物戒。")
@@ -178,51 +181,39 @@ class ShopHandler:
             elif item_type == 'legacy_pill':
                 success, message = await self._apply_legacy_pill_effects(player, target_item, quantity)
                 if not success:
-                    await self.db.conn.rollback()
-                    yield event.plain_result(message)
-                    return
+                    await tx.rollback()
+                    return message
                 result_lines.append(message)
             elif item_type == 'material':
-                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity, external_transaction=True)
+                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity)
                 if success:
                     result_lines.append(f"成功购买材料【{target_item['name']}】x{quantity}，已存入储物戒。")
                 else:
                     result_lines.append(f"成功购买材料【{target_item['name']}】x{quantity}。")
                     result_lines.append(f"⚠️ 存入储物戒失败：{msg}")
             elif item_type == '功法':
-                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity, external_transaction=True)
+                success, msg = await self.storage_ring_manager.store_item(player, target_item['name'], quantity)
                 if success:
                     result_lines.append(f"成功购买功法【{target_item['name']}】x{quantity}，已存入储物戒。")
                 else:
                     result_lines.append(f"成功购买功法【{target_item['name']}】x{quantity}。")
                     result_lines.append(f"⚠️ 存入储物戒失败：{msg}")
             else:
-                await self.db.conn.rollback()
-                yield event.plain_result(f"未知的物品类型：{item_type}")
-                return
+                await tx.rollback()
+                return f"未知的物品类型：{item_type}"
 
-            # --- 修复开始 ---
-            # 方案：使用直接 SQL 扣除灵石，避免 update_player 覆盖掉刚才存入储物戒的物品数据
+            # 使用直接 SQL 扣除灵石，避免 update_player 覆盖掉刚才存入储物戒的物品数据
+            await self.db.evict_player(player.user_id)
             await self.db.conn.execute(
                 "UPDATE players SET gold = gold - ? WHERE user_id = ?", 
                 (total_price, player.user_id)
             )
-            # 更新内存中的 player 对象以便后续显示（虽然本函数马上结束了，但保持一致性是好习惯）
+            # 更新内存中的 player 对象以便后续显示
             player.gold -= total_price
-            
-            # 删除这行，因为它会导致数据覆盖！
-            # await self.db.update_player(player) 
-            
-            await self.db.conn.commit()
-            # --- 修复结束 ---
-            
-            result_lines.append(f"花费灵石: {total_price}，剩余: {player.gold}")
-            result_lines.append(f"剩余库存: {remaining}" if remaining > 0 else "该物品已售罄！")
-            yield event.plain_result("\n".join(result_lines))
-        except Exception as e:
-            await self.db.conn.rollback()
-            logger.error(f"购买异常: {e}")
-            raise
+
+        result_lines.append(f"花费灵石: {total_price}，剩余: {player.gold}")
+        result_lines.append(f"剩余库存: {remaining}" if remaining > 0 else "该物品已售罄！")
+        return "\n".join(result_lines)
 
     async def _apply_legacy_pill_effects(self, player: Player, item: dict, quantity: int) -> tuple:
         """应用旧系统丹药效果（items.json中的丹药）
@@ -48,7 +48,7 @@ class StorageRingHandler:
         display_name = event.get_sender_name()
 
         # 获取储物戒信息
-        ring_info = self.storage_ring_manager.get_storage_ring_info(player)
+        ring_info = await self.storage_ring_manager.get_storage_ring_info(player)
 
         lines = [
             f"=== {display_name} 的储物戒 ===\n",
@@ -74,7 +74,7 @@ class StorageRingHandler:
             lines.append("【存储物品】空\n")
 
         # 空间警告
-        warning = self.storage_ring_manager.get_space_warning(player)
+        warning = await self.storage_ring_manager.get_space_warning(player)
         if warning:
             lines.append(f"\n{warning}\n")
 
@@ -237,8 +237,8 @@ class StorageRingHandler:
             return
 
         # 检查物品是否在储物戒中
-        if not self.storage_ring_manager.has_item(player, item_name, count):
-            current = self.storage_ring_manager.get_item_count(player, item_name)
+        current = await self.storage_ring_manager.get_item_count(player, item_name)
+        if current < count:
             if current == 0:
                 yield event.plain_result(f"储物戒中没有【{item_name}】")
             else:
@@ -447,7 +447,7 @@ class StorageRingHandler:
             return
 
         keyword = keyword.strip().lower()
-        items = player.get_storage_ring_items()
+        items = await self.storage_ring_manager.get_items(player)
         
         # 模糊搜索
         matched = []
@@ -497,7 +497,7 @@ class StorageRingHandler:
             yield event.plain_result(f"未知分类：{category}\n可用分类：材料、装备、功法、其他")
             return
         
-        items = player.get_storage_ring_items()
+        items = await self.storage_ring_manager.get_items(player)
         categorized = self._categorize_items(items)
         cat_items = categorized.get(category, [])
         
@@ -63,14 +63,14 @@ class TowerHandlers:
         msg = await self.tower_mgr.get_next_boss_info(player)
         yield event.plain_result(msg)
     
-    async def handle_floor_ranking(self, event: AstrMessageEvent):
+    async def handle_floor_ranking(self, event: AstrMessageEvent, page: int = 1):
         """通天塔层数排行榜"""
-        msg = await self.tower_mgr.get_floor_ranking()
+        msg = await self.tower_mgr.get_floor_ranking(page=page)
         yield event.plain_result(msg)
     
-    async def handle_points_ranking(self, event: AstrMessageEvent):
+    async def handle_points_ranking(self, event: AstrMessageEvent, page: int = 1):
         """通天塔积分排行榜"""
-        msg = await self.tower_mgr.get_points_ranking()
+        msg = await self.tower_mgr.get_points_ranking(page=page)
         yield event.plain_result(msg)
     
     async def handle_shop(self, event: AstrMessageEvent):
@@ -22,11 +22,10 @@ class TribulationHandlers:
             return
         
         # 获取下一境界
-        from ..config_manager import ConfigManager
         config_mgr = self.tribulation_mgr.config_manager
         if config_mgr:
-            level_data = config_mgr.get_level_data(player.cultivation_type)
-            if player.level_index < len(level_data) - 1:
+            level_table = config_mgr.get_level_table(player.cultivation_type)
+            if player.level_index < level_table.max_index:
                 next_level = player.level_index + 1
                 preview = self.tribulation_mgr.get_tribulation_preview(player, next_level)
             else:
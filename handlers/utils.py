@@ -136,17 +136,16 @@ async def _check_loan_status(db, player: Player) -> dict:
         # 检查是否已逾期
         if now > due_at:
             # 使用事务保护，防止并发删除
-            await db.conn.execute("BEGIN IMMEDIATE")
-            try:
+            async with db.transaction() as tx:
                 # 重新检查贷款状态（可能已被其他请求处理）
                 loan = await db.ext.get_active_loan(player.user_id)
                 if not loan or loan["status"] != "active":
-                    await db.conn.rollback()
+                    await tx.rollback()
                     return None
                 
                 # 再次检查是否逾期
                 if now <= loan["due_at"]:
-                    await db.conn.rollback()
+                    await tx.rollback()
                     return None
                 
                 player_name = player.user_name or f"道友{player.user_id[:6]}"
@@ -163,8 +162,6 @@ async def _check_loan_status(db, player: Player) -> dict:
                     "逾期未还款，被银行追杀致死", now
                 )
                 
-                await db.conn.commit()
-                
                 loan_type_name = "突破贷款" if loan["loan_type"] == "breakthrough" else "普通贷款"
                 
                 return {
@@ -181,9 +178,6 @@ async def _check_loan_status(db, player: Player) -> dict:
                         f"若想重新修仙，请使用「我要修仙」命令"
                     )
                 }
-            except Exception:
-                await db.conn.rollback()
-                raise
         
         # 计算剩余时间
         remaining_seconds = due_at - now
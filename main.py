@@ -5,6 +5,7 @@ from astrbot.api import logger, AstrBotConfig
 from astrbot.api.star import Context, Star, StarTools
 from astrbot.api.event import AstrMessageEvent, filter
 from .data import DataBase, MigrationManager
+from .core import EquipmentManager
 from .config_manager import ConfigManager
 from .handlers import (
     MiscHandler, PlayerHandler, EquipmentHandler, BreakthroughHandler, 
@@ -91,10 +92,12 @@ CMD_RANK_WEALTH = "灵石排行"
 CMD_RANK_SECT = "宗门排行"
 CMD_RANK_DEPOSIT = "存款排行"
 CMD_RANK_CONTRIBUTION = "贡献排行"
+CMD_MY_RANK = "我的排名"
 
 # 战斗指令
 CMD_DUEL = "决斗"
 CMD_SPAR = "切磋"
+CMD_COMBAT_REPLAY = "战斗回放"
 
 # 秘境系统指令
 CMD_RIFT_LIST = "秘境列表"
@@ -226,7 +229,11 @@ class XiuXianPlugin(Star):
         plugin_data_path = StarTools.get_data_dir("astrbot_plugin_monixiuxian2")
         plugin_data_path.mkdir(parents=True, exist_ok=True)
         db_path = plugin_data_path / db_filename
-        self.db = DataBase(str(db_path))
+        self.db = DataBase(str(db_path), self.config.get("PERFORMANCE", {}))
+        # 装备或基础属性变化时由数据层重算存储的战力（战力排行直接按索引读取）
+        self.db.set_combat_power_calculator(
+            EquipmentManager(self.db, self.config_manager).calculate_combat_power
+        )
 
         self.misc_handler = MiscHandler(self.db)
         self.player_handler = PlayerHandler(self.db, self.config, self.config_manager)
@@ -240,7 +247,7 @@ class XiuXianPlugin(Star):
         from .core import StorageRingManager
         self.storage_ring_mgr = StorageRingManager(self.db, self.config_manager)
         
-        self.combat_mgr = CombatManager()
+        self.combat_mgr = CombatManager(self.config.get("PERFORMANCE", {}))
         self.sect_mgr = SectManager(self.db, self.config_manager)
         self.boss_mgr = BossManager(self.db, self.combat_mgr, self.config_manager, self.storage_ring_mgr)
         self.rift_mgr = RiftManager(self.db, self.config_manager, self.storage_ring_mgr)
@@ -393,16 +400,22 @@ class XiuXianPlugin(Star):
     async def initialize(self):
         await self.db.connect()
         migration_manager = MigrationManager(self.db.conn, self.config_manager)
+        # 版本迁移与各子系统的运行时表结构在此统一创建
         await migration_manager.migrate()
         
-        # 确保系统配置表存在
-        await self.db.ext.ensure_system_config_table()
-        
         # 确保默认秘境数据存在
         rifts_added = await self.db.ext.ensure_default_rifts()
         if rifts_added:
             logger.info("【修仙插件】已初始化默认秘境数据")
         
+        # 战力一致性检查（首次升级后填充战力列，装备配置调整后校正）
+        try:
+            power_fixed = await self.db.rebuild_combat_power()
+            if power_fixed:
+                logger.info(f"【修仙插件】已重算 {power_fixed} 名玩家的战力")
+        except Exception as e:
+            logger.error(f"【修仙插件】战力一致性检查失败: {e}")
+        
         # 启动定时任务
         self.boss_task = asyncio.create_task(self._schedule_boss_spawn())
         self.loan_check_task = asyncio.create_task(self._schedule_loan_check())
@@ -1058,7 +1071,7 @@ class XiuXianPlugin(Star):
         success, msg, battle_result = await self.boss_handlers.handle_boss_fight(user_id, boss_id)
         yield event.plain_result(msg)
         
-        if success and battle_result and battle_result.get("winner") == user_id:
+        if success and battle_result and battle_result.get("killed"):
             player = await self.db.get_player_by_id(user_id)
             player_name = player.user_name if player and player.user_name else f"道友{str(user_id)[:6]}"
             await self._broadcast_boss_defeat(player_name, battle_result)
@@ -1080,32 +1093,32 @@ class XiuXianPlugin(Star):
 
     @filter.command(CMD_RANK_LEVEL, "查看境界排行榜")
     @require_whitelist
-    async def handle_rank_level(self, event: AstrMessageEvent):
-        async for r in self.ranking_handlers.handle_rank_level(event):
+    async def handle_rank_level(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.ranking_handlers.handle_rank_level(event, page):
             yield r
 
     @filter.command(CMD_RANK_POWER, "查看战力排行榜")
     @require_whitelist
-    async def handle_rank_power(self, event: AstrMessageEvent):
-        async for r in self.ranking_handlers.handle_rank_power(event):
+    async def handle_rank_power(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.ranking_handlers.handle_rank_power(event, page):
             yield r
 
     @filter.command(CMD_RANK_WEALTH, "查看财富排行榜")
     @require_whitelist
-    async def handle_rank_wealth(self, event: AstrMessageEvent):
-        async for r in self.ranking_handlers.handle_rank_wealth(event):
+    async def handle_rank_wealth(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.ranking_handlers.handle_rank_wealth(event, page):
             yield r
 
     @filter.command(CMD_RANK_SECT, "查看宗门排行榜")
     @require_whitelist
-    async def handle_rank_sect(self, event: AstrMessageEvent):
-        async for r in self.ranking_handlers.handle_rank_sect(event):
+    async def handle_rank_sect(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.ranking_handlers.handle_rank_sect(event, page):
             yield r
 
     @filter.command(CMD_RANK_DEPOSIT, "查看存款排行榜")
     @require_whitelist
-    async def handle_rank_deposit(self, event: AstrMessageEvent):
-        async for r in self.ranking_handlers.handle_rank_deposit(event):
+    async def handle_rank_deposit(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.ranking_handlers.handle_rank_deposit(event, page):
             yield r
 
     @filter.command(CMD_RANK_CONTRIBUTION, "查看宗门贡献排行榜")
@@ -1114,6 +1127,12 @@ class XiuXianPlugin(Star):
         async for r in self.ranking_handlers.handle_rank_sect_contribution(event):
             yield r
 
+    @filter.command(CMD_MY_RANK, "查看自己在各排行榜的名次")
+    @require_whitelist
+    async def handle_my_rank(self, event: AstrMessageEvent, board_name: str = ""):
+        async for r in self.ranking_handlers.handle_my_rank(event, board_name):
+            yield r
+
     # ===== 战斗指令 =====
 
     @filter.command(CMD_DUEL, "与其他玩家决斗(消耗气血)")
@@ -1128,6 +1147,12 @@ class XiuXianPlugin(Star):
         async for r in self.combat_handlers.handle_spar(event, target):
             yield r
 
+    @filter.command(CMD_COMBAT_REPLAY, "按编号重新查看战斗过程")
+    @require_whitelist
+    async def handle_combat_replay(self, event: AstrMessageEvent, replay_id: int = 0):
+        async for r in self.combat_handlers.handle_replay(event, replay_id):
+            yield r
+
     # ===== 秘境指令 =====
     @filter.command(CMD_RIFT_LIST, "查看秘境列表")
     @require_whitelist
@@ -1275,8 +1300,8 @@ class XiuXianPlugin(Star):
 
     @filter.command(CMD_BANK_TRANSACTIONS, "查看银行流水")
     @require_whitelist
-    async def handle_bank_transactions(self, event: AstrMessageEvent):
-        async for r in self.bank_handlers.handle_transactions(event):
+    async def handle_bank_transactions(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.bank_handlers.handle_transactions(event, page):
             yield r
 
     @filter.command(CMD_BANK_BREAKTHROUGH_LOAN, "申请突破贷款")
@@ -1548,14 +1573,14 @@ class XiuXianPlugin(Star):
 
     @filter.command(CMD_TOWER_RANKING, "通天塔排行榜")
     @require_whitelist
-    async def handle_tower_ranking(self, event: AstrMessageEvent):
-        async for r in self.tower_handlers.handle_floor_ranking(event):
+    async def handle_tower_ranking(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.tower_handlers.handle_floor_ranking(event, page):
             yield r
 
     @filter.command(CMD_TOWER_POINTS_RANKING, "通天塔积分排行榜")
     @require_whitelist
-    async def handle_tower_points_ranking(self, event: AstrMessageEvent):
-        async for r in self.tower_handlers.handle_points_ranking(event):
+    async def handle_tower_points_ranking(self, event: AstrMessageEvent, page: int = 1):
+        async for r in self.tower_handlers.handle_points_ranking(event, page):
             yield r
 
     @filter.command(CMD_TOWER_SHOP, "通天塔商店")
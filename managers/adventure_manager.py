@@ -199,11 +199,13 @@ class AdventureManager:
                     item_msg = "\n\n📦 获得物品：\n" + "\n".join(item_lines)
         
         # 9. 应用奖励 [修复：使用SQL直接更新，防止覆盖刚才存入的物品]
-        await self.db.conn.execute(
-            "UPDATE players SET experience = experience + ?, gold = gold + ? WHERE user_id = ?",
-            (final_exp, final_gold, player.user_id)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            # 在事务内移出缓存：提交前其他协程无法把旧数据重新读入缓存
+            await self.db.evict_player(player.user_id)
+            await self.db.conn.execute(
+                "UPDATE players SET experience = experience + ?, gold = gold + ? WHERE user_id = ?",
+                (final_exp, final_gold, player.user_id)
+            )
 
         # 仅更新内存对象用于下方的消息显示
         player.experience += final_exp
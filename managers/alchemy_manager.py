@@ -197,7 +197,7 @@ class AlchemyManager:
             for material_name, required_count in materials.items():
                 if material_name == "灵石":
                     continue
-                current_count = self.storage_ring_manager.get_item_count(player, material_name)
+                current_count = await self.storage_ring_manager.get_item_count(player, material_name)
                 if current_count < required_count:
                     missing_materials.append(f"{material_name}（需要{required_count}，拥有{current_count}）")
         else:
@@ -234,9 +234,7 @@ class AlchemyManager:
             pill_name = recipe["name"]
             
             # 将丹药存入丹药背包
-            inventory = player.get_pills_inventory()
-            inventory[pill_name] = inventory.get(pill_name, 0) + 1
-            player.set_pills_inventory(inventory)
+            await self.db.ext.add_player_pill(player.user_id, pill_name, 1)
             
             await self.db.update_player(player)
             
@@ -92,25 +92,24 @@ class BankManager:
         if amount <= 0:
             return False, "存款金额必须大于0。"
         
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
             if not player:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "玩家数据异常，请稍后重试。"
             if player.gold < amount:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"灵石不足！你只有 {player.gold:,} 灵石。"
             
             bank_data = await self.db.ext.get_bank_account(player.user_id)
             current_balance = bank_data["balance"] if bank_data else 0
             
             if current_balance + amount > self.max_deposit:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"存款上限为 {self.max_deposit:,} 灵石，当前余额 {current_balance:,}。"
             
             player.gold -= amount
-            await self.db.update_player(player)
+            await self.db.update_player(player, flush=True)
             
             new_balance = current_balance + amount
             now = int(time.time())
@@ -122,26 +121,21 @@ class BankManager:
             
             await self._add_transaction(player.user_id, "deposit", amount, new_balance, "存入灵石")
             
-            await self.db.conn.commit()
             return True, f"成功存入 {amount:,} 灵石！\n当前余额：{new_balance:,} 灵石"
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
     
     async def withdraw(self, player: Player, amount: int) -> Tuple[bool, str]:
         """取出灵石"""
         if amount <= 0:
             return False, "取款金额必须大于0。"
         
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
             if not player:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "玩家数据异常，请稍后重试。"
             bank_data = await self.db.ext.get_bank_account(player.user_id)
             if not bank_data or bank_data["balance"] < amount:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 current = bank_data["balance"] if bank_data else 0
                 return False, f"余额不足！当前余额：{current:,} 灵石。"
             
@@ -153,15 +147,11 @@ class BankManager:
             )
             
             player.gold += amount
-            await self.db.update_player(player)
+            await self.db.update_player(player, flush=True)
             
             await self._add_transaction(player.user_id, "withdraw", -amount, new_balance, "取出灵石")
             
-            await self.db.conn.commit()
             return True, f"成功取出 {amount:,} 灵石！\n当前余额：{new_balance:,} 灵石\n当前持有：{player.gold:,} 灵石"
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
     
     async def claim_interest(self, player: Player) -> Tuple[bool, str]:
         """领取利息"""
@@ -228,15 +218,14 @@ class BankManager:
         if amount > self.max_loan_amount:
             return False, f"最大贷款金额为 {self.max_loan_amount:,} 灵石。"
         
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
             if not player:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "玩家数据异常，请稍后重试。"
             existing_loan = await self.db.ext.get_active_loan(player.user_id)
             if existing_loan:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "你已有未还清的贷款，请先还款后再申请新贷款。"
             
             if loan_type == "breakthrough":
@@ -256,7 +245,7 @@ class BankManager:
             )
             
             player.gold += amount
-            await self.db.update_player(player)
+            await self.db.update_player(player, flush=True)
             
             bank_data = await self.db.ext.get_bank_account(player.user_id)
             balance = bank_data["balance"] if bank_data else 0
@@ -265,7 +254,6 @@ class BankManager:
             total_interest = int(amount * interest_rate * duration_days)
             total_due = amount + total_interest
             
-            await self.db.conn.commit()
             return True, (
                 f"💰 {type_name}成功！\n"
                 f"━━━━━━━━━━━━━━━\n"
@@ -277,27 +265,23 @@ class BankManager:
                 f"当前持有：{player.gold:,} 灵石\n"
                 f"💀 逾期将被银行追杀致死！"
             )
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
     
     async def repay(self, player: Player) -> Tuple[bool, str]:
         """还款"""
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             player = await self.db.get_player_by_id(player.user_id)
             if not player:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "玩家数据异常，请稍后重试。"
             loan_info = await self.get_loan_info(player)
             if not loan_info:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "你当前没有需要偿还的贷款。"
             
             total_due = loan_info["total_due"]
             
             if player.gold < total_due:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, (
                     f"灵石不足！\n"
                     f"应还金额：{total_due:,} 灵石\n"
@@ -307,7 +291,7 @@ class BankManager:
                 )
             
             player.gold -= total_due
-            await self.db.update_player(player)
+            await self.db.update_player(player, flush=True)
             
             await self.db.ext.close_loan(loan_info["id"])
             
@@ -320,7 +304,6 @@ class BankManager:
             
             loan_type_name = "突破贷款" if loan_info["loan_type"] == "breakthrough" else "普通贷款"
             
-            await self.db.conn.commit()
             return True, (
                 f"✅ 还款成功！\n"
                 f"━━━━━━━━━━━━━━━\n"
@@ -331,9 +314,6 @@ class BankManager:
                 f"━━━━━━━━━━━━━━━\n"
                 f"当前持有：{player.gold:,} 灵石"
             )
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
     
     async def check_and_process_overdue_loans(self) -> List[dict]:
         """检查并处理逾期贷款 - 逾期玩家将被银行追杀致死
@@ -384,9 +364,18 @@ class BankManager:
             user_id, trans_type, amount, balance_after, description, now
         )
     
-    async def get_transactions(self, user_id: str, limit: int = 20) -> List[dict]:
-        """获取交易流水"""
-        return await self.db.ext.get_bank_transactions(user_id, limit)
+    async def get_transactions(self, user_id: str, limit: int = 20, page: int = 1) -> List[dict]:
+        """获取交易流水（从新到旧，page 为页码）
+
+        非第一页时先在索引上用 OFFSET 定位上一页最后一条作为 keyset 游标，再读取更早的 limit 条。
+        """
+        start = (max(1, page) - 1) * limit
+        before = None
+        if start:
+            before = await self.db.ext.get_bank_transaction_cursor(user_id, start)
+            if before is None:
+                return []
+        return await self.db.ext.get_bank_transactions(user_id, limit, before)
     
     # ===== 排行榜 =====
     
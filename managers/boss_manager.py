@@ -8,6 +8,7 @@ import random
 import time
 from typing import Tuple, Dict, Optional, List, TYPE_CHECKING
 from ..data.data_manager import DataBase
+from ..data.result_cache import cached_result
 from ..models_extended import Boss, UserStatus
 from ..models import Player
 from .combat_manager import CombatManager, CombatStats
@@ -193,39 +194,15 @@ ATK：{atk}
         # 4. 计算玩家战斗属性
         # 获取buff加成
         impart_info = await self.db.ext.get_impart_info(user_id)
-        hp_buff = impart_info.impart_hp_per if impart_info else 0.0
-        mp_buff = impart_info.impart_mp_per if impart_info else 0.0
-        atk_buff = impart_info.impart_atk_per if impart_info else 0.0
-        crit_rate_buff = impart_info.impart_know_per if impart_info else 0.0
         
-        # 计算HP/MP/ATK
+        # 计算HP/MP/ATK（未初始化时按修为计算）
+        player_stats = self._build_player_stats(player, impart_info)
         if player.hp == 0 or player.mp == 0:
-            # 如果没有初始化战斗属性，先计算
-            hp, mp = self.combat_mgr.calculate_hp_mp(player.experience, hp_buff, mp_buff)
-            atk = self.combat_mgr.calculate_atk(player.experience, player.atkpractice, atk_buff)
-            player.hp = hp
-            player.mp = mp
-            player.atk = atk
+            # 如果没有初始化战斗属性，保存计算结果
+            player.hp = player_stats.hp
+            player.mp = player_stats.mp
+            player.atk = player_stats.atk
             await self.db.update_player(player)
-        else:
-            # 使用现有属性
-            hp = player.hp
-            mp = player.mp
-            atk = player.atk
-        
-        # 创建玩家战斗属性
-        player_stats = CombatStats(
-            user_id=user_id,
-            name=player.user_name if player.user_name else f"道友{user_id[:6]}",
-            hp=hp,
-            max_hp=int(player.experience * (1 + hp_buff) // 2),
-            mp=mp,
-            max_mp=int(player.experience * (1 + mp_buff)),
-            atk=atk,
-            defense=0,  # 可以根据装备添加
-            crit_rate=int(crit_rate_buff * 100),  # 转换为百分比
-            exp=player.experience
-        )
         
         # 创建Boss战斗属性
         boss_stats = CombatStats(
@@ -242,25 +219,32 @@ ATK：{atk}
         )
         
         # 5. 开始战斗
-        battle_result = self.combat_mgr.player_vs_boss(player_stats, boss_stats)
+        battle_result = self.combat_mgr.player_vs_boss(
+            player_stats, boss_stats, summary=self.combat_mgr.summary_reports
+        )
         
-        # 6. 处理战斗结果
-        winner = battle_result["winner"]
-        reward = battle_result["reward"]
+        # 6. 结算伤害：原子扣减Boss气血，只有把Boss打到0的那一次算作击杀
+        damage = boss.hp - battle_result["boss_final_hp"]
+        applied, killed = await self.db.ext.apply_boss_damage(boss.boss_id, user_id, damage)
         
-        if winner == user_id:
-            # 玩家胜利
+        gold_gain = 0  # 本次挑战尚未发放的灵石（击杀奖励在瓜分时已直接发放）
+        if killed:
+            # 玩家击杀（并发挑战时，模拟中未胜利但补上最后一击也算击杀）
+            boss.hp = 0
             boss.status = 0  # 标记Boss为已击败
-            await self.db.ext.defeat_boss(boss.boss_id)
             
-            # 发放奖励
-            player.gold += reward
+            # 击杀奖励按伤害贡献瓜分给所有参与者，击杀者只拿自己的份额
+            shares = await self.db.ext.pay_boss_kill_rewards(boss.boss_id, boss.stone_reward, user_id)
+            reward = shares.get(str(user_id), 0)
+            battle_result["kill_shares"] = shares
             
             # 物品掉落
             item_msg = ""
             dropped_items = []
             if self.storage_ring_manager:
-                dropped_items = await self._roll_boss_drops(player, boss)
+                # 掉落由本场战斗的种子派生，按回放编号即可复核掉落结果
+                drop_rng = self.combat_mgr.derive_rng(battle_result["replay"].seed, "boss_drop")
+                dropped_items = await self._roll_boss_drops(player, boss, drop_rng)
                 if dropped_items:
                     item_lines = []
                     for item_name, count in dropped_items:
@@ -272,6 +256,8 @@ ATK：{atk}
                     if item_lines:
                         item_msg = "\n\n📦 获得物品：\n" + "\n".join(item_lines)
             
+            damage_msg = await self._format_damage_ranking(boss.boss_id, shares=shares)
+            
             result_msg = f"""
 🎉 挑战成功！
 ━━━━━━━━━━━━━━━
@@ -279,15 +265,18 @@ ATK：{atk}
 你成功击败了『{boss.boss_name}』！
 
 战斗回合数：{battle_result['rounds']}
-获得灵石：{reward}{item_msg}
+击杀奖励：{boss.stone_reward}灵石（按伤害贡献瓜分）
+获得灵石：{reward}{item_msg}{damage_msg}
 
 {player_stats.name}
 HP：{battle_result['player_final_hp']}/{player_stats.max_hp}
             """.strip()
-        else:
-            # 玩家失败
-            boss.hp = battle_result["boss_final_hp"]
-            await self.db.ext.update_boss(boss)
+        elif applied:
+            # 玩家失败，伤害已计入
+            reward = battle_result["reward"]
+            latest = await self.db.ext.get_boss_by_id(boss.boss_id)
+            if latest:
+                boss.hp = latest.hp
             
             result_msg = f"""
 💀 挑战失败
@@ -296,26 +285,116 @@ HP：{battle_result['player_final_hp']}/{player_stats.max_hp}
 你被『{boss.boss_name}』击败了！
 
 战斗回合数：{battle_result['rounds']}
+造成伤害：{damage}
 安慰奖：{reward}灵石
 
 {boss.boss_name} 剩余HP：{boss.hp}/{boss.max_hp}
             """.strip()
             
             # 即使失败也给予部分奖励
-            if reward > 0:
-                player.gold += reward
-        
-        # 更新玩家HP/MP
-        player.hp = battle_result["player_final_hp"]
-        player.mp = battle_result["player_final_mp"]
-        await self.db.update_player(player)
+            gold_gain = reward
+        else:
+            # 战斗期间Boss已被其他道友击杀，本次伤害不计入
+            reward = 0
+            result_msg = f"""
+⚔️ 来迟一步
+━━━━━━━━━━━━━━━
+
+战斗回合数：{battle_result['rounds']}
+『{boss.boss_name}』已被其他道友击败，本次伤害未计入。
+            """.strip()
         
-        # 返回完整战斗日志
-        combat_log = "\n".join(battle_result["combat_log"])
-        full_msg = combat_log + "\n\n" + result_msg
+        battle_result["reward"] = reward
+        battle_result["killed"] = killed
+        
+        # 更新玩家灵石与HP/MP：在事务中重新读取后修改，
+        # 不会覆盖并发击杀时按贡献直接发放给本玩家的灵石
+        async with self.db.transaction():
+            latest = await self.db.get_player_by_id(user_id) or player
+            latest.gold += gold_gain
+            latest.hp = battle_result["player_final_hp"]
+            latest.mp = battle_result["player_final_mp"]
+            await self.db.update_player(latest)
+        
+        # 保存战斗回放
+        replay_id = None
+        if self.combat_mgr.replay_keep > 0:
+            replay_id = await self.db.ext.save_combat_replay(
+                **vars(battle_result["replay"]), keep=self.combat_mgr.replay_keep
+            )
+        
+        # 已保存回放时只返回战况摘要，完整过程用「战斗回放」查看
+        combat_log = self.combat_mgr.format_report(battle_result["combat_log"], replay_id)
+        full_msg = combat_log + "\n\n" + result_msg + self.combat_mgr.format_replay_hint(replay_id)
         
         return True, full_msg, battle_result
     
+    async def _format_damage_ranking(self, boss_id: int, limit: int = 5,
+                                     shares: Optional[Dict[str, int]] = None) -> str:
+        """格式化Boss伤害贡献排行（击杀消息中展示，附各自分得的击杀奖励）"""
+        ranking = await self.db.ext.get_boss_damage_ranking(boss_id, limit)
+        if not ranking:
+            return ""
+        names = await self.db.get_player_names([row["user_id"] for row in ranking])
+        shares = shares or {}
+        lines = [
+            f"  {i}. {names.get(row['user_id']) or row['user_id'][:6]} - {row['damage']:,}（{row['hits']}次）"
+            + (f"，分得 {shares[row['user_id']]:,} 灵石" if row["user_id"] in shares else "")
+            for i, row in enumerate(ranking, 1)
+        ]
+        return "\n\n⚔️ 伤害排行：\n" + "\n".join(lines)
+    
+    def _build_player_stats(self, player: Player, impart_info) -> CombatStats:
+        """根据玩家数据与传承加成生成战斗属性（未初始化的三维按修为计算，不修改玩家）"""
+        hp_buff = impart_info.impart_hp_per if impart_info else 0.0
+        mp_buff = impart_info.impart_mp_per if impart_info else 0.0
+        atk_buff = impart_info.impart_atk_per if impart_info else 0.0
+        crit_rate_buff = impart_info.impart_know_per if impart_info else 0.0
+        
+        if player.hp == 0 or player.mp == 0:
+            hp, mp = self.combat_mgr.calculate_hp_mp(player.experience, hp_buff, mp_buff)
+            atk = self.combat_mgr.calculate_atk(player.experience, player.atkpractice, atk_buff)
+        else:
+            hp, mp, atk = player.hp, player.mp, player.atk
+        
+        return CombatStats(
+            user_id=player.user_id,
+            name=player.user_name if player.user_name else f"道友{player.user_id[:6]}",
+            hp=hp,
+            max_hp=int(player.experience * (1 + hp_buff) // 2),
+            mp=mp,
+            max_mp=int(player.experience * (1 + mp_buff)),
+            atk=atk,
+            defense=0,  # 可以根据装备添加
+            crit_rate=int(crit_rate_buff * 100),  # 转换为百分比
+            exp=player.experience
+        )
+    
+    async def get_win_preview(self, player: Player, boss_id: int) -> str:
+        """预估玩家挑战指定Boss的胜率（未启用或Boss已被击败时返回空字符串）
+
+        Boss详情来自结果缓存，其中的气血可能落后于并发挑战的原子扣减，
+        这里重新读取Boss，按当前剩余气血模拟。
+        """
+        boss = await self.db.ext.get_boss_by_id(boss_id)
+        if not boss or boss.status != 1:
+            return ""
+        impart_info = await self.db.ext.get_impart_info(player.user_id)
+        player_stats = self._build_player_stats(player, impart_info)
+        boss_stats = CombatStats(
+            user_id=str(boss.boss_id),
+            name=boss.boss_name,
+            hp=boss.hp,
+            max_hp=boss.max_hp,
+            mp=boss.max_hp,
+            max_mp=boss.max_hp,
+            atk=boss.atk,
+            defense=boss.defense,
+        )
+        preview = await self.combat_mgr.preview_boss_fight(player_stats, boss_stats)
+        return self.combat_mgr.format_preview(preview)
+    
+    @cached_result("boss")
     async def get_boss_info(self, boss_id: int = 0) -> Tuple[bool, str, Optional[Boss]]:
         """
         获取Boss信息
@@ -398,16 +477,18 @@ ATK：{boss.atk:,}
         if len(existing_bosses) >= max_bosses:
             return False, f"当前已有 {len(existing_bosses)} 个Boss存在", None
         
-        # 获取所有玩家的平均等级
-        all_players = await self.db.get_all_players()
-        if not all_players:
+        # 计算所有玩家的平均修为（流式扫描，只读取修为列）
+        scanned = 0
+        total_exp = 0
+        async for p in self.db.iter_players(columns=("experience",)):
+            scanned += 1
+            total_exp += p.experience
+        if not scanned:
             # 没有玩家，生成低级Boss
             level_config = self.levels[0]
             base_exp = 50000
         else:
-            # 计算平均修为
-            total_exp = sum(p.experience for p in all_players)
-            avg_exp = total_exp // len(all_players) if all_players else 50000
+            avg_exp = total_exp // scanned
             
             # 根据平均修为选择Boss等级
             for config in reversed(self.levels):
@@ -423,13 +504,14 @@ ATK：{boss.atk:,}
         # 生成Boss
         return await self.spawn_boss(base_exp, level_config)
     
-    async def _roll_boss_drops(self, player: Player, boss: Boss) -> List[Tuple[str, int]]:
+    async def _roll_boss_drops(self, player: Player, boss: Boss, rng=random) -> List[Tuple[str, int]]:
         """
         根据Boss等级随机掉落物品
         
         Args:
             player: 玩家对象
             boss: Boss对象
+            rng: 随机数来源（random 模块或由战斗种子派生的 random.Random）
             
         Returns:
             掉落物品列表 [(物品名, 数量), ...]
@@ -452,26 +534,26 @@ ATK：{boss.atk:,}
         
         # Boss击杀100%掉落至少1件物品
         total_weight = sum(item["weight"] for item in drop_table)
-        roll = random.randint(1, total_weight)
+        roll = rng.randint(1, total_weight)
         
         current_weight = 0
         for item in drop_table:
             current_weight += item["weight"]
             if roll <= current_weight:
-                count = random.randint(item["min"], item["max"])
+                count = rng.randint(item["min"], item["max"])
                 dropped_items.append((item["name"], count))
                 break
         
         # 高级Boss有70%概率额外掉落
         if boss_level_index >= 9:  # 元婴及以上
             extra_chance = 50 if boss_level_index < 15 else 70
-            if random.randint(1, 100) <= extra_chance:
-                roll = random.randint(1, total_weight)
+            if rng.randint(1, 100) <= extra_chance:
+                roll = rng.randint(1, total_weight)
                 current_weight = 0
                 for item in drop_table:
                     current_weight += item["weight"]
                     if roll <= current_weight:
-                        count = random.randint(item["min"], item["max"])
+                        count = rng.randint(item["min"], item["max"])
                         dropped_items.append((item["name"], count))
                         break
         
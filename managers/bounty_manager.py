@@ -127,12 +127,11 @@ class BountyManager:
             reward = int(template["base_reward"] * level_multiplier * (count / template["min_count"]))
         
         # 使用事务保护，防止并发重复接取
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             # 事务内再次检查是否已有进行中的任务
             active = await self.db.ext.get_active_bounty(player.user_id)
             if active:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"你已有进行中的悬赏：{active['bounty_name']}，请先完成或放弃。"
             
             # 检查放弃冷却
@@ -142,7 +141,7 @@ class BountyManager:
                 cd_time = int(cd_value)
                 now = int(time.time())
                 if now < cd_time:
-                    await self.db.conn.rollback()
+                    await tx.rollback()
                     remaining = (cd_time - now) // 60
                     return False, f"你刚放弃了悬赏任务，还需等待 {remaining} 分钟才能接取新任务。"
             
@@ -161,7 +160,6 @@ class BountyManager:
                 (player.user_id, bounty_id, template["name"], template["type"], 
                  count, rewards_json, int(time.time()), expire_time)
             )
-            await self.db.conn.commit()
             
             return True, (
                 f"🎯 接取悬赏成功！\n"
@@ -170,9 +168,6 @@ class BountyManager:
                 f"奖励：{reward:,} 灵石 + {reward * 10:,} 修为\n"
                 f"时限：{template['cooldown'] // 60} 分钟"
             )
-        except Exception:
-            await self.db.conn.rollback()
-            raise
     
     async def check_bounty_status(self, player: Player) -> Tuple[bool, str]:
         """查看悬赏任务状态"""
@@ -201,12 +196,11 @@ class BountyManager:
     async def complete_bounty(self, player: Player) -> Tuple[bool, str]:
         """完成悬赏任务（事务保护）"""
         # 使用事务保护，防止并发领取和奖励发放不一致
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             # 重新获取任务状态（事务内）
             active = await self.db.ext.get_active_bounty(player.user_id)
             if not active:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, "你当前没有进行中的悬赏任务。"
             
             # 检查是否超时
@@ -215,14 +209,13 @@ class BountyManager:
                     "UPDATE bounty_tasks SET status = 0 WHERE user_id = ? AND status = 1",
                     (player.user_id,)
                 )
-                await self.db.conn.commit()
                 return False, "悬赏任务已超时，自动取消。"
             
             # 检查任务进度是否达到目标
             progress = active.get("current_progress", 0)
             target = active.get("target_count", 1)
             if progress < target:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, (
                     f"❌ 任务尚未完成！\n"
                     f"任务：{active['bounty_name']}\n"
@@ -245,17 +238,11 @@ class BountyManager:
             MAX_VALUE = 2**63 - 1  # SQLite INTEGER 最大值
             player.gold = min(player.gold + stone_reward, MAX_VALUE)
             player.experience = min(player.experience + exp_reward, MAX_VALUE)
+            await self.db.evict_player(player.user_id)
             await self.db.conn.execute(
                 "UPDATE players SET gold = ?, experience = ? WHERE user_id = ?",
                 (player.gold, player.experience, player.user_id)
             )
-            
-            # 提交事务
-            await self.db.conn.commit()
-            
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
         
         # 物品奖励（事务外处理，失败不影响主奖励）
         item_msg = ""
@@ -365,17 +352,16 @@ class BountyManager:
             return False, ""
         
         # 使用事务保护，防止并发刷进度
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             # 事务内获取最新状态
             active = await self.db.ext.get_active_bounty(player.user_id)
             if not active:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, ""
             
             # 检查是否超时
             if int(time.time()) > active["expire_time"]:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, ""
             
             bounty_type = active.get("target_type", "")
@@ -384,12 +370,12 @@ class BountyManager:
             
             # 如果已完成则不再增加
             if current_progress >= target:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, ""
             
             valid_types = type_mapping.get(activity_type, [])
             if bounty_type not in valid_types:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, ""
             
             # 原子更新进度（使用SQL计算，防止TOCTOU）
@@ -398,15 +384,11 @@ class BountyManager:
                 "UPDATE bounty_tasks SET current_progress = ? WHERE user_id = ? AND status = 1 AND current_progress = ?",
                 (new_progress, player.user_id, current_progress)
             )
-            await self.db.conn.commit()
             
             if new_progress >= target:
                 return True, f"\n\n📜 悬赏【{active['bounty_name']}】已完成！使用 /完成悬赏 领取奖励"
             else:
                 return True, f"\n\n📜 悬赏进度：{new_progress}/{target}"
-        except Exception:
-            await self.db.conn.rollback()
-            raise
     
     async def check_and_expire_bounties(self) -> int:
         """检查并处理过期悬赏任务
@@ -417,11 +399,11 @@ class BountyManager:
         now = int(time.time())
         
         # 将过期的进行中任务标记为失败(status=3)
-        cursor = await self.db.conn.execute(
-            "UPDATE bounty_tasks SET status = 3 WHERE status = 1 AND expire_time < ?",
-            (now,)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            cursor = await self.db.conn.execute(
+                "UPDATE bounty_tasks SET status = 3 WHERE status = 1 AND expire_time < ?",
+                (now,)
+            )
         
         # 返回受影响的行数
         return cursor.rowcount
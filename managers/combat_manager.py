@@ -4,10 +4,61 @@
 参照NoneBot2插件的player_fight.py实现
 """
 
+import asyncio
+import math
 import random
-from typing import Tuple, Dict, Optional, List
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Tuple, Dict, Optional, List, Iterator
 from dataclasses import dataclass
 
+# 战斗结果
+OUTCOME_FIRST = 0  # 先手方（玩家1/挑战者）胜
+OUTCOME_SECOND = 1  # 后手方（玩家2/Boss）胜
+OUTCOME_DRAW = 2  # 平局（回合数用尽或同归于尽）
+
+MAX_ROUNDS = 100  # 最大回合数，防止无限循环
+BOSS_CRIT_RATE = 30  # Boss固定会心率
+SEED_BITS = 63  # 战斗随机种子位数（可直接存入 SQLite INTEGER）
+
+# 胜率预估：玩家气血/攻击按 2% 分档，同档属性共用一次模拟结果
+PREVIEW_BUCKET_RATIO = 1.02
+PREVIEW_CACHE_SIZE = 512
+
+# 攻击波动：round(uniform(0.95, 1.05), 2) 只有 0.95~1.05 这11个取值
+ROLL_LOW, ROLL_HIGH = 0.95, 1.05
+ROLL_SPAN = ROLL_HIGH - ROLL_LOW  # random.uniform 的计算方式：low + (high - low) * random()
+ROLL_VALUES = [round(k / 100, 2) for k in range(95, 106)]
+
+
+def _round2_boundary(value: float) -> float:
+    """最小的浮点数 x 使 round(x, 2) >= value（二分到相邻浮点数）"""
+    low, high = value - 0.01, value
+    while math.nextafter(low, math.inf) < high:
+        mid = (low + high) / 2
+        if round(mid, 2) >= value:
+            high = mid
+        else:
+            low = mid
+    return high
+
+
+# ROLL_VALUES[bisect_right(ROLL_BOUNDS, x)] == round(x, 2)，对 [0.95, 1.05] 内的每个浮点数都成立
+ROLL_BOUNDS = [_round2_boundary(value) for value in ROLL_VALUES[1:]]
+
+
+def _stat_bucket(value: int) -> int:
+    """把属性值归入 2% 宽的档位，返回该档的下限（用于胜率预估的缓存键）
+
+    按下限模拟，预估胜率只会略低于实际，不会让玩家高估自己。
+    """
+    if value <= 0:
+        return 0
+    step = math.floor(math.log(value) / math.log(PREVIEW_BUCKET_RATIO))
+    return max(1, min(value, int(PREVIEW_BUCKET_RATIO ** step)))
+
+
 @dataclass
 class CombatStats:
     """战斗属性"""
@@ -23,9 +74,130 @@ class CombatStats:
     exp: int = 0  # 修为（用于计算攻击力）
 
 
+@dataclass
+class CombatReplay:
+    """战斗回放：随机种子与开战时双方的属性，足以重新生成完整战斗过程"""
+    kind: str  # "pvp" 或 "boss"
+    seed: int
+    first: Dict  # 先手方 CombatStats 字段
+    second: Dict  # 后手方 CombatStats 字段
+    combat_type: int = 1  # PvP战斗类型（1=切磋，2=决斗）
+
+
+class CombatLog:
+    """战斗日志
+
+    战斗过程中每次攻击只记录一个整数（伤害 << 1 | 是否会心），按先手、后手交替排列，
+    剩余HP由开场数值回放得到；需要显示时才渲染为文本行（结果缓存）。
+    可以像字符串列表一样遍历、取长度和下标，"\\n".join(log) 与原来的日志列表一致。
+    summary=True 时不记录回合事件，只能渲染开场与结局；render_summary() 只需要回合数与最终HP，
+    战报发送摘要，完整过程由战斗回放重新生成。
+    """
+
+    __slots__ = ("kind", "names", "intro", "events", "outcome", "reward", "rounds", "final_hp", "_lines")
+
+    def __init__(self, kind: str, first: CombatStats, second: CombatStats, summary: bool = False):
+        self.kind = kind  # "pvp" 或 "boss"
+        self.names = (first.name, second.name)
+        self.intro = (first.hp, first.max_hp, first.atk, second.hp, second.max_hp, second.atk)
+        self.events: Optional[array] = None if summary else array("q")
+        self.outcome = OUTCOME_DRAW
+        self.reward = 0  # Boss战失败时的安慰奖
+        self.rounds = 0  # 战斗回合数
+        self.final_hp = (first.hp, second.hp)  # 战斗结束时双方的HP
+        self._lines: Optional[List[str]] = None
+
+    def _header(self) -> List[str]:
+        name1, name2 = self.names
+        if self.kind == "boss":
+            return ["☆━━━━ Boss战开始 ━━━━☆", f"{name1} 挑战 {name2}"]
+        return ["☆━━━━ 战斗开始 ━━━━☆", f"{name1} VS {name2}"]
+
+    def _outcome_lines(self) -> List[str]:
+        name1, name2 = self.names
+        if self.kind == "boss":
+            if self.outcome == OUTCOME_FIRST:
+                return [f"☆━━━━ {name1} 击败了 {name2}！━━━━☆"]
+            if self.outcome == OUTCOME_SECOND:
+                return [f"☆━━━━ {name1} 被 {name2} 击败！━━━━☆", f"虽败犹荣，获得 {self.reward} 灵石作为奖励"]
+            return ["☆━━━━ 战斗超时，平局！━━━━☆"]
+        if self.outcome == OUTCOME_FIRST:
+            return [f"☆━━━━ {name1} 胜利！━━━━☆"]
+        if self.outcome == OUTCOME_SECOND:
+            return [f"☆━━━━ {name2} 胜利！━━━━☆"]
+        return ["☆━━━━ 平局！━━━━☆"]
+
+    def render_summary(self) -> List[str]:
+        """渲染战报摘要：对阵双方、回合数、最终HP与胜负（不需要回合事件）"""
+        name1, name2 = self.names
+        _, max_hp1, _, _, max_hp2, _ = self.intro
+        hp1, hp2 = self.final_hp
+        return self._header() + [
+            f"共 {self.rounds} 回合",
+            f"{name1}：HP {max(0, hp1)}/{max_hp1}",
+            f"{name2}：HP {max(0, hp2)}/{max_hp2}",
+            "",
+        ] + self._outcome_lines()
+
+    def render(self) -> List[str]:
+        """渲染为文本行"""
+        if self._lines is not None:
+            return self._lines
+        name1, name2 = self.names
+        hp1, max_hp1, atk1, hp2, max_hp2, atk2 = self.intro
+        lines = self._header()
+        lines += [f"{name1}：HP {hp1}/{max_hp1}，ATK {atk1}", f"{name2}：HP {hp2}/{max_hp2}，ATK {atk2}", ""]
+
+        for i, event in enumerate(self.events or ()):
+            damage, is_crit = event >> 1, event & 1
+            if i % 2 == 0:
+                lines.append(f"-- 第 {i // 2 + 1} 回合 --")
+                attacker, defender = name1, name2
+                hp2 -= damage
+                remaining = hp2
+            else:
+                attacker, defender = name2, name1
+                hp1 -= damage
+                remaining = hp1
+            if is_crit:
+                lines.append(f"{attacker} 发起会心一击，造成 {damage} 点伤害！")
+            else:
+                lines.append(f"{attacker} 发起攻击，造成 {damage} 点伤害")
+            lines.append(f"{defender} 剩余 HP: {max(0, remaining)}")
+            if i % 2 == 1:
+                lines.append("")
+
+        lines += self._outcome_lines()
+        self._lines = lines
+        return lines
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.render())
+
+    def __len__(self) -> int:
+        return len(self.render())
+
+    def __getitem__(self, index):
+        return self.render()[index]
+
+    def __str__(self) -> str:
+        return "\n".join(self.render())
+
+
 class CombatManager:
     """战斗系统管理器"""
     
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Args:
+            config: PERFORMANCE 配置（读取 COMBAT_PREVIEW_TRIALS、COMBAT_REPLAY_KEEP）
+        """
+        config = config or {}
+        self.preview_trials = max(0, int(config.get("COMBAT_PREVIEW_TRIALS", 2000)))
+        self.replay_keep = max(0, int(config.get("COMBAT_REPLAY_KEEP", 5000)))
+        # 缓存键 -> 模拟任务（完成后即为结果，并发的相同查询等待同一个任务）
+        self._preview_cache: "OrderedDict[tuple, asyncio.Future]" = OrderedDict()
+    
     @staticmethod
     def calculate_hp_mp(experience: int, hp_buff: float = 0.0, mp_buff: float = 0.0) -> Tuple[int, int]:
         """
@@ -111,12 +283,82 @@ class CombatManager:
         final_damage = int(damage * (1 - reduction_rate))
         return max(1, final_damage)
     
+    @staticmethod
+    def _damage_table(atk: int, defense: int) -> List[int]:
+        """一方攻击另一方时每种波动取值对应的最终伤害：下标 k 为普通攻击，11 + k 为会心一击
+
+        与 calculate_turn_attack + apply_damage_reduction 的计算顺序相同。
+        """
+        table = []
+        for is_crit in (False, True):
+            for roll in ROLL_VALUES:
+                damage = int(roll * atk)
+                if is_crit:
+                    damage = int(damage * 1.5)
+                table.append(CombatManager.apply_damage_reduction(damage, defense))
+        return table
+
+    @classmethod
+    def _fight(cls, first: CombatStats, second: CombatStats, second_crit: int,
+               events: Optional[array], rng=random) -> Tuple[int, int]:
+        """双方交替攻击直到一方HP归零或回合数用尽（先手先攻）
+
+        与逐次调用 calculate_turn_attack + apply_damage_reduction 的结果完全一致
+        （随机数的调用次数与顺序相同），但每次攻击的伤害由预先算好的伤害表查出，
+        战斗日志只追加整数事件。双方的 hp 在结束时写回。
+
+        Args:
+            second_crit: 后手方的会心率（Boss战固定为 BOSS_CRIT_RATE）
+            events: 记录攻击事件的数组，None 表示不记录（摘要模式）
+            rng: 随机数来源（random 模块或 random.Random 实例）
+
+        Returns:
+            (回合数, 先手方造成的总伤害)
+        """
+        rand = rng.random
+        randint = rng.randint
+        bounds = ROLL_BOUNDS
+        push = events.append if events is not None else None
+        table1 = cls._damage_table(first.atk, second.defense)
+        table2 = cls._damage_table(second.atk, first.defense)
+        hp1, crit1 = first.hp, first.crit_rate
+        hp2, crit2 = second.hp, second_crit
+        rounds = 0
+        dealt = 0
+
+        while hp1 > 0 and hp2 > 0 and rounds < MAX_ROUNDS:
+            rounds += 1
+
+            # 先手攻击
+            roll = bisect_right(bounds, ROLL_LOW + ROLL_SPAN * rand())
+            crit = randint(0, 100) <= crit1
+            damage = table1[roll + 11 if crit else roll]
+            hp2 -= damage
+            dealt += damage
+            if push:
+                push(damage << 1 | crit)
+            if hp2 <= 0:
+                break
+
+            # 后手攻击
+            roll = bisect_right(bounds, ROLL_LOW + ROLL_SPAN * rand())
+            crit = randint(0, 100) <= crit2
+            damage = table2[roll + 11 if crit else roll]
+            hp1 -= damage
+            if push:
+                push(damage << 1 | crit)
+
+        first.hp, second.hp = hp1, hp2
+        return rounds, dealt
+
     @classmethod
     def player_vs_player(
         cls,
         player1: CombatStats,
         player2: CombatStats,
-        combat_type: int = 1
+        combat_type: int = 1,
+        summary: bool = False,
+        seed: Optional[int] = None
     ) -> Dict:
         """
         玩家vs玩家战斗
@@ -125,66 +367,35 @@ class CombatManager:
             player1: 玩家1战斗属性
             player2: 玩家2战斗属性
             combat_type: 战斗类型（1=切磋不消耗HP/MP，2=决斗消耗HP/MP）
+            summary: 摘要模式，不记录回合过程（调用方不显示战斗日志时使用）
+            seed: 本场战斗的随机种子，None 时随机生成
             
         Returns:
             战斗结果字典，包含：
             - winner: 获胜者user_id
-            - combat_log: 战斗日志列表
+            - combat_log: 战斗日志（CombatLog，遍历时才渲染为文本行）
             - player1_final_hp: 玩家1最终HP
             - player1_final_mp: 玩家1最终MP
             - player2_final_hp: 玩家2最终HP
             - player2_final_mp: 玩家2最终MP
+            - replay: 战斗回放（CombatReplay）
         """
-        combat_log = []
-        combat_log.append(f"☆━━━━ 战斗开始 ━━━━☆")
-        combat_log.append(f"{player1.name} VS {player2.name}")
-        combat_log.append(f"{player1.name}：HP {player1.hp}/{player1.max_hp}，ATK {player1.atk}")
-        combat_log.append(f"{player2.name}：HP {player2.hp}/{player2.max_hp}，ATK {player2.atk}")
-        combat_log.append("")
-        
-        round_num = 0
-        max_rounds = 100  # 最大回合数，防止无限循环
-        
-        while player1.hp > 0 and player2.hp > 0 and round_num < max_rounds:
-            round_num += 1
-            combat_log.append(f"-- 第 {round_num} 回合 --")
-            
-            # 玩家1攻击
-            is_crit1, damage1 = cls.calculate_turn_attack(player1.atk, player1.crit_rate)
-            damage1 = cls.apply_damage_reduction(damage1, player2.defense)
-            player2.hp -= damage1
-            
-            if is_crit1:
-                combat_log.append(f"{player1.name} 发起会心一击，造成 {damage1} 点伤害！")
-            else:
-                combat_log.append(f"{player1.name} 发起攻击，造成 {damage1} 点伤害")
-            combat_log.append(f"{player2.name} 剩余 HP: {max(0, player2.hp)}")
-            
-            if player2.hp <= 0:
-                break
-            
-            # 玩家2攻击
-            is_crit2, damage2 = cls.calculate_turn_attack(player2.atk, player2.crit_rate)
-            damage2 = cls.apply_damage_reduction(damage2, player1.defense)
-            player1.hp -= damage2
-            
-            if is_crit2:
-                combat_log.append(f"{player2.name} 发起会心一击，造成 {damage2} 点伤害！")
-            else:
-                combat_log.append(f"{player2.name} 发起攻击，造成 {damage2} 点伤害")
-            combat_log.append(f"{player1.name} 剩余 HP: {max(0, player1.hp)}")
-            combat_log.append("")
+        seed = cls.new_seed() if seed is None else seed
+        replay = CombatReplay("pvp", seed, vars(player1).copy(), vars(player2).copy(), combat_type)
+        combat_log = CombatLog("pvp", player1, player2, summary)
+        round_num, _ = cls._fight(player1, player2, player2.crit_rate, combat_log.events, random.Random(seed))
+        combat_log.rounds = round_num
+        combat_log.final_hp = (player1.hp, player2.hp)
         
         # 判断胜负
         if player1.hp > 0:
             winner = player1.user_id
-            combat_log.append(f"☆━━━━ {player1.name} 胜利！━━━━☆")
+            combat_log.outcome = OUTCOME_FIRST
         elif player2.hp > 0:
             winner = player2.user_id
-            combat_log.append(f"☆━━━━ {player2.name} 胜利！━━━━☆")
+            combat_log.outcome = OUTCOME_SECOND
         else:
             winner = "平局"
-            combat_log.append(f"☆━━━━ 平局！━━━━☆")
         
         # 如果是切磋，不消耗HP/MP
         if combat_type == 1:
@@ -206,14 +417,17 @@ class CombatManager:
             "player1_final_mp": player1_final_mp,
             "player2_final_hp": player2_final_hp,
             "player2_final_mp": player2_final_mp,
-            "rounds": round_num
+            "rounds": round_num,
+            "replay": replay
         }
     
     @classmethod
     def player_vs_boss(
         cls,
         player: CombatStats,
-        boss: CombatStats
+        boss: CombatStats,
+        summary: bool = False,
+        seed: Optional[int] = None
     ) -> Dict:
         """
         玩家vs Boss战斗
@@ -221,69 +435,37 @@ class CombatManager:
         Args:
             player: 玩家战斗属性
             boss: Boss战斗属性
+            summary: 摘要模式，不记录回合过程（调用方不显示战斗日志时使用）
+            seed: 本场战斗的随机种子，None 时随机生成
             
         Returns:
-            战斗结果字典
+            战斗结果字典（replay 为战斗回放）
         """
-        combat_log = []
-        combat_log.append(f"☆━━━━ Boss战开始 ━━━━☆")
-        combat_log.append(f"{player.name} 挑战 {boss.name}")
-        combat_log.append(f"{player.name}：HP {player.hp}/{player.max_hp}，ATK {player.atk}")
-        combat_log.append(f"{boss.name}：HP {boss.hp}/{boss.max_hp}，ATK {boss.atk}")
-        combat_log.append("")
-        
-        round_num = 0
-        max_rounds = 100
-        total_damage_dealt = 0  # 玩家造成的总伤害（用于失败时计算奖励）
-        
-        while player.hp > 0 and boss.hp > 0 and round_num < max_rounds:
-            round_num += 1
-            combat_log.append(f"-- 第 {round_num} 回合 --")
-            
-            # 玩家攻击
-            is_crit, damage = cls.calculate_turn_attack(player.atk, player.crit_rate)
-            # Boss可能有减伤
-            damage = cls.apply_damage_reduction(damage, boss.defense)
-            boss.hp -= damage
-            total_damage_dealt += damage
-            
-            if is_crit:
-                combat_log.append(f"{player.name} 发起会心一击，造成 {damage} 点伤害！")
-            else:
-                combat_log.append(f"{player.name} 发起攻击，造成 {damage} 点伤害")
-            combat_log.append(f"{boss.name} 剩余 HP: {max(0, boss.hp)}")
-            
-            if boss.hp <= 0:
-                break
-            
-            # Boss攻击
-            is_boss_crit, boss_damage = cls.calculate_turn_attack(boss.atk, 30)  # Boss固定30会心率
-            boss_damage = cls.apply_damage_reduction(boss_damage, player.defense)
-            player.hp -= boss_damage
-            
-            if is_boss_crit:
-                combat_log.append(f"{boss.name} 发起会心一击，造成 {boss_damage} 点伤害！")
-            else:
-                combat_log.append(f"{boss.name} 发起攻击，造成 {boss_damage} 点伤害")
-            combat_log.append(f"{player.name} 剩余 HP: {max(0, player.hp)}")
-            combat_log.append("")
+        seed = cls.new_seed() if seed is None else seed
+        replay = CombatReplay("boss", seed, vars(player).copy(), vars(boss).copy())
+        combat_log = CombatLog("boss", player, boss, summary)
+        # 玩家造成的总伤害（用于失败时计算奖励）
+        round_num, total_damage_dealt = cls._fight(
+            player, boss, BOSS_CRIT_RATE, combat_log.events, random.Random(seed)
+        )
+        combat_log.rounds = round_num
+        combat_log.final_hp = (player.hp, boss.hp)
         
         # 判断胜负和奖励
         if boss.hp <= 0:
             winner = player.user_id
-            combat_log.append(f"☆━━━━ {player.name} 击败了 {boss.name}！━━━━☆")
+            combat_log.outcome = OUTCOME_FIRST
             reward = boss.exp  # 完整奖励
         elif player.hp <= 0:
             winner = boss.user_id
-            combat_log.append(f"☆━━━━ {player.name} 被 {boss.name} 击败！━━━━☆")
+            combat_log.outcome = OUTCOME_SECOND
             # 失败时根据造成的伤害比例获得部分奖励
             damage_ratio = total_damage_dealt / boss.max_hp
             reward = int(boss.exp * damage_ratio)
-            combat_log.append(f"虽败犹荣，获得 {reward} 灵石作为奖励")
+            combat_log.reward = reward
         else:
             winner = "平局"
             reward = 0
-            combat_log.append(f"☆━━━━ 战斗超时，平局！━━━━☆")
         
         return {
             "winner": winner,
@@ -292,5 +474,123 @@ class CombatManager:
             "player_final_mp": player.mp,
             "boss_final_hp": max(0, boss.hp),
             "reward": reward,
-            "rounds": round_num
+            "rounds": round_num,
+            "replay": replay
+        }
+    
+    @property
+    def summary_reports(self) -> bool:
+        """保存回放时战报只发送摘要，战斗可用摘要模式进行（不记录回合事件）"""
+        return self.replay_keep > 0
+
+    @staticmethod
+    def format_report(combat_log: CombatLog, replay_id: Optional[int]) -> str:
+        """战报正文：已保存回放时只发送摘要（完整过程由「战斗回放」按需重新生成），否则发送完整日志"""
+        if replay_id:
+            return "\n".join(combat_log.render_summary())
+        return "\n".join(combat_log)
+
+    @staticmethod
+    def format_replay_hint(replay_id: Optional[int]) -> str:
+        """战报末尾的回放提示（未保存回放时返回空字符串）"""
+        if not replay_id:
+            return ""
+        return f"\n\n📼 回放编号：{replay_id}（发送「战斗回放 {replay_id}」可重新查看）"
+    
+    @staticmethod
+    def new_seed() -> int:
+        """生成一场战斗的随机种子"""
+        return random.getrandbits(SEED_BITS)
+
+    @staticmethod
+    def derive_rng(seed: int, purpose: str) -> random.Random:
+        """由战斗种子派生战后结算（掉落等）用的独立随机流，同一种子总能得到相同结果"""
+        return random.Random(f"{purpose}:{seed}")
+
+    @classmethod
+    def replay(cls, replay: CombatReplay) -> Dict:
+        """按随机种子与开战属性重新进行一场战斗，得到与原战斗完全相同的过程与结果"""
+        first = CombatStats(**replay.first)
+        second = CombatStats(**replay.second)
+        if replay.kind == "boss":
+            return cls.player_vs_boss(first, second, seed=replay.seed)
+        return cls.player_vs_player(first, second, replay.combat_type, seed=replay.seed)
+    
+    @classmethod
+    def simulate_boss_fights(cls, player: CombatStats, boss: CombatStats, trials: int,
+                             rng=random) -> Dict:
+        """模拟多场玩家vs Boss战斗，统计胜率与平均回合数（不修改传入的属性）
+        
+        Returns:
+            {"win_rate", "draw_rate", "expected_rounds", "trials"}
+        """
+        first = CombatStats(**vars(player))
+        second = CombatStats(**vars(boss))
+        wins = draws = total_rounds = 0
+        for _ in range(trials):
+            first.hp, second.hp = player.hp, boss.hp
+            rounds, _ = cls._fight(first, second, BOSS_CRIT_RATE, None, rng)
+            total_rounds += rounds
+            if second.hp <= 0:
+                wins += 1
+            elif first.hp > 0:
+                draws += 1
+        trials = max(trials, 1)
+        return {
+            "win_rate": wins / trials,
+            "draw_rate": draws / trials,
+            "expected_rounds": total_rounds / trials,
+            "trials": trials,
         }
+    
+    @staticmethod
+    def format_preview(preview: Optional[Dict]) -> str:
+        """格式化胜率预估（未启用时返回空字符串）"""
+        if not preview:
+            return ""
+        return (f"📈 胜率预估：{preview['win_rate']:.0%}"
+                f"（平均{preview['expected_rounds']:.1f}回合，模拟{preview['trials']}场）")
+    
+    async def preview_boss_fight(self, player: CombatStats, boss: CombatStats) -> Optional[Dict]:
+        """预估玩家挑战Boss的胜率（在线程中模拟，不阻塞事件循环）
+        
+        玩家气血与攻击按 2% 分档后模拟，结果按（玩家属性档位, Boss属性）缓存，
+        属性相近的玩家查看同一个Boss时直接复用。COMBAT_PREVIEW_TRIALS 为0时返回 None。
+        
+        Returns:
+            见 simulate_boss_fights
+        """
+        if self.preview_trials <= 0:
+            return None
+        bucketed = CombatStats(
+            user_id=player.user_id,
+            name=player.name,
+            hp=_stat_bucket(player.hp),
+            max_hp=player.max_hp,
+            mp=player.mp,
+            max_mp=player.max_mp,
+            atk=_stat_bucket(player.atk),
+            defense=player.defense,
+            crit_rate=player.crit_rate
+        )
+        key = (bucketed.hp, bucketed.atk, bucketed.defense, bucketed.crit_rate,
+               boss.hp, boss.atk, boss.defense)
+        
+        task = self._preview_cache.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(
+                self.simulate_boss_fights, bucketed, boss, self.preview_trials, random.Random()
+            ))
+            self._preview_cache[key] = task
+            while len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+                self._preview_cache.popitem(last=False)
+        else:
+            self._preview_cache.move_to_end(key)
+        
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # 模拟失败的结果不缓存
+            if self._preview_cache.get(key) is task:
+                del self._preview_cache[key]
+            raise
@@ -27,35 +27,32 @@ class DualCultivationManager:
         now = int(time.time())
         expires_at = now + DUAL_CULT_REQUEST_EXPIRE
         
-        # 先清理该目标的旧请求
-        await self.db.conn.execute(
-            "DELETE FROM dual_cultivation_requests WHERE target_id = ?",
-            (target_id,)
-        )
-        
-        await self.db.conn.execute(
-            """
-            INSERT INTO dual_cultivation_requests (from_id, from_name, target_id, created_at, expires_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (from_id, from_name, target_id, now, expires_at)
-        )
-        await self.db.conn.commit()
-        
-        async with self.db.conn.execute("SELECT last_insert_rowid()") as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else 0
+        async with self.db.transaction():
+            # 先清理该目标的旧请求
+            await self.db.conn.execute(
+                "DELETE FROM dual_cultivation_requests WHERE target_id = ?",
+                (target_id,)
+            )
+
+            cursor = await self.db.conn.execute(
+                """
+                INSERT INTO dual_cultivation_requests (from_id, from_name, target_id, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (from_id, from_name, target_id, now, expires_at)
+            )
+        return cursor.lastrowid
     
     async def _get_pending_request(self, target_id: str) -> Optional[Dict]:
         """获取待处理的双修请求"""
         now = int(time.time())
         
-        # 清理过期请求
-        await self.db.conn.execute(
-            "DELETE FROM dual_cultivation_requests WHERE expires_at < ?",
-            (now,)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            # 清理过期请求
+            await self.db.conn.execute(
+                "DELETE FROM dual_cultivation_requests WHERE expires_at < ?",
+                (now,)
+            )
         
         async with self.db.conn.execute(
             """
@@ -80,11 +77,11 @@ class DualCultivationManager:
     
     async def _delete_request(self, request_id: int):
         """删除双修请求"""
-        await self.db.conn.execute(
-            "DELETE FROM dual_cultivation_requests WHERE id = ?",
-            (request_id,)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            await self.db.conn.execute(
+                "DELETE FROM dual_cultivation_requests WHERE id = ?",
+                (request_id,)
+            )
     
     async def send_request(self, initiator: Player, target_id: str) -> Tuple[bool, str]:
         """发起双修请求"""
@@ -210,12 +207,12 @@ class DualCultivationManager:
     
     async def _set_last_dual_time(self, user_id: str, timestamp: int):
         """设置上次双修时间"""
-        await self.db.conn.execute(
-            """
-            INSERT INTO dual_cultivation (user_id, last_dual_time)
-            VALUES (?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET last_dual_time = excluded.last_dual_time
-            """,
-            (user_id, timestamp)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            await self.db.conn.execute(
+                """
+                INSERT INTO dual_cultivation (user_id, last_dual_time)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_dual_time = excluded.last_dual_time
+                """,
+                (user_id, timestamp)
+            )
@@ -80,8 +80,8 @@ class GoldInteractionManager:
         sender.gold -= amount
         receiver.gold += amount
         
-        await self.db.update_player(sender)
-        await self.db.update_player(receiver)
+        await self.db.update_player(sender, flush=True)
+        await self.db.update_player(receiver, flush=True)
         
         receiver_name = receiver.user_name or f"道友{receiver.user_id[:6]}"
         sender_name = sender.user_name or f"道友{sender.user_id[:6]}"
@@ -156,8 +156,8 @@ class GoldInteractionManager:
             target.gold -= steal_amount
             thief.gold += steal_amount
             
-            await self.db.update_player(thief)
-            await self.db.update_player(target)
+            await self.db.update_player(thief, flush=True)
+            await self.db.update_player(target, flush=True)
             
             msg = (
                 f"🦊 偷窃成功！\n"
@@ -172,7 +172,7 @@ class GoldInteractionManager:
             penalty = int(thief.gold * config["fail_penalty_ratio"])
             thief.gold = max(0, thief.gold - penalty)
             
-            await self.db.update_player(thief)
+            await self.db.update_player(thief, flush=True)
             
             msg = (
                 f"🚨 偷窃失败！\n"
@@ -251,8 +251,8 @@ class GoldInteractionManager:
             target.gold -= rob_amount
             robber.gold += rob_amount
             
-            await self.db.update_player(robber)
-            await self.db.update_player(target)
+            await self.db.update_player(robber, flush=True)
+            await self.db.update_player(target, flush=True)
             
             msg = (
                 f"⚔️ 抢夺成功！\n"
@@ -273,8 +273,8 @@ class GoldInteractionManager:
             hp_loss = int(robber.hp * config["fail_damage_ratio"]) if robber.hp > 0 else 0
             robber.hp = max(1, robber.hp - hp_loss)
             
-            await self.db.update_player(robber)
-            await self.db.update_player(target)
+            await self.db.update_player(robber, flush=True)
+            await self.db.update_player(target, flush=True)
             
             msg = (
                 f"💀 抢夺失败！\n"
@@ -1,8 +1,9 @@
 # managers/impart_pk_manager.py
 """传承PK系统管理器"""
 import random
-from typing import Tuple
+from typing import Optional, Tuple
 from ..data import DataBase
+from ..data.result_cache import cached_result
 from ..models import Player
 from .combat_manager import CombatManager
 
@@ -16,12 +17,14 @@ class ImpartPkManager:
         self.db = db
         self.combat_mgr = combat_mgr
     
-    async def challenge_impart(self, attacker: Player, defender: Player) -> Tuple[bool, str, dict]:
+    async def challenge_impart(self, attacker: Player, defender: Player,
+                               seed: Optional[int] = None) -> Tuple[bool, str, dict]:
         """发起传承挑战
         
         Args:
             attacker: 挑战者
             defender: 被挑战者
+            seed: 随机种子，None 时随机生成；伤害浮动与传承收益都取自该种子的随机流
             
         Returns:
             (attacker_wins, battle_log, rewards)
@@ -35,6 +38,9 @@ class ImpartPkManager:
         def_stats = await self.combat_mgr.calculate_combat_stats(defender)
         
         # 战斗模拟
+        if seed is None:
+            seed = self.combat_mgr.new_seed()
+        rng = random.Random(seed)
         atk_hp = atk_stats.hp
         def_hp = def_stats.hp
         
@@ -47,7 +53,7 @@ class ImpartPkManager:
             
             # 攻击者出手
             damage = max(1, atk_stats.atk - def_stats.defense // 2)
-            damage = int(damage * random.uniform(0.8, 1.2))
+            damage = int(damage * rng.uniform(0.8, 1.2))
             def_hp -= damage
             battle_log.append(f"第{rounds}回合: {attacker.user_name or attacker.user_id} 造成 {damage} 伤害")
             
@@ -56,17 +62,17 @@ class ImpartPkManager:
             
             # 防守者反击
             counter_damage = max(1, def_stats.atk - atk_stats.defense // 2)
-            counter_damage = int(counter_damage * random.uniform(0.8, 1.2))
+            counter_damage = int(counter_damage * rng.uniform(0.8, 1.2))
             atk_hp -= counter_damage
             battle_log.append(f"第{rounds}回合: {defender.user_name or defender.user_id} 反击 {counter_damage}")
         
         # 判定胜负
         attacker_wins = def_hp <= 0 or (atk_hp > 0 and atk_hp >= def_hp)
         
-        rewards = {}
+        rewards = {"seed": seed}
         if attacker_wins:
             # 胜利奖励：获得传承加成
-            impart_gain = random.uniform(0.01, 0.05)  # 1%-5%
+            impart_gain = rng.uniform(0.01, 0.05)  # 1%-5%
             if attacker_impart:
                 new_atk_per = min(1.0, attacker_impart.impart_atk_per + impart_gain)
                 attacker_impart.impart_atk_per = new_atk_per
@@ -88,6 +94,7 @@ class ImpartPkManager:
         
         return attacker_wins, "\n".join(battle_log[-6:]), rewards  # 只返回最后6条log
     
+    @cached_result("impart", depends=("name",))
     async def get_impart_ranking(self, limit: int = 10) -> list:
         """获取传承排行榜"""
         # 查询所有传承数据，按攻击加成排序
@@ -96,22 +103,22 @@ class ImpartPkManager:
             SELECT user_id, impart_hp_per, impart_mp_per, impart_atk_per, 
                    impart_know_per, impart_burst_per
             FROM impart_info 
-            ORDER BY impart_atk_per DESC 
+            ORDER BY impart_atk_per DESC, user_id
             LIMIT ?
             """,
             (limit,)
         ) as cursor:
             rows = await cursor.fetchall()
-            results = []
-            for row in rows:
-                user_id = row[0]
-                player = await self.db.get_player_by_id(user_id)
-                if player:
-                    total_per = row[1] + row[2] + row[3] + row[4] + row[5]
-                    results.append({
-                        "user_id": user_id,
-                        "user_name": player.user_name or user_id[:8],
-                        "atk_per": row[3],
-                        "total_per": total_per
-                    })
-            return results
+        names = await self.db.get_player_names(row[0] for row in rows)
+        results = []
+        for row in rows:
+            user_id = row[0]
+            if user_id in names:
+                total_per = row[1] + row[2] + row[3] + row[4] + row[5]
+                results.append({
+                    "user_id": user_id,
+                    "user_name": names[user_id] or user_id[:8],
+                    "atk_per": row[3],
+                    "total_per": total_per
+                })
+        return results
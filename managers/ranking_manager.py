@@ -5,6 +5,7 @@
 
 from typing import Tuple, List, TYPE_CHECKING, Optional
 from ..data.data_manager import DataBase
+from ..data.result_cache import cached_result
 from ..managers.combat_manager import CombatManager
 
 if TYPE_CHECKING:
@@ -23,6 +24,35 @@ POSITION_MAP = {
 # 名称最大显示长度
 MAX_NAME_LENGTH = 12
 
+# 排行榜翻页提示使用的指令名：榜单 -> 指令
+PAGE_COMMANDS = {
+    "level": "境界排行",
+    "power": "战力排行",
+    "wealth": "灵石排行",
+    "sect": "宗门排行",
+    "deposit": "存款排行",
+}
+
+# 个人排名查询的榜单：榜单 -> (榜单名称, 分数格式化)
+MY_RANK_BOARDS = {
+    "level": ("境界榜", lambda v: f"修为 {int(v):,}"),
+    "power": ("战力榜", lambda v: f"战力 {int(v):,}"),
+    "wealth": ("灵石榜", lambda v: f"灵石 {int(v):,}"),
+    "deposit": ("存款榜", lambda v: f"存款 {int(v):,}"),
+    "tower": ("通天塔榜", lambda v: f"第{int(v)}层"),
+    "impart": ("传承榜", lambda v: f"ATK+{v:.1%}"),
+}
+
+# 榜单别名（我的排名 <榜单>）
+MY_RANK_ALIASES = {
+    "境界": "level", "修为": "level",
+    "战力": "power",
+    "灵石": "wealth", "财富": "wealth",
+    "存款": "deposit",
+    "通天塔": "tower", "爬塔": "tower",
+    "传承": "impart",
+}
+
 
 def _short_id(user_id) -> str:
     """安全获取短ID，防止非字符串类型报错"""
@@ -37,7 +67,43 @@ def _safe_name(player: Optional["Player"], fallback_id) -> str:
         name = player.user_name
     else:
         name = f"道友{_short_id(fallback_id)}"
-    
+    return _safe_name_text(name)
+
+
+async def load_ranking_page(db: DataBase, board: str, fetch, limit: int, page: int) -> Tuple[list, int]:
+    """按页码读取榜单的一页
+
+    第一页直接读取；其余页先在排行索引上定位上一页最后一名作为 keyset 游标
+    （OFFSET 跳过前面的索引条目，不回表），再从游标之后读取本页的行。
+
+    Args:
+        board: PAGED_BOARDS 中的榜单名
+        fetch: 形如 fetch(limit, after) 的查询方法
+
+    Returns:
+        (本页数据, 本页第一名的名次)，页码超出榜单时数据为空
+    """
+    start = (max(1, page) - 1) * limit
+    after = None
+    if start:
+        after = await db.ext.get_ranking_cursor(board, start)
+        if after is None:
+            return [], start + 1
+    return await fetch(limit, after), start + 1
+
+
+def page_footer(command: str, page: int, limit: int, count: int) -> str:
+    """翻页提示：本页已满时提示下一页，非第一页时提示上一页"""
+    hints = []
+    if page > 1:
+        hints.append(f"「{command} {page - 1}」上一页")
+    if count >= limit:
+        hints.append(f"「{command} {page + 1}」下一页")
+    return f"💡 发送{'，'.join(hints)}" if hints else ""
+
+
+def _safe_name_text(name: str) -> str:
+    """名称文本的截断与特殊字符过滤"""
     # 过滤危险字符（@可能触发群通知）
     name = name.replace("@", "＠")
     # 截断过长名称
@@ -62,36 +128,53 @@ class RankingManager:
             self.equipment_manager = EquipmentManager(self.db, self.config_manager)
         return self.equipment_manager
     
-    async def get_level_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+    def _calculate_attributes(self, player: "Player") -> dict:
+        """计算排行榜显示用的总属性（不含临时丹药效果）"""
+        equipped_items = self._get_equipment_manager().get_equipped_items(
+            player,
+            self.config_manager.items_data,
+            self.config_manager.weapons_data
+        )
+        return player.get_total_attributes(equipped_items, None)
+    
+    def _page_end(self, board: str, page: int, limit: int, count: int) -> str:
+        footer = page_footer(PAGE_COMMANDS[board], page, limit, count)
+        return f"{footer}\n" if footer else ""
+    
+    @cached_result("level", depends=("name",))
+    async def get_level_ranking(self, limit: int = 10, page: int = 1) -> Tuple[bool, str]:
         """
         境界排行榜
         
         Args:
-            limit: 显示数量
+            limit: 每页显示数量
+            page: 页码（从1开始）
             
         Returns:
             (成功标志, 消息)
         """
-        all_players = await self.db.get_all_players()
-        
-        if not all_players:
-            return False, "❌ 暂无数据！"
+        # 按修为排序（索引查询，只读取本页 limit 名）
+        top_players, start = await load_ranking_page(
+            self.db, "level", self.db.ext.get_experience_ranking, limit, page
+        )
         
-        # 按修为排序
-        sorted_players = sorted(all_players, key=lambda p: p.experience, reverse=True)[:limit]
+        if not top_players:
+            return False, "❌ 暂无数据！" if start == 1 else f"❌ 第{page}页暂无数据！"
         
-        msg = "📊 境界排行榜\n"
+        msg = "📊 境界排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, player in enumerate(sorted_players, 1):
+        for idx, player in enumerate(top_players, start):
             name = _safe_name(player, player.user_id)
             level_name = player.get_level(self.config_manager)
             msg += f"{idx}. {name}\n"
             msg += f"   境界：{level_name} | 修为：{player.experience:,}\n\n"
         
+        msg += self._page_end("level", page, limit, len(top_players))
         return True, msg
     
-    async def get_power_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+    @cached_result("power", depends=("name",))
+    async def get_power_ranking(self, limit: int = 10, page: int = 1) -> Tuple[bool, str]:
         """
         战力排行榜（基于综合属性）
         
@@ -99,45 +182,25 @@ class RankingManager:
         与玩家信息显示的战力保持一致
         
         Args:
-            limit: 显示数量
+            limit: 每页显示数量
+            page: 页码（从1开始）
             
         Returns:
             (成功标志, 消息)
         """
-        all_players = await self.db.get_all_players()
-        
-        if not all_players:
-            return False, "❌ 暂无数据！"
-        
-        # 计算战力（综合属性）
-        player_power = []
-        equipment_mgr = self._get_equipment_manager()
-        for player in all_players:
-            # 获取装备加成
-            equipped_items = equipment_mgr.get_equipped_items(
-                player,
-                self.config_manager.items_data,
-                self.config_manager.weapons_data
-            )
-            
-            # 排行榜显示基础战力，不含临时丹药效果（更公平）
-            total_attrs = player.get_total_attributes(equipped_items, None)
-            
-            # 战力 = 物伤 + 法伤 + 物防 + 法防 + 精神力/10
-            combat_power = (
-                int(total_attrs['physical_damage']) + int(total_attrs['magic_damage']) +
-                int(total_attrs['physical_defense']) + int(total_attrs['magic_defense']) +
-                int(total_attrs['mental_power']) // 10
-            )
-            player_power.append((player, combat_power, total_attrs))
-        
-        # 按战力排序
-        sorted_players = sorted(player_power, key=lambda x: x[1], reverse=True)[:limit]
-        
-        msg = "📊 战力排行榜\n"
+        # 按存储的基础战力排序（不含临时丹药效果，更公平；索引查询，只读取本页 limit 名）
+        top_players, start = await load_ranking_page(
+            self.db, "power", self.db.ext.get_power_ranking, limit, page
+        )
+        
+        if not top_players:
+            return False, "❌ 暂无数据！" if start == 1 else f"❌ 第{page}页暂无数据！"
+        
+        msg = "📊 战力排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, (player, power, attrs) in enumerate(sorted_players, 1):
+        for idx, player in enumerate(top_players, start):
+            attrs = self._calculate_attributes(player)
             name = _safe_name(player, player.user_id)
             # 显示主要攻击属性（根据修炼类型）
             if player.cultivation_type == "体修":
@@ -147,63 +210,70 @@ class RankingManager:
                 main_atk = int(attrs['magic_damage'])
                 atk_label = "法伤"
             msg += f"{idx}. {name}\n"
-            msg += f"   战力：{power:,} | {atk_label}：{main_atk:,}\n\n"
+            msg += f"   战力：{player.combat_power:,} | {atk_label}：{main_atk:,}\n\n"
         
+        msg += self._page_end("power", page, limit, len(top_players))
         return True, msg
     
-    async def get_wealth_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+    @cached_result("wealth", depends=("name",))
+    async def get_wealth_ranking(self, limit: int = 10, page: int = 1) -> Tuple[bool, str]:
         """
         财富排行榜（灵石）
         
         Args:
-            limit: 显示数量
+            limit: 每页显示数量
+            page: 页码（从1开始）
             
         Returns:
             (成功标志, 消息)
         """
-        all_players = await self.db.get_all_players()
-        
-        if not all_players:
-            return False, "❌ 暂无数据！"
+        # 按灵石排序（索引查询，只读取本页 limit 名）
+        top_players, start = await load_ranking_page(
+            self.db, "wealth", self.db.ext.get_gold_ranking, limit, page
+        )
         
-        # 按灵石排序
-        sorted_players = sorted(all_players, key=lambda p: p.gold, reverse=True)[:limit]
+        if not top_players:
+            return False, "❌ 暂无数据！" if start == 1 else f"❌ 第{page}页暂无数据！"
         
-        msg = "📊 财富排行榜\n"
+        msg = "📊 财富排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, player in enumerate(sorted_players, 1):
+        for idx, player in enumerate(top_players, start):
             name = _safe_name(player, player.user_id)
             msg += f"{idx}. {name}\n"
             msg += f"   灵石：{player.gold:,}\n\n"
         
+        msg += self._page_end("wealth", page, limit, len(top_players))
         return True, msg
     
-    async def get_sect_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+    @cached_result("sect", depends=("name",))
+    async def get_sect_ranking(self, limit: int = 10, page: int = 1) -> Tuple[bool, str]:
         """
         宗门排行榜（建设度）
         
         Args:
-            limit: 显示数量
+            limit: 每页显示数量
+            page: 页码（从1开始）
             
         Returns:
             (成功标志, 消息)
         """
-        all_sects = await self.db.ext.get_all_sects()
+        # 按建设度排序（成员数随宗门一并查出，宗主道号批量查询）
+        top_sects, start = await load_ranking_page(
+            self.db, "sect", self.db.ext.get_sect_ranking, limit, page
+        )
         
-        if not all_sects:
-            return False, "❌ 暂无宗门数据！"
+        if not top_sects:
+            return False, "❌ 暂无宗门数据！" if start == 1 else f"❌ 第{page}页暂无数据！"
         
-        # 显式按建设度排序，不依赖DB层的排序行为
-        top_sects = sorted(all_sects, key=lambda s: s.sect_scale, reverse=True)[:limit]
+        names = await self.db.get_player_names(sect.sect_owner for sect in top_sects)
         
-        msg = "📊 宗门排行榜\n"
+        msg = "📊 宗门排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, sect in enumerate(top_sects, 1):
-            owner = await self.db.get_player_by_id(sect.sect_owner)
-            owner_name = _safe_name(owner, sect.sect_owner)
-            members = await self.db.ext.get_sect_members(sect.sect_id)
+        for idx, sect in enumerate(top_sects, start):
+            owner_name = names.get(sect.sect_owner)
+            owner_name = _safe_name_text(owner_name) if owner_name else _safe_name(None, sect.sect_owner)
             
             # 宗门名称也需要安全处理
             sect_name = sect.sect_name.replace("@", "＠")
@@ -212,37 +282,85 @@ class RankingManager:
             
             msg += f"{idx}. 【{sect_name}】\n"
             msg += f"   宗主：{owner_name}\n"
-            msg += f"   建设度：{sect.sect_scale:,} | 成员：{len(members)}人\n\n"
+            msg += f"   建设度：{sect.sect_scale:,} | 成员：{sect.member_count}人\n\n"
         
+        msg += self._page_end("sect", page, limit, len(top_sects))
         return True, msg
     
-    async def get_deposit_ranking(self, limit: int = 10) -> Tuple[bool, str]:
+    @cached_result("deposit", depends=("name",))
+    async def get_deposit_ranking(self, limit: int = 10, page: int = 1) -> Tuple[bool, str]:
         """
         存款排行榜（银行存款）
         
         Args:
-            limit: 显示数量
+            limit: 每页显示数量
+            page: 页码（从1开始）
             
         Returns:
             (成功标志, 消息)
         """
-        rankings = await self.db.ext.get_deposit_ranking(limit)
+        rankings, start = await load_ranking_page(
+            self.db, "deposit", self.db.ext.get_deposit_ranking, limit, page
+        )
         
         if not rankings:
-            return False, "❌ 暂无存款数据！"
+            return False, "❌ 暂无存款数据！" if start == 1 else f"❌ 第{page}页暂无数据！"
+        
+        names = await self.db.get_player_names(item["user_id"] for item in rankings)
         
-        msg = "📊 存款排行榜\n"
+        msg = "📊 存款排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, item in enumerate(rankings, 1):
+        for idx, item in enumerate(rankings, start):
             uid = item["user_id"]
-            player = await self.db.get_player_by_id(uid)
-            name = _safe_name(player, uid)
+            name = _safe_name_text(names[uid]) if names.get(uid) else _safe_name(None, uid)
             msg += f"{idx}. {name}\n"
             msg += f"   存款：{item['balance']:,} 灵石\n\n"
         
+        msg += self._page_end("deposit", page, limit, len(rankings))
         return True, msg
     
+    async def get_my_rank(self, user_id: str, board_name: str = "") -> Tuple[bool, str]:
+        """
+        我的排名（名次按索引计数得出，不读取整个榜单）
+        
+        Args:
+            user_id: 玩家ID
+            board_name: 榜单名称（如"战力"），为空时显示各榜单名次
+            
+        Returns:
+            (成功标志, 消息)
+        """
+        if board_name:
+            board = MY_RANK_ALIASES.get(board_name.strip())
+            if not board:
+                return False, f"❌ 未知的榜单！可选：{'、'.join(MY_RANK_ALIASES)}"
+            boards = [board]
+        else:
+            boards = list(MY_RANK_BOARDS)
+        
+        # 指定榜单时显示前后各2名
+        neighbours = 2 if board_name else 0
+        msg = "📊 我的排名\n"
+        msg += "━━━━━━━━━━━━━━━\n"
+        for board in boards:
+            title, fmt = MY_RANK_BOARDS[board]
+            result = await self.db.ext.get_player_rank(board, user_id, neighbours)
+            if result is None:
+                msg += f"{title}：未上榜\n"
+                continue
+            msg += f"{title}：第 {result['rank']:,} 名（{fmt(result['score'])}）\n"
+            if neighbours:
+                msg += "\n"
+                for rank, uid, name, score in result["entries"]:
+                    marker = "👉 " if uid == str(user_id) else "   "
+                    display_name = _safe_name_text(name) if name else _safe_name(None, uid)
+                    msg += f"{marker}{rank:,}. {display_name} - {fmt(score)}\n"
+        
+        if not board_name:
+            msg += "\n💡 发送「我的排名 战力」等查看前后名次"
+        return True, msg.strip()
+    
     async def get_contribution_ranking(self, sect_id: int, limit: int = 10) -> Tuple[bool, str]:
         """
         宗门贡献度排行榜
@@ -123,7 +123,7 @@ class RedPacketManager:
         
         # 扣除灵石
         sender.gold -= total_amount
-        await self.db.update_player(sender)
+        await self.db.update_player(sender, flush=True)
         
         # 创建红包
         now = int(time.time())
@@ -213,7 +213,7 @@ class RedPacketManager:
         
         # 给用户加灵石
         user.gold += amount
-        await self.db.update_player(user)
+        await self.db.update_player(user, flush=True)
         
         user_name = user.user_name or f"道友{user.user_id[:6]}"
         
@@ -312,7 +312,7 @@ class RedPacketManager:
             player = await self.db.get_player_by_id(user_id)
             if player:
                 player.gold += total_refund
-                await self.db.update_player(player)
+                await self.db.update_player(player, flush=True)
         
         return total_refund, f"已退还 {total_refund:,} 灵石" if total_refund > 0 else ""
     
@@ -7,6 +7,7 @@ import random
 import time
 from typing import Tuple, List, Optional, Dict, TYPE_CHECKING
 from ..data.data_manager import DataBase
+from ..data.result_cache import cached_result
 from ..models_extended import Rift, UserStatus
 from ..models import Player
 
@@ -77,9 +78,10 @@ class RiftManager:
     
     def _get_level_name(self, level_index: int) -> str:
         """获取境界名称"""
-        if self.config_manager and hasattr(self.config_manager, 'level_data'):
-            if 0 <= level_index < len(self.config_manager.level_data):
-                return self.config_manager.level_data[level_index].get("level_name", f"境界{level_index}")
+        if self.config_manager and hasattr(self.config_manager, 'level_table'):
+            level_table = self.config_manager.level_table
+            if level_table.has_level(level_index):
+                return level_table.name(level_index) or f"境界{level_index}"
         # 默认境界名称
         level_names = ["炼气期一层", "炼气期二层", "炼气期三层", "炼气期四层", "炼气期五层",
                        "炼气期六层", "炼气期七层", "炼气期八层", "炼气期九层", "炼气期十层",
@@ -88,6 +90,7 @@ class RiftManager:
             return level_names[level_index]
         return f"境界{level_index}"
     
+    @cached_result("rift")
     async def list_rifts(self) -> Tuple[bool, str]:
         """
         列出所有秘境
@@ -240,9 +243,7 @@ class RiftManager:
                 is_pill = self._is_pill_item(item_name)
                 if is_pill:
                     # 存入丹药背包
-                    inventory = player.get_pills_inventory()
-                    inventory[item_name] = inventory.get(item_name, 0) + count
-                    player.set_pills_inventory(inventory)
+                    await self.db.ext.add_player_pill(player.user_id, item_name, count)
                     item_lines.append(f"  · {item_name} x{count}（丹药背包）")
                 elif self.storage_ring_manager:
                     success, _ = await self.storage_ring_manager.store_item(player, item_name, count, silent=True)
@@ -8,6 +8,7 @@ import random
 import time
 from typing import Tuple, List, Optional, Dict
 from ..data.data_manager import DataBase
+from ..data.result_cache import cached_result
 from ..models_extended import Sect, UserStatus
 from ..models import Player
 
@@ -264,8 +265,7 @@ class SectManager:
         owner_name = owner.user_name if owner and owner.user_name else sect.sect_owner
         
         # 获取成员数量
-        members = await self.db.ext.get_sect_members(sect.sect_id)
-        member_count = len(members)
+        member_count = sect.member_count
         
         # 构建信息
         position_name = self.POSITIONS.get(player.sect_position, "未知")
@@ -295,6 +295,7 @@ class SectManager:
         
         return True, info_msg, sect_data
     
+    @cached_result("sect", depends=("name",))
     async def list_all_sects(self) -> Tuple[bool, str]:
         """
         获取所有宗门列表
@@ -302,22 +303,20 @@ class SectManager:
         Returns:
             (成功标志, 消息)
         """
-        sects = await self.db.ext.get_all_sects()
+        sects = await self.db.ext.get_sect_ranking(10)  # 只显示前10个
         
         if not sects:
             return False, "❌ 当前还没有任何宗门！"
         
+        names = await self.db.get_player_names(sect.sect_owner for sect in sects)
+        
         msg = "🏛️ 宗门列表\n"
         msg += "━━━━━━━━━━━━━━━\n"
         
-        for idx, sect in enumerate(sects[:10], 1):  # 只显示前10个
-            owner = await self.db.get_player_by_id(sect.sect_owner)
-            owner_name = owner.user_name if owner and owner.user_name else "未知"
-            members = await self.db.ext.get_sect_members(sect.sect_id)
-            
+        for idx, sect in enumerate(sects, 1):
             msg += f"{idx}. 【{sect.sect_name}】\n"
-            msg += f"   宗主：{owner_name}\n"
-            msg += f"   建设度：{sect.sect_scale} | 成员：{len(members)}人\n\n"
+            msg += f"   宗主：{names.get(sect.sect_owner) or '未知'}\n"
+            msg += f"   建设度：{sect.sect_scale} | 成员：{sect.member_count}人\n\n"
         
         return True, msg
     
@@ -64,25 +64,24 @@ class SpiritEyeManager:
         
         config = SPIRIT_EYE_TYPES[eye_type]
         
-        await self.db.conn.execute(
-            """
-            INSERT INTO spirit_eyes (eye_type, eye_name, exp_per_hour, spawn_time)
-            VALUES (?, ?, ?, ?)
-            """,
-            (eye_type, config["name"], config["exp_per_hour"], int(time.time()))
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            await self.db.conn.execute(
+                """
+                INSERT INTO spirit_eyes (eye_type, eye_name, exp_per_hour, spawn_time)
+                VALUES (?, ?, ?, ?)
+                """,
+                (eye_type, config["name"], config["exp_per_hour"], int(time.time()))
+            )
         
         return True, f"天地间出现了一处【{config['name']}】！每小时可获得 {config['exp_per_hour']:,} 修为，速来抢占！"
     
     async def claim_spirit_eye(self, player: Player, eye_id: int) -> Tuple[bool, str]:
         """抢占灵眼（原子操作）"""
-        await self.db.conn.execute("BEGIN IMMEDIATE")
-        try:
+        async with self.db.transaction() as tx:
             # 检查是否已有灵眼
             existing = await self.get_user_spirit_eye(player.user_id)
             if existing:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"❌ 你已占据【{existing['eye_name']}】，无法再抢占。"
             
             # 获取目标灵眼（带锁）
@@ -92,37 +91,33 @@ class SpiritEyeManager:
             ) as cursor:
                 row = await cursor.fetchone()
                 if not row:
-                    await self.db.conn.rollback()
+                    await tx.rollback()
                     return False, "❌ 灵眼不存在。"
                 eye = dict(row)
             
             # 检查是否有主
             if eye["owner_id"]:
-                await self.db.conn.rollback()
+                await tx.rollback()
                 return False, f"❌ 此灵眼已被【{eye['owner_name'] or '某人'}】占据。"
             
             # 抢占
             now = int(time.time())
-            await self.db.conn.execute(
+            cursor = await self.db.conn.execute(
                 """UPDATE spirit_eyes SET owner_id = ?, owner_name = ?, claim_time = ?, last_collect_time = ?
                    WHERE eye_id = ? AND (owner_id IS NULL OR owner_id = '')""",
                 (player.user_id, player.user_name or player.user_id[:8], now, now, eye_id)
             )
             
             # 检查是否真的抢占成功（防止并发）
-            if self.db.conn.total_changes == 0:
-                await self.db.conn.rollback()
+            if cursor.rowcount == 0:
+                await tx.rollback()
                 return False, "❌ 抢占失败，灵眼已被他人占据。"
             
-            await self.db.conn.commit()
             return True, (
                 f"✨ 成功抢占【{eye['eye_name']}】！\n"
                 f"每小时可获得 {eye['exp_per_hour']:,} 修为！\n"
                 f"使用 /灵眼收取 领取收益"
             )
-        except Exception as e:
-            await self.db.conn.rollback()
-            raise
     
     async def collect_spirit_eye(self, player: Player) -> Tuple[bool, str]:
         """收取灵眼收益"""
@@ -146,14 +141,14 @@ class SpiritEyeManager:
         exp_income = eye["exp_per_hour"] * hours
         
         player.experience += exp_income
-        await self.db.update_player(player)
-        
-        # 更新last_collect_time
-        await self.db.conn.execute(
-            "UPDATE spirit_eyes SET last_collect_time = ? WHERE owner_id = ?",
-            (now, player.user_id)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            await self.db.update_player(player)
+
+            # 更新last_collect_time
+            await self.db.conn.execute(
+                "UPDATE spirit_eyes SET last_collect_time = ? WHERE owner_id = ?",
+                (now, player.user_id)
+            )
         
         return True, (
             f"✅ 灵眼收取成功！\n"
@@ -169,14 +164,14 @@ class SpiritEyeManager:
         if not eye:
             return False, "❌ 你没有占据灵眼。"
         
-        await self.db.conn.execute(
-            """
-            UPDATE spirit_eyes SET owner_id = NULL, owner_name = NULL, claim_time = NULL
-            WHERE owner_id = ?
-            """,
-            (user_id,)
-        )
-        await self.db.conn.commit()
+        async with self.db.transaction():
+            await self.db.conn.execute(
+                """
+                UPDATE spirit_eyes SET owner_id = NULL, owner_name = NULL, claim_time = NULL
+                WHERE owner_id = ?
+                """,
+                (user_id,)
+            )
         
         return True, f"已释放【{eye['eye_name']}】。"
     
@@ -214,9 +209,11 @@ class SpiritEyeManager:
         
         # 已被占领的灵眼
         if occupied:
+            # 按当前道号显示（占领时记录的道号在改道号后会过时）
+            names = await self.db.get_player_names(eye["owner_id"] for eye in occupied[:10])
             lines.append("【已被占领的灵眼】")
             for eye in occupied[:10]:
-                owner_name = eye.get('owner_name') or '未知'
+                owner_name = names.get(eye["owner_id"]) or eye.get('owner_name') or '未知'
                 lines.append(f"  [{eye['eye_id']}] {eye['eye_name']} - {owner_name}")
             if len(occupied) > 10:
                 lines.append(f"  ... 还有 {len(occupied) - 10} 个")
@@ -5,6 +5,8 @@ import time
 from typing import Tuple, Dict, List, Optional
 from dataclasses import dataclass
 from ..data import DataBase
+from ..data.result_cache import cached_result
+from .ranking_manager import load_ranking_page, page_footer
 from ..models import Player
 from .combat_manager import CombatManager, CombatStats
 
@@ -86,48 +88,44 @@ class TowerManager:
             await self.db.ext.save_tower_data(user_id, data)
         return data
     
-    async def challenge_floor(self, player: Player) -> Tuple[bool, str, dict]:
-        """挑战通天塔下一层
+    def _build_player_stats(self, player: Player, impart_info, apply: bool = True) -> CombatStats:
+        """根据玩家数据与传承加成生成战斗属性
         
-        Returns:
-            (是否胜利, 消息, 结果数据)
+        气血为0时按修为重算三维，apply=True 时把重算结果写回玩家对象。
         """
-        tower_data = await self.get_player_tower_data(player.user_id)
-        next_floor = tower_data["current_floor"] + 1
-        
-        # 生成Boss
-        boss = self._generate_boss(next_floor, player.experience)
-        
-        # 获取玩家buff
-        impart_info = await self.db.ext.get_impart_info(player.user_id)
         hp_buff = impart_info.impart_hp_per if impart_info else 0.0
         mp_buff = impart_info.impart_mp_per if impart_info else 0.0
         atk_buff = impart_info.impart_atk_per if impart_info else 0.0
         crit_buff = impart_info.impart_know_per if impart_info else 0.0
         
         # 计算玩家属性
-        if player.hp == 0:
+        hp, mp, atk = player.hp, player.mp, player.atk
+        if hp == 0:
             hp, mp = self.combat_mgr.calculate_hp_mp(player.experience, hp_buff, mp_buff)
             atk = self.combat_mgr.calculate_atk(player.experience, player.atkpractice, atk_buff)
-            player.hp = hp
-            player.mp = mp
-            player.atk = atk
+            if apply:
+                player.hp = hp
+                player.mp = mp
+                player.atk = atk
         
-        player_stats = CombatStats(
+        return CombatStats(
             user_id=player.user_id,
             name=player.user_name or f"道友{player.user_id[:6]}",
-            hp=player.hp,
+            hp=hp,
             max_hp=int(player.experience * (1 + hp_buff) // 2),
-            mp=player.mp,
+            mp=mp,
             max_mp=int(player.experience * (1 + mp_buff)),
-            atk=player.atk,
+            atk=atk,
             defense=0,
             crit_rate=int(crit_buff * 100),
             exp=player.experience
         )
-        
-        boss_stats = CombatStats(
-            user_id=f"tower_boss_{next_floor}",
+    
+    @staticmethod
+    def _build_boss_stats(boss: TowerBoss) -> CombatStats:
+        """生成Boss战斗属性"""
+        return CombatStats(
+            user_id=f"tower_boss_{boss.floor}",
             name=boss.name,
             hp=boss.hp,
             max_hp=boss.max_hp,
@@ -135,14 +133,23 @@ class TowerManager:
             max_mp=boss.max_hp,
             atk=boss.atk,
             defense=boss.defense,
-            crit_rate=20 + next_floor // 10,  # 层数越高会心越高
+            crit_rate=20 + boss.floor // 10,  # 层数越高会心越高
             exp=0
         )
+    
+    def _resolve_floor(self, player: Player, tower_data: dict, impart_info) -> dict:
+        """结算下一层的挑战（只修改内存中的玩家与通天塔数据，不读写数据库）
+        
+        Returns:
+            {"victory", "floor", "boss", "rounds", "player_final_hp", "rewards"}
+        """
+        next_floor = tower_data["current_floor"] + 1
+        boss = self._generate_boss(next_floor, player.experience)
+        player_stats = self._build_player_stats(player, impart_info)
         
-        # 战斗
-        result = self.combat_mgr.player_vs_boss(player_stats, boss_stats)
+        # 战斗（结果消息只显示回合数与剩余气血，不记录战斗过程）
+        result = self.combat_mgr.player_vs_boss(player_stats, self._build_boss_stats(boss), summary=True)
         
-        # 处理结果
         victory = result["winner"] == player.user_id
         rewards = {"points": 0, "gold": 0, "exp": 0}
         
@@ -170,22 +177,68 @@ class TowerManager:
                 player.gold += rewards["gold"]
                 player.experience += rewards["exp"]
             
-            await self.db.ext.save_tower_data(player.user_id, tower_data)
-            
-            # 更新玩家HP
             player.hp = result["player_final_hp"]
-            await self.db.update_player(player)
-            
+        else:
+            # 失败不扣层数
+            player.hp = max(1, result["player_final_hp"])
+        
+        return {
+            "victory": victory,
+            "floor": next_floor,
+            "boss": boss,
+            "rounds": result["rounds"],
+            "player_final_hp": result["player_final_hp"],
+            "rewards": rewards,
+        }
+    
+    def simulate_run(self, player: Player, tower_data: dict, impart_info, floors: int) -> List[dict]:
+        """连续结算多层挑战，遇到失败即停止（纯内存计算，可用于速通与预览）
+        
+        与逐层调用 challenge_floor 的结果一致：每层的Boss按当时的修为生成，
+        胜利后的剩余气血与层数奖励带入下一层。调用方决定是否把修改后的
+        player / tower_data 写回数据库（预览时传入副本即可）。
+        
+        Returns:
+            每层的结算结果列表（见 _resolve_floor）
+        """
+        results = []
+        for _ in range(floors):
+            floor_result = self._resolve_floor(player, tower_data, impart_info)
+            results.append(floor_result)
+            if not floor_result["victory"]:
+                break
+        return results
+    
+    async def challenge_floor(self, player: Player) -> Tuple[bool, str, dict]:
+        """挑战通天塔下一层
+        
+        Returns:
+            (是否胜利, 消息, 结果数据)
+        """
+        tower_data = await self.get_player_tower_data(player.user_id)
+        impart_info = await self.db.ext.get_impart_info(player.user_id)
+        
+        floor_result = self._resolve_floor(player, tower_data, impart_info)
+        victory = floor_result["victory"]
+        next_floor = floor_result["floor"]
+        rewards = floor_result["rewards"]
+        
+        if victory:
+            await self.db.ext.save_tower_data(player.user_id, tower_data)
+        # 更新玩家HP
+        await self.db.update_player(player)
+        
+        if victory:
             msg = f"""
 🗼 通天塔 - 第{next_floor}层
 ━━━━━━━━━━━━━━━
 ✅ 挑战成功！
 
-战斗回合：{result['rounds']}
-剩余气血：{result['player_final_hp']:,}
+战斗回合：{floor_result['rounds']}
+剩余气血：{floor_result['player_final_hp']:,}
 
 📊 获得奖励：
-  · 积分 +{points_earned}
+  · 积分 +{rewards['points']}
 """
             if rewards["gold"] > 0:
                 msg += f"  · 灵石 +{rewards['gold']:,}\n"
@@ -197,17 +250,13 @@ class TowerManager:
 当前层数：{next_floor} | 积分：{tower_data['points']:,}
             """.strip()
         else:
-            # 失败不扣层数
-            player.hp = max(1, result["player_final_hp"])
-            await self.db.update_player(player)
-            
             msg = f"""
 🗼 通天塔 - 第{next_floor}层
 ━━━━━━━━━━━━━━━
 ❌ 挑战失败！
 
-{boss.name} 太强了！
-战斗回合：{result['rounds']}
+{floor_result['boss'].name} 太强了！
+战斗回合：{floor_result['rounds']}
 
 💡 提示：提升修为后再来挑战
 当前层数：{tower_data['current_floor']} | 积分：{tower_data['points']:,}
@@ -216,30 +265,26 @@ class TowerManager:
         return victory, msg, {"victory": victory, "floor": next_floor, "rewards": rewards}
     
     async def speed_run(self, player: Player, floors: int = 10) -> Tuple[bool, str, dict]:
-        """速通通天塔（连续挑战多层）"""
+        """速通通天塔（连续挑战多层）
+        
+        所有层在内存中一次结算完毕，最后在一个事务中写入通天塔数据与玩家数据，
+        不再每层写库后重新读取玩家。
+        """
         floors = min(max(1, floors), self.speed_run_floors)
         
-        results = []
-        total_points = 0
-        total_gold = 0
-        total_exp = 0
-        victories = 0
-        
-        for i in range(floors):
-            victory, _, result_data = await self.challenge_floor(player)
-            results.append(result_data)
+        async with self.db.transaction():
+            tower_data = await self.get_player_tower_data(player.user_id)
+            impart_info = await self.db.ext.get_impart_info(player.user_id)
+            results = self.simulate_run(player, tower_data, impart_info, floors)
             
-            if victory:
-                victories += 1
-                total_points += result_data["rewards"]["points"]
-                total_gold += result_data["rewards"]["gold"]
-                total_exp += result_data["rewards"]["exp"]
-                # 刷新玩家数据
-                player = await self.db.get_player_by_id(player.user_id)
-            else:
-                break
+            victories = sum(1 for r in results if r["victory"])
+            if victories:
+                await self.db.ext.save_tower_data(player.user_id, tower_data)
+            await self.db.update_player(player)
         
-        tower_data = await self.get_player_tower_data(player.user_id)
+        total_points = sum(r["rewards"]["points"] for r in results)
+        total_gold = sum(r["rewards"]["gold"] for r in results)
+        total_exp = sum(r["rewards"]["exp"] for r in results)
         
         msg = f"""
 🗼 通天塔速通结果
@@ -285,6 +330,14 @@ class TowerManager:
         
         boss = self._generate_boss(next_floor, player.experience)
         
+        # 胜率预估
+        impart_info = await self.db.ext.get_impart_info(player.user_id)
+        player_stats = self._build_player_stats(player, impart_info, apply=False)
+        preview = await self.combat_mgr.preview_boss_fight(player_stats, self._build_boss_stats(boss))
+        preview_line = self.combat_mgr.format_preview(preview)
+        if preview_line:
+            preview_line += "\n"
+        
         # 下一个10层奖励
         next_milestone = ((next_floor - 1) // 10 + 1) * 10
         milestone_reward = self.floor_rewards.get(str(next_milestone), {})
@@ -296,7 +349,7 @@ class TowerManager:
 HP：{boss.hp:,}
 ATK：{boss.atk:,}
 防御：{boss.defense}%减伤
-━━━━━━━━━━━━━━━
+{preview_line}━━━━━━━━━━━━━━━
 📊 通关奖励：
   · 积分 +{self.points_per_floor}
 """
@@ -311,36 +364,44 @@ ATK：{boss.atk:,}
         
         return msg.strip()
     
-    async def get_floor_ranking(self, limit: int = 10) -> str:
-        """获取通天塔层数排行榜"""
-        rankings = await self.db.ext.get_tower_floor_ranking(limit)
+    @cached_result("tower", depends=("name",))
+    async def get_floor_ranking(self, limit: int = 10, page: int = 1) -> str:
+        """获取通天塔层数排行榜（page 为页码，按 keyset 游标翻页）"""
+        rankings, start = await load_ranking_page(
+            self.db, "tower", self.db.ext.get_tower_floor_ranking, limit, page
+        )
         
         if not rankings:
-            return "❌ 暂无排行数据"
+            return "❌ 暂无排行数据" if start == 1 else f"❌ 第{page}页暂无数据"
         
-        msg = "🗼 通天塔排行榜\n━━━━━━━━━━━━━━━\n"
+        msg = "🗼 通天塔排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n━━━━━━━━━━━━━━━\n"
         
-        for i, (user_id, name, floor) in enumerate(rankings, 1):
+        for i, (user_id, name, floor) in enumerate(rankings, start):
             medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
             display_name = name or f"道友{user_id[:6]}"
             msg += f"{medal} {display_name} - 第{floor}层\n"
         
+        msg += "\n" + page_footer("通天塔排行榜", page, limit, len(rankings))
         return msg.strip()
     
-    async def get_points_ranking(self, limit: int = 10) -> str:
-        """获取通天塔积分排行榜"""
-        rankings = await self.db.ext.get_tower_points_ranking(limit)
+    @cached_result("tower", depends=("name",))
+    async def get_points_ranking(self, limit: int = 10, page: int = 1) -> str:
+        """获取通天塔积分排行榜（page 为页码，按 keyset 游标翻页）"""
+        rankings, start = await load_ranking_page(
+            self.db, "tower_points", self.db.ext.get_tower_points_ranking, limit, page
+        )
         
         if not rankings:
-            return "❌ 暂无排行数据"
+            return "❌ 暂无排行数据" if start == 1 else f"❌ 第{page}页暂无数据"
         
-        msg = "🗼 通天塔积分排行榜\n━━━━━━━━━━━━━━━\n"
+        msg = "🗼 通天塔积分排行榜" + (f"（第{page}页）" if start > 1 else "") + "\n━━━━━━━━━━━━━━━\n"
         
-        for i, (user_id, name, points) in enumerate(rankings, 1):
+        for i, (user_id, name, points) in enumerate(rankings, start):
             medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
             display_name = name or f"道友{user_id[:6]}"
             msg += f"{medal} {display_name} - {points:,}积分\n"
         
+        msg += "\n" + page_footer("通天塔积分排行榜", page, limit, len(rankings))
         return msg.strip()
     
     def get_shop_info(self) -> str:
@@ -5,6 +5,7 @@ import time
 from typing import Tuple, Optional, Dict, List
 from ..data import DataBase
 from ..models import Player
+from .combat_manager import CombatManager
 
 __all__ = ["TribulationManager"]
 
@@ -90,7 +91,7 @@ class TribulationManager:
         """判断是否应该触发天劫"""
         return target_level >= TRIBULATION_CONFIG["trigger_level"]
     
-    def get_tribulation_type(self, player: Player) -> Dict:
+    def get_tribulation_type(self, player: Player, rng=random) -> Dict:
         """根据玩家属性随机选择天劫类型"""
         types = TRIBULATION_CONFIG["types"]
         
@@ -111,7 +112,7 @@ class TribulationManager:
         
         # 加权随机选择
         total = sum(weights.values())
-        roll = random.randint(1, total)
+        roll = rng.randint(1, total)
         cumulative = 0
         
         for trib_type, weight in weights.items():
@@ -121,7 +122,8 @@ class TribulationManager:
         
         return {"type": "thunder", **types["thunder"]}
     
-    def calculate_tribulation_damage(self, player: Player, trib_type: Dict, wave: int, target_level: int) -> int:
+    def calculate_tribulation_damage(self, player: Player, trib_type: Dict, wave: int, target_level: int,
+                                     rng=random) -> int:
         """计算天劫伤害"""
         base_ratio = trib_type["base_damage_ratio"]
         difficulty = TRIBULATION_CONFIG["difficulty_multiplier"].get(target_level, 1.0)
@@ -136,7 +138,7 @@ class TribulationManager:
         damage = int(base_value * base_ratio * difficulty * (1 + wave * 0.1))
         
         # 随机波动 ±20%
-        damage = int(damage * random.uniform(0.8, 1.2))
+        damage = int(damage * rng.uniform(0.8, 1.2))
         
         return max(1, damage)
     
@@ -151,13 +153,20 @@ class TribulationManager:
         
         return base_resist
     
-    async def execute_tribulation(self, player: Player, target_level: int) -> Tuple[bool, str, Dict]:
+    async def execute_tribulation(self, player: Player, target_level: int,
+                                  seed: Optional[int] = None) -> Tuple[bool, str, Dict]:
         """执行天劫
         
+        Args:
+            seed: 随机种子，None 时随机生成；天劫类型、每道伤害与完美抵抗都取自该种子的随机流
+        
         Returns:
             (是否成功渡劫, 消息, 详细结果)
         """
-        trib_type = self.get_tribulation_type(player)
+        if seed is None:
+            seed = CombatManager.new_seed()
+        rng = random.Random(seed)
+        trib_type = self.get_tribulation_type(player, rng)
         waves = trib_type["waves"]
         total_waves = waves[-1]  # 最大波数
         
@@ -181,13 +190,13 @@ class TribulationManager:
         survived_waves = 0
         
         for wave in range(1, actual_waves + 1):
-            damage = self.calculate_tribulation_damage(player, trib_type, wave, target_level)
+            damage = self.calculate_tribulation_damage(player, trib_type, wave, target_level, rng)
             
             # 抵抗减伤
             actual_damage = max(1, damage - resistance // (wave + 1))
             
             # 随机触发完美抵抗（5%概率）
-            if random.random() < 0.05:
+            if rng.random() < 0.05:
                 actual_damage = actual_damage // 2
                 battle_log.append(f"第{wave}道：完美抵抗！伤害减半 (-{actual_damage})")
             else:
@@ -211,6 +220,7 @@ class TribulationManager:
             "survived_waves": survived_waves,
             "total_damage": total_damage_taken,
             "success": success,
+            "seed": seed,
         }
         
         if success:
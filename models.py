@@ -1,15 +1,15 @@
 # models.py
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import TYPE_CHECKING, List, Optional
 import json
 
 if TYPE_CHECKING:
     from .config_manager import ConfigManager
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Item:
-    """装备物品模型"""
+    """装备物品模型（不可变，同一配置版本内由物品目录共享同一实例）"""
 
     item_id: str  # 物品唯一ID
     name: str  # 物品名称
@@ -112,28 +112,52 @@ class Player:
     permanent_pill_gains: str = "{}"  # 永久丹药累积增益（JSON字符串）
     has_resurrection_pill: bool = False  # 是否拥有回生丹效果
     has_debuff_shield: bool = False  # 是否拥有一次负面效果免疫
-    pills_inventory: str = "{}"  # 丹药背包（JSON字符串，格式：{pill_id: count}）
+    pills_inventory: str = "{}"  # 已废弃：丹药背包自v25起存放在 player_pills 表
 
     # 储物戒系统字段
     storage_ring: str = "基础储物戒"  # 当前装备的储物戒名称
-    storage_ring_items: str = "{}"  # 储物戒中的物品（JSON字符串，格式：{item_name: {count, bound}}）
+    storage_ring_items: str = "{}"  # 已废弃：储物戒物品自v25起存放在 player_items 表
 
     # Phase 1: 每日限制系统
     daily_pill_usage: str = "{}"  # 每日丹药使用次数（JSON字符串，格式：{pill_id: count}）
     last_daily_reset: str = ""  # 上次每日重置日期（格式：YYYY-MM-DD）
 
+    # 战力排行
+    combat_power: int = 0  # 基础战力（不含临时丹药效果），装备或基础属性变化时由数据层重算
+
+    # ===== 变更追踪（基线不是数据库字段，不参与 dataclass 比较）=====
+
+    def mark_clean(self):
+        """以当前字段值作为基线，之后 get_changed_fields 只返回相对基线的修改"""
+        self._snapshot = {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def get_changed_fields(self) -> dict:
+        """获取自上次 mark_clean 以来修改过的字段（不含 user_id）
+
+        未记录基线的玩家（例如新构造的对象）视为所有字段都已修改。
+        """
+        snapshot = getattr(self, "_snapshot", None)
+        changed = {}
+        for f in fields(self):
+            if f.name == "user_id":
+                continue
+            value = getattr(self, f.name)
+            if snapshot is None or snapshot.get(f.name) != value:
+                changed[f.name] = value
+        return changed
+
     def get_level(self, config_manager: "ConfigManager") -> str:
         """获取境界名称"""
-        level_data = config_manager.get_level_data(self.cultivation_type)
-        if 0 <= self.level_index < len(level_data):
-            return level_data[self.level_index]["level_name"]
+        names = config_manager.get_level_table(self.cultivation_type).names
+        if 0 <= self.level_index < len(names):
+            return names[self.level_index]
         return "未知境界"
 
     def get_required_exp(self, config_manager: "ConfigManager") -> int:
         """获取突破到下一境界所需的总修为"""
-        level_data = config_manager.get_level_data(self.cultivation_type)
-        if self.level_index + 1 < len(level_data):
-            return level_data[self.level_index + 1].get("exp_needed", 0)
+        exp_needed = config_manager.get_level_table(self.cultivation_type).exp_needed
+        if 0 <= self.level_index + 1 < len(exp_needed):
+            return exp_needed[self.level_index + 1]
         return 0
 
     def get_techniques_list(self) -> List[str]:
@@ -169,28 +193,6 @@ class Player:
         """设置永久丹药累积增益"""
         self.permanent_pill_gains = json.dumps(gains, ensure_ascii=False)
 
-    def get_pills_inventory(self) -> dict:
-        """获取丹药背包"""
-        try:
-            return json.loads(self.pills_inventory)
-        except (json.JSONDecodeError, TypeError, ValueError):
-            return {}
-
-    def set_pills_inventory(self, inventory: dict):
-        """设置丹药背包"""
-        self.pills_inventory = json.dumps(inventory, ensure_ascii=False)
-
-    def get_storage_ring_items(self) -> dict:
-        """获取储物戒物品"""
-        try:
-            return json.loads(self.storage_ring_items)
-        except (json.JSONDecodeError, TypeError, ValueError):
-            return {}
-
-    def set_storage_ring_items(self, items: dict):
-        """设置储物戒物品"""
-        self.storage_ring_items = json.dumps(items, ensure_ascii=False)
-
     def get_total_attributes(self, equipped_items: List[Item], pill_multipliers: Optional[dict] = None) -> dict:
         """计算包含装备加成和丹药效果的总属性
 
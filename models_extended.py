@@ -43,6 +43,7 @@ class Sect:
     mainbuff: str = "0"  # 主修功法buff ID列表（JSON字符串）
     secbuff: str = "0"  # 辅修功法buff ID列表（JSON字符串）
     elixir_room_level: int = 0  # 丹房等级
+    member_count: int = 0  # 成员数（玩家加入/退出/被踢出时维护）
     
     def get_mainbuff_list(self) -> List[int]:
         """获取主修功法ID列表"""
@@ -0,0 +1,131 @@
+# tests/test_boss_kill_rewards.py
+"""
+世界Boss并发击杀与奖励瓜分测试
+
+两名道友同时挑战同一个Boss：双方都按挑战开始时的Boss气血结算伤害，
+合计超过剩余气血。伤害原子扣减后只能有一名击杀者，击杀奖励按
+boss_damage 中的有效伤害瓜分给两人，另一人的安慰奖与分得的灵石都不会丢失。
+
+需要 AstrBot 运行环境（astrbot.api）与 aiosqlite。
+"""
+
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot.api")
+pytest.importorskip("aiosqlite")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT.parent) not in sys.path:
+    sys.path.insert(0, str(ROOT.parent))
+
+# 插件以包的形式加载（目录名即包名），data 需先于其他模块导入
+_data = importlib.import_module(f"{ROOT.name}.data")
+DataBase = _data.DataBase
+MigrationManager = _data.MigrationManager
+ConfigManager = importlib.import_module(f"{ROOT.name}.config_manager").ConfigManager
+Player = importlib.import_module(f"{ROOT.name}.models").Player
+Boss = importlib.import_module(f"{ROOT.name}.models_extended").Boss
+CombatManager = importlib.import_module(f"{ROOT.name}.managers.combat_manager").CombatManager
+BossManager = importlib.import_module(f"{ROOT.name}.managers.boss_manager").BossManager
+
+BOSS_HP = 10_000
+STONE_REWARD = 9_001  # 不能被伤害比例整除，检查取整余数归击杀者
+# 每名挑战者的模拟战斗中对Boss造成的伤害：合计超过Boss气血，单人都打不死
+DAMAGE = {"challenger_a": 7_000, "challenger_b": 6_000}
+START_GOLD = 1_000
+
+
+def _fixed_damage_fights(combat_mgr):
+    """让模拟战斗对Boss造成固定伤害（其余战斗结果照常计算）"""
+    player_vs_boss = combat_mgr.player_vs_boss
+
+    def fight(player, boss, *args, **kwargs):
+        boss_hp = boss.hp
+        result = player_vs_boss(player, boss, *args, **kwargs)
+        result["boss_final_hp"] = max(0, boss_hp - DAMAGE[player.user_id])
+        return result
+
+    combat_mgr.player_vs_boss = fight
+
+
+def _apply_together(db, count):
+    """所有挑战者都算出伤害后才一起结算，保证两场战斗都基于同一个Boss气血"""
+    apply_boss_damage = db.ext.apply_boss_damage
+    arrived = []
+    ready = asyncio.Event()
+
+    async def apply(*args):
+        arrived.append(args)
+        if len(arrived) == count:
+            ready.set()
+        await ready.wait()
+        return await apply_boss_damage(*args)
+
+    db.ext.apply_boss_damage = apply
+
+
+async def _gold(db, user_id):
+    await db.flush_players()
+    async with db.conn.execute("SELECT gold FROM players WHERE user_id = ?", (user_id,)) as cursor:
+        return (await cursor.fetchone())[0]
+
+
+def test_concurrent_kill_elects_one_killer_and_splits_reward(tmp_path):
+    config_manager = ConfigManager(ROOT)
+
+    async def run():
+        db = DataBase(str(tmp_path / "boss.db"), {})
+        await db.connect()
+        try:
+            await MigrationManager(db.conn, config_manager).migrate()
+            for user_id in DAMAGE:
+                await db.create_player(Player(
+                    user_id=user_id, user_name=user_id, experience=50_000, gold=START_GOLD
+                ))
+            boss_id = await db.ext.create_boss(Boss(
+                boss_id=0, boss_name="测试魔", boss_level="练气", hp=BOSS_HP, max_hp=BOSS_HP,
+                atk=100_000, stone_reward=STONE_REWARD, status=1
+            ))
+            combat_mgr = CombatManager()
+            _fixed_damage_fights(combat_mgr)
+            _apply_together(db, len(DAMAGE))
+            boss_mgr = BossManager(db, combat_mgr, config_manager)
+
+            results = await asyncio.gather(*(boss_mgr.challenge_boss(user_id, boss_id) for user_id in DAMAGE))
+            assert all(success for success, _, _ in results)
+            outcomes = {user_id: result for user_id, (_, _, result) in zip(DAMAGE, results)}
+            boss = await db.ext.get_boss_by_id(boss_id)
+            ranking = await db.ext.get_boss_damage_ranking(boss_id)
+            gold = {user_id: await _gold(db, user_id) for user_id in DAMAGE}
+            return outcomes, boss, ranking, gold
+        finally:
+            await db.close()
+
+    outcomes, boss, ranking, gold = asyncio.run(run())
+
+    killers = [user_id for user_id, result in outcomes.items() if result["killed"]]
+    assert len(killers) == 1
+    killer = killers[0]
+    (other,) = [user_id for user_id in DAMAGE if user_id != killer]
+
+    # Boss只被击杀一次，有效伤害按剩余气血封顶，合计恰好等于Boss气血
+    assert boss.status == 0 and boss.hp == 0
+    damage = {row["user_id"]: row["damage"] for row in ranking}
+    assert damage[other] == DAMAGE[other]
+    assert damage[killer] == BOSS_HP - DAMAGE[other]
+
+    # 击杀奖励按有效伤害瓜分，取整余数归击杀者
+    shares = outcomes[killer]["kill_shares"]
+    assert sum(shares.values()) == STONE_REWARD
+    assert shares[other] == STONE_REWARD * damage[other] // BOSS_HP
+    assert shares[killer] == STONE_REWARD - shares[other]
+    assert outcomes[killer]["reward"] == shares[killer]
+
+    # 击杀者只拿自己的份额；另一人拿到安慰奖和分得的灵石，两者都没有被覆盖
+    assert gold[killer] == START_GOLD + shares[killer]
+    assert gold[other] == START_GOLD + outcomes[other]["reward"] + shares[other]
@@ -0,0 +1,130 @@
+# tests/test_tower_speed_run.py
+"""
+通天塔速通一致性测试
+
+speed_run 在内存中连续结算多层（simulate_run）后一次写库；逐层调用
+challenge_floor 则每层读写数据库。两条路径使用同一个全局随机种子时，
+每层的胜负、奖励以及最终写入数据库的通天塔数据与玩家数据都应完全一致。
+
+需要 AstrBot 运行环境（astrbot.api）与 aiosqlite。
+"""
+
+import asyncio
+import importlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot.api")
+pytest.importorskip("aiosqlite")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT.parent) not in sys.path:
+    sys.path.insert(0, str(ROOT.parent))
+
+# 插件以包的形式加载（目录名即包名），data 需先于其他模块导入
+_data = importlib.import_module(f"{ROOT.name}.data")
+DataBase = _data.DataBase
+MigrationManager = _data.MigrationManager
+ConfigManager = importlib.import_module(f"{ROOT.name}.config_manager").ConfigManager
+Player = importlib.import_module(f"{ROOT.name}.models").Player
+CombatManager = importlib.import_module(f"{ROOT.name}.managers.combat_manager").CombatManager
+TowerManager = importlib.import_module(f"{ROOT.name}.managers.tower_manager").TowerManager
+
+SEEDS = range(40)
+FLOORS = 10
+# (修为, 攻击修炼等级)：第一层即可能失败、中途失败、失败层数随种子变化、一路通关
+PLAYERS = [(1_000, 0), (50_000, 100), (200_000, 200), (3_000_000, 300)]
+
+
+def _tower_state(data: dict) -> tuple:
+    return (data["current_floor"], data["highest_floor"], data["points"], data["total_points"])
+
+
+def _player_state(player) -> tuple:
+    return (player.gold, player.experience, player.hp, player.mp, player.atk)
+
+
+async def _open_db(path: Path, config_manager, experience: int, atkpractice: int):
+    db = DataBase(str(path), {})
+    await db.connect()
+    await MigrationManager(db.conn, config_manager).migrate()
+    await db.create_player(Player(
+        user_id="tower_tester", user_name="试炼者", experience=experience,
+        atkpractice=atkpractice, gold=1000
+    ))
+    return db
+
+
+async def _per_floor(path, config_manager, seed, experience, atkpractice):
+    """逐层调用 challenge_floor，遇到失败即停止（速通原来的做法）"""
+    db = await _open_db(path, config_manager, experience, atkpractice)
+    try:
+        tower = TowerManager(db, CombatManager(), config_manager)
+        random.seed(seed)
+        floors = []
+        for _ in range(FLOORS):
+            player = await db.get_player_by_id("tower_tester")
+            victory, _, result = await tower.challenge_floor(player)
+            floors.append((victory, result["floor"], result["rewards"]))
+            if not victory:
+                break
+        tower_data = await db.ext.get_tower_data("tower_tester")
+        player = await db.get_player_by_id("tower_tester")
+        return floors, _tower_state(tower_data), _player_state(player)
+    finally:
+        await db.close()
+
+
+async def _speed_run(path, config_manager, seed, experience, atkpractice):
+    """speed_run：内存中连续结算，最后一次写库"""
+    db = await _open_db(path, config_manager, experience, atkpractice)
+    try:
+        tower = TowerManager(db, CombatManager(), config_manager)
+        player = await db.get_player_by_id("tower_tester")
+        # simulate_run 的逐层结果用于与逐层挑战对比，speed_run 负责写库
+        captured = []
+        simulate_run = tower.simulate_run
+
+        def capture(*args, **kwargs):
+            results = simulate_run(*args, **kwargs)
+            captured.extend(results)
+            return results
+
+        tower.simulate_run = capture
+        random.seed(seed)
+        await tower.speed_run(player, FLOORS)
+        floors = [(r["victory"], r["floor"], r["rewards"]) for r in captured]
+        tower_data = await db.ext.get_tower_data("tower_tester")
+        player = await db.get_player_by_id("tower_tester")
+        return floors, _tower_state(tower_data), _player_state(player)
+    finally:
+        await db.close()
+
+
+def test_speed_run_matches_per_floor(tmp_path):
+    config_manager = ConfigManager(ROOT)
+    assert config_manager.tower_config.get("speed_run_floors", 10) >= FLOORS
+
+    async def run():
+        outcomes = set()
+        for experience, atkpractice in PLAYERS:
+            for seed in SEEDS:
+                name = f"{experience}_{atkpractice}_{seed}"
+                expected = await _per_floor(
+                    tmp_path / f"floor_{name}.db", config_manager, seed, experience, atkpractice
+                )
+                actual = await _speed_run(
+                    tmp_path / f"speed_{name}.db", config_manager, seed, experience, atkpractice
+                )
+                assert actual == expected, f"修为={experience} 攻击修炼={atkpractice} seed={seed}"
+                outcomes.add(sum(victory for victory, _, _ in expected[0]))
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    # 种子范围需要覆盖第一层失败、中途失败与全部通关，对比才有意义
+    assert 0 in outcomes
+    assert FLOORS in outcomes
+    assert any(0 < victories < FLOORS for victories in outcomes)